@@ -0,0 +1,179 @@
+# app/admission.py
+"""
+Control de admisión de las predicciones.
+
+Como mucho `max_in_flight` solicitudes usan el backend de inferencia a la vez;
+las siguientes esperan en una cola FIFO de hasta `max_queue` lugares. Una
+solicitud se descarta sin llegar al modelo cuando:
+
+- la cola está llena: se responde 503 enseguida, con `Retry-After`;
+- vence su plazo de espera (`queue_timeout`, o uno más corto pedido por el
+  cliente): 503 con `Retry-After`;
+- el cliente se desconecta mientras espera: se saca de la cola y no se
+  responde nada.
+
+Al terminar, una solicitud le pasa su lugar directamente a la primera de la
+cola, así que una que llega no puede adelantarse a las que ya esperan.
+Todo corre en el event loop, sin locks.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+# Peso de la última solicitud en el promedio móvil del tiempo de servicio
+_SERVICE_ALPHA = 0.1
+
+
+class Overloaded(Exception):
+    """
+    Solicitud descartada por el control de admisión.
+
+    Args:
+        reason: "queue_full", "deadline" o "disconnected"
+        retry_after: segundos sugeridos al cliente antes de reintentar
+    """
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Solicitud descartada ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Semáforo con cola acotada, plazos por solicitud y cancelación por desconexión.
+
+    Args:
+        max_in_flight: solicitudes que pueden estar en inferencia a la vez
+        max_queue: solicitudes que pueden esperar; 0 para rechazar apenas se llena
+        queue_timeout: segundos máximos de espera en la cola
+    """
+
+    def __init__(self, max_in_flight: int = 64, max_queue: int = 256, queue_timeout: float = 1.0):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight debe ser al menos 1")
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        # Estadísticas
+        self.admitted = 0
+        self.queued = 0
+        self.shed: Dict[str, int] = {"queue_full": 0, "deadline": 0, "disconnected": 0}
+        self.max_queue_seen = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self.avg_service = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Segundos hasta que se vacíe la cola actual al ritmo medio de servicio (al menos 1)."""
+        pending = len(self._waiters) + 1
+        return max(1, math.ceil(pending * self.avg_service / self.max_in_flight))
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.shed[reason] += 1
+        return Overloaded(reason, self.retry_after())
+
+    async def acquire(
+        self,
+        timeout: Optional[float] = None,
+        disconnected: Optional[Callable[[], Awaitable[Any]]] = None,
+    ) -> float:
+        """
+        Espera un lugar.
+
+        Args:
+            timeout: plazo de espera en segundos; None usa `queue_timeout`
+            disconnected: corrutina que termina cuando el cliente se desconecta
+
+        Returns:
+            float: segundos que la solicitud esperó en la cola
+
+        Raises:
+            Overloaded: si la cola está llena, vence el plazo o el cliente se va
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return 0.0
+        if len(self._waiters) >= self.max_queue:
+            raise self._reject("queue_full")
+
+        start = time.perf_counter()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        self.max_queue_seen = max(self.max_queue_seen, len(self._waiters))
+
+        watcher = asyncio.ensure_future(disconnected()) if disconnected is not None else None
+        try:
+            pending = {waiter} if watcher is None else {waiter, watcher}
+            timeout = self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+            await asyncio.wait(pending, timeout=max(timeout, 0.0), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+
+        if not waiter.done():
+            self._abandon(waiter)
+            raise self._reject("disconnected" if watcher is not None and watcher.done() else "deadline")
+
+        waited = time.perf_counter() - start
+        self.admitted += 1
+        self.waits += 1
+        self.total_wait += waited
+        self.max_wait_seen = max(self.max_wait_seen, waited)
+        return waited
+
+    def _abandon(self, waiter: asyncio.Future):
+        if waiter.done() and not waiter.cancelled():
+            # El lugar llegó justo cuando la solicitud se iba: pasarlo al siguiente
+            self.release()
+            return
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, service_seconds: Optional[float] = None):
+        """Libera un lugar (o se lo pasa a la primera solicitud de la cola)."""
+        if service_seconds is not None:
+            self.avg_service += _SERVICE_ALPHA * (service_seconds - self.avg_service)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "queue_timeout_ms": self.queue_timeout * 1000.0,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "max_queue_seen": self.max_queue_seen,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+            "avg_wait_ms": self.total_wait / self.waits * 1000.0 if self.waits else 0.0,
+            "max_wait_ms": self.max_wait_seen * 1000.0,
+            "avg_service_ms": self.avg_service * 1000.0,
+            "retry_after_seconds": self.retry_after(),
+        }
@@ -0,0 +1,313 @@
+# app/batch_cli.py
+"""
+Puntuación offline de archivos de pasajeros, sin levantar el servidor HTTP.
+
+Lee CSV o Parquet por bloques, valida cada bloque con las mismas reglas que la
+API (`PassengerInput` y `invalid_category_rows`), lo codifica en una matriz
+float32 en memoria compartida y reparte las filas en shards entre un pool de
+procesos. Cada worker carga el modelo una sola vez y lee/escribe directamente
+en la memoria compartida, sin serializar DataFrames. Mientras los workers
+puntúan un bloque, el proceso principal ya está leyendo y codificando el
+siguiente; los resultados se escriben de forma incremental.
+
+Uso:
+    python -m app.batch_cli pasajeros.csv -o predicciones.csv --workers 4
+    python -m app.batch_cli --synthetic 1000000 -o /dev/null --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.model import confidence_level, encoder, invalid_category_rows, manager, model
+from app.schemas import PassengerInput
+from app.synthetic import synthetic_frame
+
+# Estado de cada worker: el modelo (importado una vez) y las vistas a la memoria compartida
+_worker: Dict[str, object] = {}
+
+
+def _init_worker(x_name: str, proba_name: str, max_rows: int, n_features: int, n_classes: int):
+    from app.model import encoder as worker_encoder
+
+    x_shm = SharedMemory(name=x_name)
+    proba_shm = SharedMemory(name=proba_name)
+    _worker["estimator"] = worker_encoder.estimator
+    _worker["shm"] = (x_shm, proba_shm)
+    _worker["X"] = np.ndarray((2, max_rows, n_features), dtype=np.float32, buffer=x_shm.buf)
+    _worker["proba"] = np.ndarray((2, max_rows, n_classes), dtype=np.float64, buffer=proba_shm.buf)
+
+
+def _score_shard(slot: int, start: int, end: int) -> int:
+    X = _worker["X"][slot]
+    _worker["proba"][slot, start:end] = _worker["estimator"].predict_proba(X[start:end])
+    return end - start
+
+
+class SharedScorer:
+    """
+    Pool de procesos que puntúa matrices alojadas en memoria compartida.
+
+    Hay dos slots de entrada/salida para poder llenar uno mientras se puntúa el otro.
+    """
+
+    def __init__(self, workers: int, max_rows: int, shard_rows: int):
+        self.workers = workers
+        self.max_rows = max_rows
+        self.shard_rows = shard_rows
+        n_features = encoder.n_features_out
+        n_classes = len(model.classes_)
+
+        self._x_shm = SharedMemory(create=True, size=2 * max_rows * n_features * 4)
+        self._proba_shm = SharedMemory(create=True, size=2 * max_rows * n_classes * 8)
+        self.X = np.ndarray((2, max_rows, n_features), dtype=np.float32, buffer=self._x_shm.buf)
+        self.proba = np.ndarray((2, max_rows, n_classes), dtype=np.float64, buffer=self._proba_shm.buf)
+
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._x_shm.name, self._proba_shm.name, max_rows, n_features, n_classes),
+        )
+
+    def submit(self, slot: int, n_rows: int) -> List[Future]:
+        """Reparte las primeras `n_rows` filas del slot en shards entre los workers."""
+        return [
+            self._pool.submit(_score_shard, slot, start, min(start + self.shard_rows, n_rows))
+            for start in range(0, n_rows, self.shard_rows)
+        ]
+
+    def close(self):
+        self._pool.shutdown()
+        del self.X, self.proba
+        for shm in (self._x_shm, self._proba_shm):
+            shm.close()
+            shm.unlink()
+
+
+def schema_errors(data: pd.DataFrame) -> Dict[int, str]:
+    """
+    Versión vectorizada de la validación de `PassengerInput` para un DataFrame:
+    campos requeridos, tipos enteros y rangos `ge`/`le` declarados en el esquema.
+    """
+    errores: Dict[int, List[str]] = {}
+
+    def marcar(mask: np.ndarray, mensaje: str):
+        for pos in np.flatnonzero(mask):
+            errores.setdefault(int(pos), []).append(mensaje)
+
+    for field, info in PassengerInput.model_fields.items():
+        if not info.is_required():
+            continue
+        if field not in data.columns:
+            raise ValueError(f"Falta la columna requerida: {field}")
+        column = data[field]
+        missing = column.isna().to_numpy()
+        marcar(missing, f"{field}: Field required")
+        if info.annotation not in (int, float):
+            continue
+
+        values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float64)
+        marcar(np.isnan(values) & ~missing, f"{field}: debe ser numérico")
+        if info.annotation is int:
+            marcar(~np.isnan(values) & (values != np.round(values)), f"{field}: debe ser entero")
+        for constraint in info.metadata:
+            if hasattr(constraint, "ge"):
+                marcar(values < constraint.ge, f"{field}: debe ser >= {constraint.ge}")
+            if hasattr(constraint, "le"):
+                marcar(values > constraint.le, f"{field}: debe ser <= {constraint.le}")
+
+    return {pos: "; ".join(mensajes) for pos, mensajes in errores.items()}
+
+
+def read_chunks(path: Optional[Path], chunk_rows: int, synthetic: int) -> Iterator[pd.DataFrame]:
+    """Lee la entrada por bloques de `chunk_rows` filas."""
+    if synthetic:
+        for start in range(0, synthetic, chunk_rows):
+            yield synthetic_frame(min(chunk_rows, synthetic - start), seed=start)
+        return
+
+    if path.suffix.lower() in (".parquet", ".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Leer Parquet requiere pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            frame = batch.to_pandas()
+            for col in manager.current.categories.fields:
+                if col in frame.columns:
+                    frame[col] = frame[col].astype(str).where(frame[col].notna())
+            yield frame
+        return
+
+    # Las categóricas se leen como texto: '5' no debe convertirse en 5
+    dtype = {col: str for col in manager.current.categories.fields}
+    dtype["name"] = str
+    yield from pd.read_csv(path, chunksize=chunk_rows, dtype=dtype)
+
+
+class ResultWriter:
+    """Escribe resultados de forma incremental en CSV (o Parquet si hay pyarrow)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.parquet = path.suffix.lower() in (".parquet", ".pq")
+        self._writer = None
+        self._first = True
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise SystemExit("Escribir Parquet requiere pyarrow: pip install pyarrow")
+
+    def write(self, frame: pd.DataFrame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def prepare_chunk(frame: pd.DataFrame, out: np.ndarray):
+    """
+    Valida un bloque y codifica sus filas válidas en `out` (memoria compartida).
+
+    Returns:
+        Tuple: posiciones válidas dentro del bloque y errores por posición
+    """
+    errores = schema_errors(frame)
+    valid = np.array([pos for pos in range(len(frame)) if pos not in errores], dtype=np.intp)
+    if len(valid):
+        category_errors = invalid_category_rows(frame.iloc[valid])
+        if category_errors:
+            for pos, mensaje in category_errors.items():
+                errores[int(valid[pos])] = mensaje
+            valid = np.array([pos for pos in range(len(frame)) if pos not in errores], dtype=np.intp)
+
+    valid_frame = frame.iloc[valid]
+    out[: len(valid)] = encoder.transform_frame(valid_frame)
+    return valid, errores
+
+
+def build_results(frame: pd.DataFrame, offset: int, valid: np.ndarray, errores: Dict[int, str], proba: np.ndarray) -> pd.DataFrame:
+    n = len(frame)
+    names = frame["name"] if "name" in frame.columns else pd.Series([None] * n)
+    result = pd.DataFrame({
+        "row": np.arange(offset, offset + n),
+        "name": names.fillna("Pasajero desconocido").to_numpy(),
+        "survived": pd.array([pd.NA] * n, dtype="boolean"),
+        "probability_survive": np.full(n, np.nan),
+        "probability_die": np.full(n, np.nan),
+        "confidence_level": pd.array([None] * n, dtype="object"),
+        "error": pd.array([errores.get(pos) for pos in range(n)], dtype="object"),
+    })
+    if len(valid):
+        predictions = model.classes_[proba.argmax(axis=1)]
+        result.loc[valid, "survived"] = predictions == 1
+        result.loc[valid, "probability_survive"] = np.round(proba[:, 1] * 100, 2)
+        result.loc[valid, "probability_die"] = np.round(proba[:, 0] * 100, 2)
+        result.loc[valid, "confidence_level"] = [confidence_level(p) for p in proba.max(axis=1)]
+    return result
+
+
+def score_file(
+    input_path: Optional[Path],
+    output_path: Path,
+    workers: int,
+    chunk_rows: int,
+    shard_rows: int,
+    synthetic: int = 0,
+) -> Dict[str, float]:
+    """
+    Puntúa un archivo completo y devuelve estadísticas de throughput.
+    """
+    if encoder is None:
+        raise SystemExit("El codificador compilado no está disponible para este modelo")
+
+    scorer = SharedScorer(workers, chunk_rows, shard_rows)
+    writer = ResultWriter(output_path)
+    rows = failed = 0
+    start = time.perf_counter()
+    pending = None  # (slot, frame, offset, valid, errores, futures)
+
+    def finish(slot, frame, offset, valid, errores, futures):
+        wait(futures)
+        for future in futures:
+            future.result()
+        writer.write(build_results(frame, offset, valid, errores, scorer.proba[slot, : len(valid)]))
+
+    try:
+        slot = 0
+        for frame in read_chunks(input_path, chunk_rows, synthetic):
+            frame = frame.reset_index(drop=True)
+            valid, errores = prepare_chunk(frame, scorer.X[slot])
+            futures = scorer.submit(slot, len(valid))
+
+            # Escribir el bloque anterior mientras los workers puntúan este
+            if pending is not None:
+                finish(*pending)
+            pending = (slot, frame, rows, valid, errores, futures)
+
+            rows += len(frame)
+            failed += len(errores)
+            slot = 1 - slot
+            elapsed = time.perf_counter() - start
+            print(f"\r{rows:,} filas | {rows / elapsed:,.0f} filas/s", end="", file=sys.stderr, flush=True)
+
+        if pending is not None:
+            finish(*pending)
+    finally:
+        writer.close()
+        scorer.close()
+
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    return {
+        "rows": rows,
+        "failed": failed,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+        "workers": workers,
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", nargs="?", type=Path, help="Archivo CSV o Parquet con columnas de PassengerInput")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Archivo de salida (.csv o .parquet)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos de puntuación")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="Filas leídas y codificadas por bloque")
+    parser.add_argument("--shard-rows", type=int, default=10_000, help="Filas por tarea enviada a un worker")
+    parser.add_argument("--synthetic", type=int, default=0, help="Puntuar N pasajeros sintéticos en lugar de un archivo")
+    args = parser.parse_args(argv)
+
+    if args.input is None and not args.synthetic:
+        parser.error("Indicá un archivo de entrada o --synthetic N")
+
+    stats = score_file(args.input, args.output, args.workers, args.chunk_rows, args.shard_rows, args.synthetic)
+    print(
+        f"{stats['rows']:,} filas ({stats['failed']:,} con errores) en {stats['seconds']:.2f}s "
+        f"con {stats['workers']} workers: {stats['rows_per_second']:,.0f} filas/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+# app/batching.py
+"""
+Micro-batching de predicciones individuales.
+
+Las llamadas concurrentes a `/predict` se encolan y se resuelven en lotes con una
+sola llamada a `predict_proba`: el lote se envía cuando alcanza
+`max_batch_size` filas o cuando la fila más antigua esperó `max_wait_ms`.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.executor import InferenceExecutor
+from app.model import predict_survival_records
+
+
+class PredictionBatcher:
+    """
+    Coalescedor en proceso de llamadas a `predict_survival`.
+
+    Cada llamador recibe su propia fila del lote (o su propia excepción si sus
+    categorías son inválidas), con el mismo formato que `predict_survival`.
+    """
+
+    def __init__(self, executor: InferenceExecutor, max_batch_size: int = 64, max_wait_ms: float = 2.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size debe ser al menos 1")
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+        # Estadísticas
+        self.batches = 0
+        self.rows = 0
+        self.max_batch_seen = 0
+        self.batch_size_counts: Dict[int, int] = {}
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self.flushes_by_size = 0
+        self.flushes_by_timeout = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Esperar los lotes que ya están en el backend de inferencia
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+        # No dejar llamadores colgados
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("El servicio de predicción se está deteniendo"))
+
+    async def predict(self, row: Any) -> Tuple[int, float, float, str]:
+        """
+        Encola una fila y espera su predicción.
+
+        Args:
+            row (Any): datos del pasajero (`PassengerInput` o diccionario)
+
+        Returns:
+            Tuple: lo mismo que `predict_survival`
+        """
+        if self._queue is None:
+            raise RuntimeError("El batcher no fue iniciado")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future, time.perf_counter()))
+        return await future
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = batch[0][2] + self.max_wait
+
+            # Juntar filas hasta llenar el lote o vencer la espera de la más antigua
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            if len(batch) >= self.max_batch_size:
+                self.flushes_by_size += 1
+            else:
+                self.flushes_by_timeout += 1
+            # Enviar el lote sin bloquear la formación del siguiente
+            task = asyncio.create_task(self._flush(batch))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: List[Tuple[Any, asyncio.Future, float]]):
+        now = time.perf_counter()
+        pending = [(row, future) for row, future, _ in batch if not future.cancelled()]
+
+        size = len(batch)
+        self.batches += 1
+        self.rows += size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self.batch_size_counts[size] = self.batch_size_counts.get(size, 0) + 1
+        for _, _, enqueued in batch:
+            waited = now - enqueued
+            self.total_wait += waited
+            self.max_wait_seen = max(self.max_wait_seen, waited)
+
+        if not pending:
+            return
+
+        try:
+            # Las filas con categorías inválidas fallan solas, como en predict_survival
+            resultados, errores = await self.executor.run(predict_survival_records, [row for row, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for pos, (_, future) in enumerate(pending):
+            if future.done():
+                continue
+            if pos in errores:
+                future.set_exception(ValueError(errores[pos]))
+            else:
+                future.set_result(resultados[pos])
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidad de cola, distribución de tamaños de lote y tiempos de espera."""
+        return {
+            "enabled": True,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "flushes_by_size": self.flushes_by_size,
+            "flushes_by_timeout": self.flushes_by_timeout,
+            "mean_wait_ms": self.total_wait / self.rows * 1000.0 if self.rows else 0.0,
+            "max_wait_ms_seen": self.max_wait_seen * 1000.0,
+        }
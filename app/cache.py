@@ -0,0 +1,116 @@
+# app/cache.py
+"""
+Caché LRU de predicciones.
+
+Gran parte del espacio de entrada es categórico y el tráfico repite las mismas
+combinaciones de características (por ejemplo, los sliders de "qué pasaría si"
+del frontend). La clave es la tupla canónica de los campos que usa el modelo
+(sin `name`), con redondeo configurable de los floats, de modo que un acierto no
+pasa ni por el codificador ni por el bosque.
+"""
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+
+class PredictionCache:
+    """
+    Caché LRU acotada con TTL opcional, atada a una versión del modelo.
+
+    Args:
+        fields: campos que forman la clave, en orden (p. ej. `model.feature_names_in_`)
+        max_size: cantidad máxima de entradas; al superarla se desaloja la menos usada
+        ttl_seconds: vida máxima de una entrada; None para no expirar
+        float_decimals: decimales a los que se redondean los floats de la clave;
+            None para usar el valor exacto
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str],
+        max_size: int = 10000,
+        ttl_seconds: Optional[float] = None,
+        float_decimals: Optional[int] = None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size debe ser al menos 1")
+        self.fields = tuple(fields)
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.float_decimals = float_decimals
+        self.version: Optional[str] = None
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def key(self, record: Any) -> Tuple[Any, ...]:
+        """Tupla canónica de los campos del modelo (diccionario o `PassengerInput`)."""
+        get = record.get if isinstance(record, Mapping) else record.__dict__.get
+        values = tuple(get(field) for field in self.fields)
+        if self.float_decimals is None:
+            return values
+        return tuple(round(v, self.float_decimals) if isinstance(v, float) else v for v in values)
+
+    def get(self, key: Hashable, version: str) -> Optional[Any]:
+        """Devuelve el valor cacheado para `key`, o None si no está o venció."""
+        with self._lock:
+            self._check_version(version)
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any, version: str):
+        with self._lock:
+            self._check_version(version)
+            expires_at = time.monotonic() + self.ttl if self.ttl else None
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _check_version(self, version: str):
+        # Un artefacto nuevo invalida todas las predicciones cacheadas
+        if version != self.version:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self.version = version
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": True,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "float_decimals": self.float_decimals,
+            "model_version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
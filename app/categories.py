@@ -0,0 +1,135 @@
+# app/categories.py
+"""
+Categorías válidas de las variables categóricas, derivadas del modelo cargado.
+
+La fuente de verdad son las categorías aprendidas por los codificadores del
+pipeline (`OrdinalEncoder` / `OneHotEncoder` dentro del `ColumnTransformer`):
+cualquier otro valor el modelo lo trataría como desconocido. `CategoryTable` se
+construye una vez por artefacto, con frozensets precompilados para validar en
+`PassengerInput` y la respuesta de `/categories` ya armada.
+
+Por compatibilidad se siguen aceptando los códigos numéricos que la API
+documentó para `Age_Cut` ('0' a '8') y `Fare_cut` ('0' a '6'). El modelo no los
+conoce (sus categorías son intervalos como '(17.0, 22.0]'), así que se
+codifican como desconocidos, igual que antes.
+"""
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
+# Códigos aceptados por compatibilidad aunque el modelo no los conozca
+LEGACY_CODES = {
+    "Age_Cut": ["0", "1", "2", "3", "4", "5", "6", "7", "8"],
+    "Fare_cut": ["0", "1", "2", "3", "4", "5", "6"],
+}
+
+DETAILS = {
+    "Age_Cut": {
+        "0": "<=16 years",
+        "1": ">16 to 20.125 years",
+        "2": ">20.125 to 24 years",
+        "3": ">24 to 28 years",
+        "4": ">28 to 32.312 years",
+        "5": ">32.312 to 38 years",
+        "6": ">38 to 47 years",
+        "7": ">47 to 80 years",
+        "8": ">80 years"
+    },
+    "Fare_cut": {
+        "0": "<=7.775 pounds",
+        "1": ">7.775 to 8.662 pounds",
+        "2": ">8.662 to 14.454 pounds",
+        "3": ">14.454 to 26 pounds",
+        "4": ">26 to 52.369 pounds",
+        "5": ">52.369 to 512.329 pounds",
+        "6": ">512.329 pounds"
+    },
+    "Family_Size_Grouped": {
+        "Alone": "1 person",
+        "Small": "2 to 4 people",
+        "Medium": "5 to 6 people",
+        "Large": "7 or more people"
+    },
+    "Name_LengthGB": {
+        "(11.999, 18.0]": "Name length between 12 and 18 characters",
+        "(18.0, 20.0]": "Name length between 18 and 20 characters",
+        "(20.0, 23.0]": "Name length between 20 and 23 characters",
+        "(23.0, 25.0]": "Name length between 23 and 25 characters",
+        "(25.0, 27.25]": "Name length between 25 and 27.25 characters",
+        "(27.25, 30.0]": "Name length between 27.25 and 30 characters",
+        "(30.0, 38.0]": "Name length between 30 and 38 characters",
+        "(38.0, 82.0]": "Name length between 38 and 82 characters"
+    }
+}
+
+
+def pipeline_categories(pipeline: Any) -> Dict[str, List[str]]:
+    """
+    Categorías aprendidas por cada columna categórica del pipeline, en el orden
+    del `ColumnTransformer`.
+    """
+    transformer = pipeline.steps[0][1] if isinstance(pipeline, Pipeline) else pipeline
+    if not isinstance(transformer, ColumnTransformer):
+        raise ValueError("Se esperaba un Pipeline que empiece con un ColumnTransformer")
+
+    categories: Dict[str, List[str]] = {}
+    for _, steps, columns in transformer.transformers_:
+        steps = [s for _, s in steps.steps] if isinstance(steps, Pipeline) else [steps]
+        for step in steps:
+            if isinstance(step, (OrdinalEncoder, OneHotEncoder)):
+                for col, values in zip(columns, step.categories_):
+                    categories[col] = [str(v) for v in values]
+    return categories
+
+
+class CategoryTable:
+    """
+    Valores aceptados por cada campo categórico.
+
+    Args:
+        categories: categorías que conoce el modelo, por campo
+        legacy: valores aceptados además de los del modelo (ver `LEGACY_CODES`)
+        details: descripciones legibles que se agregan a `/categories`
+    """
+
+    def __init__(
+        self,
+        categories: Mapping[str, Iterable[str]],
+        legacy: Optional[Mapping[str, Iterable[str]]] = None,
+        details: Optional[Mapping[str, Mapping[str, str]]] = None,
+    ):
+        legacy = legacy or {}
+        self.categories = {field: list(values) for field, values in categories.items()}
+        self.legacy = {field: list(values) for field, values in legacy.items() if field in self.categories}
+        self.accepted = {
+            field: frozenset(values) | frozenset(self.legacy.get(field, ()))
+            for field, values in self.categories.items()
+        }
+        self.fields = tuple(self.categories)
+
+        # Respuesta de /categories, armada una sola vez
+        self.response: Dict[str, Any] = {
+            field: values + [v for v in self.legacy.get(field, []) if v not in values]
+            for field, values in self.categories.items()
+        }
+        self.response["model_categories"] = self.categories
+        self.response["legacy_codes"] = self.legacy
+        self.response["details"] = {field: dict(d) for field, d in (details or {}).items()}
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Any) -> "CategoryTable":
+        return cls(pipeline_categories(pipeline), LEGACY_CODES, DETAILS)
+
+    def is_valid(self, field: str, value: Any) -> bool:
+        accepted = self.accepted.get(field)
+        return accepted is None or value in accepted
+
+    def errors(self, record: Mapping[str, Any]) -> List[str]:
+        """Un mensaje por campo categórico con un valor que no está en la tabla."""
+        return [
+            f"Valor inválido en {field}: {record.get(field)!r}"
+            for field, accepted in self.accepted.items()
+            if record.get(field) not in accepted
+        ]
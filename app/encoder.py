@@ -0,0 +1,266 @@
+# app/encoder.py
+"""
+Codificador de características compilado a partir del pipeline cargado.
+
+El pipeline de sklearn recibe un DataFrame y vuelve a resolver columnas,
+imputar y codificar las categóricas en cada llamada. Para una sola fila, ese
+trabajo de pandas domina la latencia. `FeatureEncoder` lee una vez los pasos de
+preprocesamiento ya ajustados (imputadores, `OrdinalEncoder`, `OneHotEncoder`)
+y traduce pasajeros directamente a la matriz numpy que espera el estimador
+final, con el mismo layout y los mismos valores que `ColumnTransformer.transform`.
+"""
+import math
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, OrdinalEncoder
+
+
+class UnsupportedPipelineError(ValueError):
+    """El pipeline usa pasos que el codificador compilado no sabe reproducir."""
+
+
+def _field_values(records: Sequence[Any], field: str) -> List[Any]:
+    # Acepta diccionarios o instancias de PassengerInput
+    if isinstance(records[0], Mapping):
+        return [r[field] for r in records]
+    return [getattr(r, field) for r in records]
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class FeatureEncoder:
+    """
+    Traduce pasajeros a la matriz de características del estimador final.
+
+    Args:
+        pipeline: Pipeline de sklearn cuyo primer paso es un `ColumnTransformer`
+            ajustado y cuyo último paso es el clasificador.
+
+    Raises:
+        UnsupportedPipelineError: si algún paso no puede reproducirse exactamente.
+    """
+
+    def __init__(self, pipeline: Pipeline):
+        if not isinstance(pipeline, Pipeline) or not isinstance(pipeline.steps[0][1], ColumnTransformer):
+            raise UnsupportedPipelineError("Se esperaba un Pipeline que empiece con un ColumnTransformer")
+        if len(pipeline.steps) != 2:
+            raise UnsupportedPipelineError("Se esperaba un Pipeline de dos pasos: preprocesamiento y estimador")
+
+        self.transformer: ColumnTransformer = pipeline.steps[0][1]
+        self.estimator = pipeline.steps[-1][1]
+        self.feature_names_in = list(pipeline.feature_names_in_)
+
+        if self.transformer.sparse_output_:
+            raise UnsupportedPipelineError("El ColumnTransformer produce matrices dispersas")
+        if self.transformer._remainder[1] != "drop" and len(self.transformer._remainder[2]) > 0:
+            raise UnsupportedPipelineError("El ColumnTransformer deja columnas sin transformar (remainder)")
+
+        # (tipo, campo, columna de salida, valor imputado, tabla de codificación)
+        self._specs: List[Tuple[str, str, int, Any, Any]] = []
+        # Columna de salida -> campo de entrada, para agregar resultados por campo
+        self.output_fields: List[str] = []
+        self.n_features_out = 0
+
+        for name, steps, columns in self.transformer.transformers_:
+            if name == "remainder" or steps == "drop":
+                continue
+            self._compile_transformer(name, steps, list(columns))
+
+        if self.n_features_out != self.estimator.n_features_in_:
+            raise UnsupportedPipelineError(
+                f"El codificador produce {self.n_features_out} columnas pero el estimador espera {self.estimator.n_features_in_}"
+            )
+
+    def _compile_transformer(self, name: str, steps: Any, columns: List[str]):
+        steps = [s for _, s in steps.steps] if isinstance(steps, Pipeline) else [steps]
+
+        imputer: Optional[SimpleImputer] = None
+        if steps and isinstance(steps[0], SimpleImputer):
+            imputer = steps.pop(0)
+            if imputer.add_indicator or not _is_missing(imputer.missing_values):
+                raise UnsupportedPipelineError(f"Imputador no soportado en {name}")
+        fills = list(imputer.statistics_) if imputer is not None else [None] * len(columns)
+
+        offset = self.transformer.output_indices_[name].start
+        if offset != self.n_features_out:
+            raise UnsupportedPipelineError(f"Columnas de salida fuera de orden en {name}")
+
+        if not steps:
+            for col, fill in zip(columns, fills):
+                self._specs.append(("numeric", col, self.n_features_out, fill, None))
+                self.output_fields.append(col)
+                self.n_features_out += 1
+            return
+
+        if len(steps) != 1:
+            raise UnsupportedPipelineError(f"Pasos no soportados en {name}")
+        encoder = steps[0]
+
+        if isinstance(encoder, OrdinalEncoder):
+            if getattr(encoder, "_infrequent_enabled", False):
+                raise UnsupportedPipelineError(f"Categorías infrecuentes no soportadas en {name}")
+            unknown = encoder.unknown_value if encoder.handle_unknown == "use_encoded_value" else None
+            for col, fill, categories in zip(columns, fills, encoder.categories_):
+                table = {cat: float(i) for i, cat in enumerate(categories)}
+                self._specs.append(("ordinal", col, self.n_features_out, fill, (table, unknown)))
+                self.output_fields.append(col)
+                self.n_features_out += 1
+        elif isinstance(encoder, OneHotEncoder):
+            if encoder.drop is not None or getattr(encoder, "_infrequent_enabled", False):
+                raise UnsupportedPipelineError(f"OneHotEncoder con drop/infrecuentes no soportado en {name}")
+            for col, fill, categories in zip(columns, fills, encoder.categories_):
+                table = {cat: self.n_features_out + i for i, cat in enumerate(categories)}
+                self._specs.append(("onehot", col, self.n_features_out, fill, (table, encoder.handle_unknown != "error")))
+                self.output_fields.extend([col] * len(categories))
+                self.n_features_out += len(categories)
+        else:
+            raise UnsupportedPipelineError(f"Codificador no soportado en {name}: {type(encoder).__name__}")
+
+    def transform(self, records: Sequence[Any], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Codifica pasajeros (diccionarios o `PassengerInput`) en una matriz float64.
+
+        Args:
+            records: pasajeros a codificar
+            out: matriz preasignada opcional de forma (n, n_features_out)
+
+        Returns:
+            np.ndarray: matriz lista para `estimator.predict_proba`
+        """
+        n = len(records)
+        if out is None:
+            out = np.zeros((n, self.n_features_out), dtype=np.float64)
+        else:
+            out[:n] = 0.0
+        if n == 0:
+            return out
+        if n == 1:
+            return self._transform_one(records[0], out)
+
+        rows = np.arange(n)
+        for kind, field, col, fill, payload in self._specs:
+            values = _field_values(records, field)
+            if fill is not None:
+                values = [fill if _is_missing(v) else v for v in values]
+
+            if kind == "numeric":
+                out[:n, col] = values
+            elif kind == "ordinal":
+                table, unknown = payload
+                codes = [table.get(v) for v in values]
+                if unknown is None and None in codes:
+                    raise ValueError(f"Categoría desconocida en {field}")
+                out[:n, col] = [unknown if c is None else c for c in codes]
+            else:
+                table, ignore_unknown = payload
+                cols = np.fromiter((table.get(v, -1) for v in values), dtype=np.intp, count=n)
+                known = cols >= 0
+                if not ignore_unknown and not known.all():
+                    raise ValueError(f"Categoría desconocida en {field}")
+                out[rows[known], cols[known]] = 1.0
+        return out
+
+    def transform_frame(self, data: pd.DataFrame, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Igual que `transform`, pero vectorizado por columna sobre un DataFrame
+        (para lotes grandes leídos de archivos).
+        """
+        n = len(data)
+        if out is None:
+            out = np.zeros((n, self.n_features_out), dtype=np.float64)
+        else:
+            out[:n] = 0.0
+
+        for kind, field, col, fill, payload in self._specs:
+            column = data[field]
+            if fill is not None:
+                column = column.fillna(fill)
+
+            if kind == "numeric":
+                out[:n, col] = column.to_numpy(dtype=np.float64)
+            elif kind == "ordinal":
+                table, unknown = payload
+                codes = column.map(table)
+                if unknown is None and codes.isna().any():
+                    raise ValueError(f"Categoría desconocida en {field}")
+                out[:n, col] = codes.fillna(unknown).to_numpy(dtype=np.float64)
+            else:
+                table, ignore_unknown = payload
+                cols = column.map(table).to_numpy(dtype=np.float64)
+                known = ~np.isnan(cols)
+                if not ignore_unknown and not known.all():
+                    raise ValueError(f"Categoría desconocida en {field}")
+                out[np.flatnonzero(known), cols[known].astype(np.intp)] = 1.0
+        return out
+
+    def _transform_one(self, record: Any, out: np.ndarray) -> np.ndarray:
+        # Camino escalar: evita crear listas y arrays intermedios para una sola fila
+        row = out[0]
+        get = record.get if isinstance(record, Mapping) else record.__dict__.get
+        for kind, field, col, fill, payload in self._specs:
+            value = get(field)
+            if fill is not None and _is_missing(value):
+                value = fill
+
+            if kind == "numeric":
+                row[col] = value
+            elif kind == "ordinal":
+                table, unknown = payload
+                code = table.get(value, unknown)
+                if code is None:
+                    raise ValueError(f"Categoría desconocida en {field}")
+                row[col] = code
+            else:
+                table, ignore_unknown = payload
+                target = table.get(value)
+                if target is not None:
+                    row[target] = 1.0
+                elif not ignore_unknown:
+                    raise ValueError(f"Categoría desconocida en {field}")
+        return out
+
+    def verify(self, records: Sequence[Any]) -> bool:
+        """
+        Comprueba que la salida coincide bit a bit con `ColumnTransformer.transform`.
+        """
+        frame = pd.DataFrame([dict(r) for r in records])
+        expected = self.transformer.transform(frame[self.feature_names_in])
+        actual = self.transform(records)
+        single = np.vstack([self.transform([r]) for r in records])
+        return (
+            expected.dtype == actual.dtype
+            and np.array_equal(expected, actual)
+            and np.array_equal(expected, single)
+            and np.array_equal(expected, self.transform_frame(frame))
+        )
+
+    def probe_records(self) -> List[Dict[str, Any]]:
+        """
+        Genera filas de prueba que recorren todas las categorías conocidas, más
+        una categoría desconocida por columna y valores numéricos variados.
+        """
+        categorical: Dict[str, List[Any]] = {}
+        numeric: List[str] = []
+        for kind, field, _, _, payload in self._specs:
+            if kind == "numeric":
+                numeric.append(field)
+            else:
+                categorical[field] = list(payload[0]) + ["__desconocida__"]
+
+        n = max([len(v) for v in categorical.values()] + [8])
+        rng = np.random.default_rng(0)
+        records = []
+        for i in range(n):
+            record: Dict[str, Any] = {field: cats[i % len(cats)] for field, cats in categorical.items()}
+            for j, field in enumerate(numeric):
+                record[field] = float(rng.integers(0, 4)) if (i + j) % 2 else float(rng.uniform(0, 100))
+            records.append(record)
+        return records
@@ -0,0 +1,92 @@
+# app/executor.py
+"""
+Backend de ejecución para la inferencia.
+
+La evaluación del bosque y la construcción de DataFrames son trabajo de CPU; si
+se ejecutan dentro del event loop de uvicorn bloquean a todas las demás
+solicitudes. `InferenceExecutor` permite elegir dónde corren:
+
+- `inline`: en el propio event loop (comportamiento original).
+- `thread`: en un pool acotado de hilos (sklearn libera el GIL al recorrer los árboles).
+- `process`: en un pool de procesos; cada worker carga el modelo una sola vez.
+  Al recargar el modelo, `restart` reemplaza el pool por uno nuevo.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+BACKENDS = ("inline", "thread", "process")
+
+
+def _init_process_worker():
+    # Cargar el modelo una vez por worker, antes de recibir tareas
+    from app.model import manager
+
+    manager.load()
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+class InferenceExecutor:
+    """
+    Ejecuta funciones de inferencia fuera del event loop según el backend elegido.
+
+    Las funciones enviadas al backend `process` deben poder serializarse con
+    pickle (funciones de módulo, como las de `app.model`).
+    """
+
+    def __init__(self, backend: str = "inline", workers: Optional[int] = None, mp_context: str = "spawn"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend de inferencia desconocido: {backend!r}. Opciones: {BACKENDS}")
+        self.backend = backend
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.mp_context = mp_context
+        self._pool: Optional[Executor] = None
+
+    async def start(self):
+        if self.backend == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        elif self.backend == "process":
+            self._pool = await self._start_process_pool()
+
+    async def _start_process_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(self.mp_context),
+            initializer=_init_process_worker,
+        )
+        # Levantar los workers (y cargar el modelo) antes de recibir tráfico
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(pool, _warmup) for _ in range(self.workers)])
+        return pool
+
+    async def restart(self):
+        """
+        Reemplaza el pool de procesos por uno nuevo que carga el modelo vigente.
+
+        Las tareas ya enviadas terminan en el pool anterior. Los backends
+        `inline` y `thread` comparten el modelo del proceso y no lo necesitan.
+        """
+        if self.backend != "process" or self._pool is None:
+            return
+        pool = await self._start_process_pool()
+        old, self._pool = self._pool, pool
+        await asyncio.get_running_loop().run_in_executor(None, old.shutdown)
+
+    async def shutdown(self):
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Ejecuta `fn(*args)` en el backend configurado y devuelve su resultado."""
+        if self._pool is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+
+    def stats(self) -> dict:
+        return {"backend": self.backend, "workers": self.workers if self.backend != "inline" else 0}
@@ -0,0 +1,296 @@
+# app/features.py
+"""
+Derivación de las características del modelo a partir de los campos crudos de
+un pasajero (Name, Age, Fare, SibSp, Parch, Ticket, Cabin, ...), para que los
+clientes no tengan que repetir la ingeniería de características del
+entrenamiento.
+
+`FeatureDeriver` se construye una vez por artefacto:
+
+- Los cortes de `Age_Cut`, `Fare_cut` y `Name_LengthGB` se leen de los
+  intervalos que aprendieron los codificadores del modelo (ver
+  app/categories.py) y se guardan como arrays de límites; asignar el intervalo
+  es un `np.searchsorted` sobre todo el lote.
+- `Age` y `Fare` se pasan al modelo como los códigos 0-8 y 0-6 del
+  preprocesamiento (`CODE_CUTS`), que son los valores con los que se entrenó.
+- `Name_Size` es la posición del intervalo de `Name_LengthGB` (0 a 7), como
+  en el entrenamiento.
+- Títulos y prefijos de ticket se normalizan con diccionarios precompilados.
+  Un nombre sin título reconocible toma el título más frecuente de su sexo
+  (y 'Master' para los varones menores de `MASTER_MAX_AGE` años).
+
+Lo que no se puede derivar (edad o tarifa faltante, título o prefijo que el
+modelo no conoce) toma el valor con el que los imputadores del pipeline
+completan un faltante.
+"""
+import math
+from collections.abc import Mapping
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+
+from app.categories import CategoryTable
+
+# Límites superiores (inclusive) de los códigos numéricos de Age y Fare; ver DETAILS en app/categories.py
+CODE_CUTS = {
+    "Age": np.array([16.0, 20.125, 24.0, 28.0, 32.312, 38.0, 47.0, 80.0]),
+    "Fare": np.array([7.775, 8.662, 14.454, 26.0, 52.369, 512.329]),
+}
+
+# Campo crudo del que sale cada categoría por intervalos
+INTERVAL_SOURCES = {"Age_Cut": "Age", "Fare_cut": "Fare", "Name_LengthGB": "Name_Length"}
+
+# Tamaño de familia (SibSp + Parch + 1): límite superior inclusive de cada grupo
+FAMILY_CUTS = np.array([1, 4, 6])
+FAMILY_GROUPS = ("Alone", "Small", "Medium", "Large")
+
+# Título del nombre ("Apellido, Título. Nombre") -> categoría del modelo
+TITLE_GROUPS = {
+    "Mr": "Mr",
+    "Master": "Master",
+    "Dr": "Dr",
+    "Mrs": "married_women",
+    "Mme": "married_women",
+    "Miss": "unmarried_women",
+    "Mlle": "unmarried_women",
+    "Ms": "unmarried_women",
+    "Capt": "military",
+    "Col": "military",
+    "Major": "military",
+    "Don": "nobility",
+    "Dona": "nobility",
+    "Jonkheer": "nobility",
+    "Lady": "nobility",
+    "Sir": "nobility",
+    "the Countess": "nobility",
+    "Countess": "nobility",
+    "Rev": "religious",
+}
+
+# Variantes de prefijos de ticket que el preprocesamiento unificó
+TICKET_ALIASES = {
+    "SOTON/O.Q.": "SOTON/OQ",
+    "C.A.": "CA",
+    "CA.": "CA",
+    "SC/PARIS": "SC/Paris",
+    "S.C./PARIS": "SC/Paris",
+    "A/4.": "A/4",
+    "A/5.": "A/5",
+    "A.5.": "A/5",
+    "A./5.": "A/5",
+    "W./C.": "W/C",
+    "STON/O 2.": "STON/O2.",
+}
+
+# Título de un nombre sin título reconocible: el más frecuente de cada sexo en el dataset
+DEFAULT_TITLES = {"male": "Mr", "female": "unmarried_women"}
+
+# En el dataset los varones menores de esta edad figuran como 'Master'
+MASTER_MAX_AGE = 13.0
+
+
+def parse_interval(label: str) -> Tuple[float, float]:
+    """Límites de un intervalo con el formato de pandas, p. ej. '(17.0, 22.0]'."""
+    left, right = label.strip("([])").split(",")
+    return float(left), float(right)
+
+
+def pipeline_fill_values(pipeline: Any) -> Dict[str, Any]:
+    """Valor con el que los imputadores del pipeline completan cada columna faltante."""
+    transformer = pipeline.steps[0][1] if isinstance(pipeline, Pipeline) else pipeline
+    if not isinstance(transformer, ColumnTransformer):
+        raise ValueError("Se esperaba un Pipeline que empiece con un ColumnTransformer")
+
+    fills: Dict[str, Any] = {}
+    for _, steps, columns in transformer.transformers_:
+        steps = [s for _, s in steps.steps] if isinstance(steps, Pipeline) else [steps]
+        for step in steps:
+            if isinstance(step, SimpleImputer):
+                for col, value in zip(columns, step.statistics_):
+                    fills[col] = value.item() if isinstance(value, np.generic) else value
+    return fills
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value == "" or (isinstance(value, float) and math.isnan(value))
+
+
+def _column(rows: Sequence[Mapping], field: str) -> List[Any]:
+    return [row.get(field) for row in rows]
+
+
+def _numbers(values: List[Any]) -> np.ndarray:
+    return np.array([np.nan if _is_missing(v) else v for v in values], dtype=np.float64)
+
+
+def _title(name: str) -> str:
+    # "Kelly, Mr. James" -> "Mr", como en el entrenamiento. Sin coma se busca
+    # una palabra conocida terminada en punto: "Mrs. Jane Smith" -> "Mrs"
+    _, comma, rest = name.partition(",")
+    if comma:
+        return rest.partition(".")[0].strip()
+    for word in name.split():
+        if word.endswith(".") and word[:-1] in TITLE_GROUPS:
+            return word[:-1]
+    return ""
+
+
+class IntervalBins:
+    """
+    Intervalos cerrados a derecha, ordenados por su límite superior.
+
+    Los valores por debajo del primero o por encima del último caen en el
+    intervalo del extremo, como un pasajero fuera del rango de entrenamiento.
+    """
+
+    def __init__(self, labels: Sequence[str]):
+        bounds = sorted((parse_interval(label)[1], label) for label in labels)
+        self.rights = np.array([right for right, _ in bounds])
+        self.labels = np.array([label for _, label in bounds], dtype=object)
+
+    def index(self, values: np.ndarray) -> np.ndarray:
+        """Posición del intervalo de cada valor (los NaN quedan en -1)."""
+        idx = np.minimum(np.searchsorted(self.rights, values, side="left"), len(self.rights) - 1)
+        idx[np.isnan(values)] = -1
+        return idx
+
+
+class FeatureDeriver:
+    """
+    Traduce pasajeros crudos a registros con el esquema de `PassengerInput`.
+
+    Args:
+        categories: tabla de categorías del modelo
+        fills: valores de imputación del pipeline (ver `pipeline_fill_values`)
+    """
+
+    def __init__(self, categories: CategoryTable, fills: Mapping[str, Any]):
+        self.fills = dict(fills)
+        self.bins = {
+            field: IntervalBins(categories.categories[field])
+            for field in INTERVAL_SOURCES
+            if field in categories.categories
+        }
+
+        titles = set(categories.categories.get("Title", ()))
+        self.titles = {raw: group for raw, group in TITLE_GROUPS.items() if group in titles}
+        self.titles.update({title: title for title in titles})
+
+        # Prefijo en mayúsculas -> categoría del modelo
+        locations = categories.categories.get("TicketLocation", ())
+        self.tickets = {location.upper(): location for location in locations}
+        self.tickets.update(
+            {alias: location for alias, location in TICKET_ALIASES.items() if location in locations}
+        )
+
+    @classmethod
+    def from_pipeline(cls, pipeline: Any, categories: CategoryTable) -> "FeatureDeriver":
+        return cls(categories, pipeline_fill_values(pipeline))
+
+    def _interval(self, field: str, values: np.ndarray) -> Tuple[List[Any], np.ndarray]:
+        bins = self.bins[field]
+        idx = bins.index(values)
+        labels = bins.labels[idx].tolist()
+        fill = self.fills.get(field)
+        missing = np.flatnonzero(idx < 0)
+        for pos in missing:
+            labels[pos] = fill
+        return labels, idx
+
+    def _default_title(self, sex: Any, years: float) -> Any:
+        # Sin título reconocible: por sexo (y edad), o el valor de imputación del pipeline
+        title = DEFAULT_TITLES.get(sex)
+        if title == "Mr" and years < MASTER_MAX_AGE:
+            title = "Master"
+        return title if title in self.titles else self.fills.get("Title")
+
+    def derive(self, rows: Sequence[Any]) -> List[Dict[str, Any]]:
+        """
+        Deriva las características de un lote de pasajeros crudos.
+
+        Args:
+            rows: diccionarios o `RawPassengerInput` con los campos crudos
+
+        Returns:
+            List[Dict]: un registro por pasajero, listo para `predict_survival_records`
+        """
+        n = len(rows)
+        if n == 0:
+            return []
+        rows = [row if isinstance(row, Mapping) else row.__dict__ for row in rows]
+
+        names = ["" if _is_missing(v) else str(v) for v in _column(rows, "Name")]
+        age = _numbers(_column(rows, "Age"))
+        fare = _numbers(_column(rows, "Fare"))
+        name_length = np.fromiter((len(name) for name in names), dtype=np.float64, count=n)
+        sibsp = np.nan_to_num(_numbers(_column(rows, "SibSp")))
+        parch = np.nan_to_num(_numbers(_column(rows, "Parch")))
+
+        columns: Dict[str, List[Any]] = {}
+
+        # Códigos numéricos de Age y Fare; un faltante toma la mediana del imputador
+        for field, values in (("Age", age), ("Fare", fare)):
+            codes = np.searchsorted(CODE_CUTS[field], values, side="left").astype(np.float64)
+            codes[np.isnan(values)] = self.fills.get(field, np.nan)
+            columns[field] = codes.tolist()
+
+        sources = {"Age": age, "Fare": fare, "Name_Length": name_length}
+        for field, source in INTERVAL_SOURCES.items():
+            if field in self.bins:
+                columns[field], idx = self._interval(field, sources[source])
+                if field == "Name_LengthGB":
+                    columns["Name_Size"] = idx.astype(np.float64).tolist()
+
+        family = np.searchsorted(FAMILY_CUTS, sibsp + parch + 1, side="left")
+        columns["Family_Size_Grouped"] = np.array(FAMILY_GROUPS, dtype=object)[family].tolist()
+
+        sexes = [None if _is_missing(v) else str(v).strip().lower() for v in _column(rows, "Sex")]
+        columns["Title"] = [
+            self.titles.get(_title(name)) or self._default_title(sex, years)
+            for name, sex, years in zip(names, sexes, age.tolist())
+        ]
+
+        # Prefijo: todo lo anterior al número del ticket; sin prefijo es 'Blank'
+        location_fill = self.fills.get("TicketLocation")
+        locations, numbers = [], []
+        for ticket in _column(rows, "Ticket"):
+            parts = [] if _is_missing(ticket) else str(ticket).split()
+            numbers.append(parts[-1] if parts else None)
+            if len(parts) < 2:
+                locations.append(self.tickets.get("BLANK", location_fill))
+                continue
+            prefix = " ".join(parts[:-1]).upper()
+            location = self.tickets.get(prefix) or self.tickets.get(parts[0].upper(), location_fill)
+            locations.append(location)
+        columns["TicketLocation"] = locations
+
+        # Pasajeros del mismo lote con el mismo número de ticket, salvo que venga explícito
+        known = [pos for pos, number in enumerate(numbers) if number is not None]
+        counts = np.ones(n, dtype=np.int64)
+        if known:
+            _, inverse, totals = np.unique(
+                np.array([numbers[pos] for pos in known], dtype=object).astype(str),
+                return_inverse=True,
+                return_counts=True,
+            )
+            counts[known] = totals[inverse]
+        explicit = _column(rows, "TicketNumberCounts")
+        columns["TicketNumberCounts"] = [
+            int(count) if _is_missing(given) else int(given)
+            for count, given in zip(np.minimum(counts, 11).tolist(), explicit)
+        ]
+
+        columns["Cabin_Assigned"] = [0 if _is_missing(cabin) else 1 for cabin in _column(rows, "Cabin")]
+        columns["Pclass"] = _column(rows, "Pclass")
+        columns["Sex"] = sexes
+        embarked_fill = self.fills.get("Embarked")
+        columns["Embarked"] = [embarked_fill if _is_missing(v) else str(v).strip().upper() for v in _column(rows, "Embarked")]
+
+        fields = list(columns)
+        records = [dict(zip(fields, values)) for values in zip(*columns.values())]
+        for record, name in zip(records, names):
+            record["name"] = name or None
+        return records
@@ -0,0 +1,357 @@
+# app/forest.py
+"""
+Evaluador de Random Forest sobre arrays planos.
+
+`RandomForestClassifier.predict_proba` recorre cada árbol por separado (un
+objeto `Tree` por estimador) y `predict` vuelve a recorrer todo el bosque.
+`FlatForest` exporta una sola vez los árboles ajustados a arrays numpy
+contiguos (feature, umbral, hijos y distribución de clases por nodo) y evalúa
+un lote completo contra todos los árboles en un único recorrido vectorizado,
+devolviendo clase y probabilidades a la vez.
+
+Los resultados coinciden bit a bit con sklearn:
+
+- Los umbrales se guardan en float32 redondeados hacia abajo. Como sklearn
+  convierte la entrada a float32, `x <= umbral` da lo mismo con el umbral
+  original en float64 que con el float32 más grande que no lo supera.
+- Las distribuciones de clase se mantienen en float64 (en float32 no serían
+  exactas) y se suman árbol por árbol en el mismo orden que sklearn.
+
+`predict_proba_early_exit` recorre el bosque por tramos de árboles y deja de
+evaluar una fila cuando los árboles que faltan ya no pueden cambiar su clase
+(ni, si se pide, su nivel de confianza).
+
+La entrada no debe contener NaN: el codificador ya imputa los faltantes.
+"""
+from pathlib import Path
+from typing import Any, Sequence, Tuple
+
+import joblib
+import numpy as np
+
+# Filas evaluadas a la vez: acota la memoria de los índices (árboles x filas)
+# y los mantiene en caché
+DEFAULT_BLOCK_ROWS = 512
+# Árboles por tramo en la evaluación con salida temprana
+DEFAULT_CHUNK_TREES = 25
+# Margen para que el redondeo de las sumas no dé por decidida una fila en el límite
+_EXIT_MARGIN = 1e-9
+
+# Estado que se guarda en disco; incluye las copias con índices nativos para que
+# también se compartan al abrir el archivo con `mmap_mode`
+_SAVED_ARRAYS = ("feature", "threshold", "children", "value", "roots", "_feature", "_children")
+
+
+def unwrap_forest(estimator: Any) -> Any:
+    """Devuelve el bosque ajustado, atravesando envoltorios como `GridSearchCV`."""
+    while hasattr(estimator, "best_estimator_"):
+        estimator = estimator.best_estimator_
+    if not hasattr(estimator, "estimators_") or not hasattr(estimator, "classes_"):
+        raise ValueError(f"El estimador {type(estimator).__name__} no es un bosque de clasificación")
+    if getattr(estimator, "n_outputs_", 1) != 1:
+        raise ValueError("Solo se soportan bosques de una salida")
+    return estimator
+
+
+class FlatForest:
+    """
+    Bosque de clasificación exportado a arrays contiguos.
+
+    Attributes:
+        feature: índice de feature por nodo (int16 si alcanza; 0 en las hojas)
+        threshold: umbral float32 por nodo (+inf en las hojas)
+        children: hijos izquierdo y derecho por nodo; las hojas apuntan a sí mismas
+        value: distribución de clases float64, una fila contigua por clase
+        roots: índice global de la raíz de cada árbol
+    """
+
+    def __init__(self, estimator: Any, block_rows: int = DEFAULT_BLOCK_ROWS):
+        forest = unwrap_forest(estimator)
+        self.classes_ = forest.classes_
+        self.n_classes = len(forest.classes_)
+        self.n_features_in_ = forest.n_features_in_
+        self.n_trees = len(forest.estimators_)
+        self.block_rows = block_rows
+
+        trees = [e.tree_ for e in forest.estimators_]
+        counts = np.array([t.node_count for t in trees])
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        n_nodes = int(counts.sum())
+
+        index_dtype = np.int16 if self.n_features_in_ <= np.iinfo(np.int16).max else np.int32
+        self.feature = np.zeros(n_nodes, dtype=index_dtype)
+        self.threshold = np.full(n_nodes, np.inf, dtype=np.float32)
+        self.children = np.empty((n_nodes, 2), dtype=np.int32)
+        self.value = np.empty((self.n_classes, n_nodes), dtype=np.float64)
+        self.roots = offsets.astype(np.int32)
+        self.max_depth = max(t.max_depth for t in trees)
+
+        for tree, offset, count in zip(trees, offsets, counts):
+            nodes = slice(offset, offset + count)
+            own = np.arange(offset, offset + count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            self.feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            self.threshold[nodes] = np.where(is_leaf, np.inf, _round_down_float32(tree.threshold))
+            self.children[nodes, 0] = np.where(is_leaf, own, tree.children_left + offset)
+            self.children[nodes, 1] = np.where(is_leaf, own, tree.children_right + offset)
+
+            # Versiones viejas de sklearn guardan conteos en lugar de fracciones
+            value = tree.value[:, 0, : self.n_classes]
+            sums = value.sum(axis=1, keepdims=True)
+            if not np.allclose(sums, 1.0):
+                sums[sums == 0.0] = 1.0
+                value = value / sums
+            self.value[:, nodes] = value.T
+
+        # Copias con índices nativos para el recorrido (evitan conversiones en cada nivel)
+        self._feature = self.feature.astype(np.intp)
+        self._children = self.children.reshape(-1).astype(np.intp)
+
+    def save(self, path: Path):
+        """Guarda los arrays sin comprimir, para poder abrirlos con `mmap_mode`."""
+        state = {name: getattr(self, name) for name in _SAVED_ARRAYS}
+        state.update(
+            classes_=self.classes_,
+            n_features_in_=self.n_features_in_,
+            n_trees=self.n_trees,
+            max_depth=self.max_depth,
+        )
+        joblib.dump(state, path)
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: str = "r", block_rows: int = DEFAULT_BLOCK_ROWS) -> "FlatForest":
+        """
+        Abre un bosque guardado con `save`. Con `mmap_mode="r"` los arrays se leen
+        del page cache y todos los procesos que abren el mismo archivo comparten
+        una sola copia en memoria.
+        """
+        state = joblib.load(path, mmap_mode=mmap_mode)
+        forest = cls.__new__(cls)
+        forest.__dict__.update(state)
+        forest.classes_ = np.array(state["classes_"])
+        forest.n_classes = len(forest.classes_)
+        forest.block_rows = block_rows
+        return forest
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.children, self.value, self.roots))
+
+    def leaves(self, X: np.ndarray, trees: slice = slice(None)) -> np.ndarray:
+        """
+        Índice global de la hoja alcanzada por cada fila en cada árbol.
+
+        Args:
+            X (np.ndarray): matriz float32 de forma (n, n_features)
+            trees (slice): subconjunto de árboles a recorrer
+
+        Returns:
+            np.ndarray: índices int32 de forma (n_árboles, n)
+        """
+        n, n_features = X.shape
+        roots = self.roots[trees].astype(np.intp)
+        node = np.repeat(roots[:, None], n, axis=1)
+        flat_x = X.reshape(-1)
+        row_base = (np.arange(n, dtype=np.intp) * n_features)[None, :]
+
+        # Buffers reutilizados en cada nivel para no asignar memoria en el bucle
+        index = np.empty_like(node)
+        x = np.empty(node.shape, dtype=np.float32)
+        threshold = np.empty(node.shape, dtype=np.float32)
+        go_right = np.empty(node.shape, dtype=bool)
+
+        for _ in range(self.max_depth):
+            np.take(self._feature, node, out=index, mode="clip")
+            index += row_base
+            np.take(flat_x, index, out=x, mode="clip")
+            np.take(self.threshold, node, out=threshold, mode="clip")
+            np.greater(x, threshold, out=go_right)
+            node *= 2
+            node += go_right
+            np.take(self._children, node, out=node, mode="clip")
+        return node
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilidades por clase, idénticas a `RandomForestClassifier.predict_proba`."""
+        X = self._validate(X)
+        proba = np.empty((X.shape[0], self.n_classes), dtype=np.float64)
+        for start in range(0, X.shape[0], self.block_rows):
+            block = slice(start, start + self.block_rows)
+            proba[block] = self._accumulate(self.leaves(X[block]))
+        return proba
+
+    def contributions(self, X: np.ndarray, k: int = -1) -> Tuple[float, np.ndarray]:
+        """
+        Descomposición de la probabilidad de la clase `k` por feature, siguiendo
+        el camino de cada fila en cada árbol: cada split suma a la feature que lo
+        decide el cambio en la distribución de clases entre el nodo y el hijo
+        elegido. Todo el lote se recorre a la vez, igual que en `leaves`.
+
+        `base + contribuciones.sum(axis=1)` es `predict_proba(X)[:, k]` salvo
+        error de redondeo.
+
+        Returns:
+            Tuple: probabilidad media en las raíces y matriz (n, n_features)
+        """
+        X = self._validate(X)
+        n, n_features = X.shape
+        delta, parent_feature = self._path_arrays(k)
+        out = np.zeros((n, n_features), dtype=np.float64)
+
+        for start in range(0, n, self.block_rows):
+            block = X[start : start + self.block_rows]
+            rows = block.shape[0]
+            node = np.repeat(self.roots.astype(np.intp)[:, None], rows, axis=1)
+            flat_x = block.reshape(-1)
+            row_base = (np.arange(rows, dtype=np.intp) * n_features)[None, :]
+            total = np.zeros(rows * n_features, dtype=np.float64)
+
+            for _ in range(self.max_depth):
+                index = self._feature.take(node) + row_base
+                go_right = flat_x.take(index) > self.threshold.take(node)
+                child = self._children.take(node * 2 + go_right)
+                # En las hojas el hijo es el mismo nodo y el delta no se vuelve a sumar
+                weight = np.where(child != node, delta.take(child), 0.0)
+                total += np.bincount(
+                    (parent_feature.take(child) + row_base).ravel(), weight.ravel(), minlength=total.size
+                )
+                node = child
+            out[start : start + rows] = total.reshape(rows, n_features)
+
+        out /= self.n_trees
+        return float(self.value[k].take(self.roots).mean()), out
+
+    def _path_arrays(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # Por nodo: cambio de probabilidad respecto del padre y feature del split del padre.
+        # Se calculan la primera vez (no se guardan en disco con el bosque)
+        cache = self.__dict__.setdefault("_paths", {})
+        k = k % self.n_classes
+        if k not in cache:
+            n_nodes = self.threshold.shape[0]
+            children = self._children.reshape(-1, 2)
+            internal = np.flatnonzero(children[:, 0] != np.arange(n_nodes))
+            parent = np.arange(n_nodes)
+            parent[children[internal, 0]] = internal
+            parent[children[internal, 1]] = internal
+            value = np.asarray(self.value[k])
+            cache[k] = (value - value[parent], self._feature[parent])
+        return cache[k]
+
+    def predict_proba_early_exit(
+        self, X: np.ndarray, cuts: Sequence[float] = (), chunk_trees: int = DEFAULT_CHUNK_TREES
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Probabilidades evaluando el bosque por tramos de `chunk_trees` árboles.
+
+        Cada árbol suma a lo sumo 1 a la distribución acumulada de una clase, así
+        que después de `t` árboles una fila está decidida cuando la clase que va
+        primera le saca a la segunda más que los `n_trees - t` árboles que faltan
+        y, si se pasan `cuts`, ningún corte de la probabilidad máxima cae dentro
+        del rango que todavía puede alcanzar. Las filas decididas salen del lote
+        y el resto se compacta antes del tramo siguiente. Como la ventaja nunca
+        supera a los árboles ya evaluados, ninguna fila sale antes de la mitad
+        del bosque: la primera mitad se evalúa de una vez.
+
+        Para una fila que sale después de `t` árboles la probabilidad es el
+        promedio de esos `t` árboles: está dentro del rango posible, así que da
+        la misma clase y el mismo intervalo de `cuts` que el bosque completo,
+        aunque no el mismo valor. Las filas que recorren todos los árboles dan
+        exactamente `predict_proba`.
+
+        Args:
+            X (np.ndarray): matriz de forma (n, n_features)
+            cuts: cortes de la probabilidad máxima que no se pueden cruzar (p. ej.
+                los de los niveles de confianza); vacío para decidir solo la clase
+            chunk_trees (int): árboles evaluados entre dos comprobaciones
+
+        Returns:
+            Tuple: probabilidades (n, n_clases) y árboles evaluados por fila
+        """
+        X = self._validate(X)
+        n = X.shape[0]
+        proba = np.empty((n, self.n_classes), dtype=np.float64)
+        trees = np.full(n, self.n_trees, dtype=np.int32)
+        cuts = np.sort(np.asarray(cuts, dtype=np.float64))
+        chunk_trees = max(1, int(chunk_trees))
+
+        # Primera mitad del bosque para todas las filas, por bloques como en predict_proba
+        done = self.n_trees // 2 + 1
+        total = np.zeros((self.n_classes, n), dtype=np.float64)
+        for start in range(0, n, self.block_rows):
+            block = slice(start, start + self.block_rows)
+            self._add_leaves(total[:, block], self.leaves(X[block], slice(0, done)))
+
+        # Después, tramos cortos sobre las filas pendientes. Cada recorrido cubre
+        # tantas filas como quepan en la memoria de un bloque de todo el bosque,
+        # para que el costo fijo por tramo no se multiplique por bloque
+        span = max(1, self.block_rows * self.n_trees // chunk_trees)
+        rows = np.arange(n)
+        while done < self.n_trees:
+            decided = self._decided(total, self.n_trees - done, cuts)
+            if decided.any():
+                proba[rows[decided]] = (total[:, decided] / done).T
+                trees[rows[decided]] = done
+                pending = ~decided
+                rows, X, total = rows[pending], X[pending], total[:, pending]
+                if rows.size == 0:
+                    return proba, trees
+
+            stop = min(done + chunk_trees, self.n_trees)
+            for start in range(0, rows.size, span):
+                block = slice(start, start + span)
+                self._add_leaves(total[:, block], self.leaves(X[block], slice(done, stop)))
+            done = stop
+
+        proba[rows] = (total / self.n_trees).T
+        return proba, trees
+
+    def _add_leaves(self, total: np.ndarray, leaves: np.ndarray):
+        # Suma árbol por árbol, en el mismo orden que `_accumulate`: mismos bits al completar el bosque
+        for k in range(self.n_classes):
+            total[k] = np.concatenate([total[k][None], self.value[k].take(leaves)]).cumsum(axis=0)[-1]
+
+    def _decided(self, total: np.ndarray, remaining: int, cuts: np.ndarray) -> np.ndarray:
+        # Filas cuya clase (y tramo de `cuts`) ya no pueden cambiar con `remaining` árboles más
+        if self.n_classes < 2:
+            return np.ones(total.shape[1], dtype=bool)
+        second, lead = np.partition(total, self.n_classes - 2, axis=0)[-2:]
+        decided = lead - second > remaining + _EXIT_MARGIN
+        if cuts.size:
+            low = lead / self.n_trees - _EXIT_MARGIN
+            high = (lead + remaining) / self.n_trees + _EXIT_MARGIN
+            decided &= np.searchsorted(cuts, low, side="right") == np.searchsorted(cuts, high, side="right")
+        return decided
+
+    def predict_with_proba(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Clase predicha y probabilidades a partir de un único recorrido del bosque."""
+        proba = self.predict_proba(X)
+        return self.classes_.take(proba.argmax(axis=1)), proba
+
+    def _accumulate(self, leaves: np.ndarray) -> np.ndarray:
+        # cumsum suma estrictamente en orden de árbol, igual que sklearn: mismos bits
+        # (sum puede usar suma por pares y cambiar el último bit)
+        total = np.empty((leaves.shape[1], self.n_classes), dtype=np.float64)
+        for k in range(self.n_classes):
+            total[:, k] = self.value[k].take(leaves).cumsum(axis=0)[-1]
+        total /= self.n_trees
+        return total
+
+    def _validate(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Se esperaban {self.n_features_in_} columnas, se recibieron {X.shape[-1]}")
+        return X
+
+    def verify(self, estimator: Any, X: np.ndarray) -> bool:
+        """Comprueba que las probabilidades coinciden bit a bit con sklearn."""
+        return np.array_equal(self.predict_proba(X), unwrap_forest(estimator).predict_proba(X))
+
+
+def _round_down_float32(threshold: np.ndarray) -> np.ndarray:
+    # Mayor float32 <= umbral: conserva el resultado de `x <= umbral` para x float32
+    rounded = threshold.astype(np.float32)
+    too_big = rounded.astype(np.float64) > threshold
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
@@ -1,10 +1,136 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import ValidationError
+from typing import Optional
+import asyncio
+import json
+import logging
+import numpy as np
 import os
+import time
 import uvicorn
-from app.schemas import PassengerInput, PredictionOutput
-from app.model import predict_survival
+from app.schemas import (
+    BatchPredictionInput,
+    BatchPredictionOutput,
+    PassengerInput,
+    PredictionOutput,
+    RawBatchPredictionInput,
+    RawPassengerInput,
+    SweepAxis,
+    SweepInput,
+    SweepOutput,
+    use_categories,
+)
+import app.model as model_module
+from app.model import ModelNotReady, explain_survival_records, predict_survival_records, predict_survival_row, sweep_survival
+from app.admission import AdmissionController, Overloaded
+from app.batching import PredictionBatcher
+from app.cache import PredictionCache
+from app.streaming import DuplexStreamingResponse, iter_chunks, iter_csv_records, iter_lines, iter_ndjson_records
+from app.executor import InferenceExecutor
+from app.metrics import MetricsMiddleware, metrics
+from app.prediction_log import PredictionLog
+from app.serialization import ARROW, MSGPACK, StaticPayload, batch_response, negotiate, sweep_response
+from app import config
+
+logger = logging.getLogger(__name__)
+
+# PassengerInput valida contra las categorías del modelo vigente sin cargarlo
+use_categories(lambda: model_module.manager.categories)
+
+
+def build_cache():
+    if config.PREDICTION_CACHE_SIZE <= 0:
+        return None
+    # La clave sale del esquema (todo lo que determina la predicción), sin esperar a cargar el modelo
+    return PredictionCache(
+        fields=[field for field in PassengerInput.model_fields if field != "name"],
+        max_size=config.PREDICTION_CACHE_SIZE,
+        ttl_seconds=config.PREDICTION_CACHE_TTL,
+        float_decimals=config.PREDICTION_CACHE_FLOAT_DECIMALS,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cargar el modelo en segundo plano: la API acepta conexiones enseguida y
+    # /ready responde 503 hasta que el modelo está listo
+    loop = asyncio.get_running_loop()
+    app.state.model_loading = loop.run_in_executor(None, model_module.manager.load)
+    app.state.model_loading.add_done_callback(log_model_load)
+
+    # Sacar la inferencia del event loop
+    app.state.executor = InferenceExecutor(
+        backend=config.INFERENCE_BACKEND,
+        workers=config.INFERENCE_WORKERS,
+        mp_context=config.INFERENCE_MP_CONTEXT,
+    )
+    await app.state.executor.start()
+
+    # Límite de predicciones concurrentes con cola de espera acotada
+    if config.ADMISSION_MAX_IN_FLIGHT > 0:
+        app.state.admission = AdmissionController(
+            max_in_flight=config.ADMISSION_MAX_IN_FLIGHT,
+            max_queue=config.ADMISSION_MAX_QUEUE,
+            queue_timeout=config.ADMISSION_QUEUE_TIMEOUT_MS / 1000.0,
+        )
+    else:
+        app.state.admission = None
+
+    # Caché de predicciones por combinación de características
+    app.state.cache = build_cache()
+
+    # Registro de predicciones con escritura diferida
+    if config.PREDICTION_LOG_URL:
+        app.state.prediction_log = PredictionLog(
+            config.PREDICTION_LOG_URL,
+            max_buffer=config.PREDICTION_LOG_BUFFER,
+            flush_rows=config.PREDICTION_LOG_FLUSH_ROWS,
+            flush_seconds=config.PREDICTION_LOG_FLUSH_SECONDS,
+            table=config.PREDICTION_LOG_TABLE,
+        )
+        await app.state.prediction_log.start()
+    else:
+        app.state.prediction_log = None
+
+    # Micro-batching opcional de /predict
+    if config.PREDICT_BATCHING:
+        app.state.batcher = PredictionBatcher(
+            app.state.executor,
+            max_batch_size=config.PREDICT_BATCH_MAX_SIZE,
+            max_wait_ms=config.PREDICT_BATCH_MAX_WAIT_MS,
+        )
+        await app.state.batcher.start()
+    else:
+        app.state.batcher = None
+
+    # Recarga automática cuando cambia el archivo del modelo
+    watcher = None
+    if config.MODEL_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(
+            model_module.manager.watch(config.MODEL_WATCH_INTERVAL, on_reload=app.state.executor.restart)
+        )
+
+    yield
+
+    if watcher is not None:
+        watcher.cancel()
+    if app.state.batcher is not None:
+        await app.state.batcher.stop()
+    if app.state.prediction_log is not None:
+        await app.state.prediction_log.stop()
+    await app.state.executor.shutdown()
+
+
+def log_model_load(future: asyncio.Future):
+    # El error ya queda en manager.last_error; acá solo se evita el "exception never retrieved"
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("El modelo no está disponible: %s", future.exception())
+
 
 app = FastAPI(
     title="Titanic Survival Prediction API",
@@ -13,19 +139,30 @@ app = FastAPI(
 
     ### Cómo usar la API:
     - Enviá una solicitud POST a `/predict` con los datos del pasajero en formato JSON.
+    - Para puntuar muchos pasajeros a la vez, enviá un POST a `/predict/batch` con `{"passengers": [...]}`.
+    - Si tenés los campos crudos del dataset (Name, Age, Fare, SibSp, Parch, Ticket, Cabin, ...), usá `/predict/raw` o `/predict/raw/batch`: las características se derivan en el servidor.
+    - Agregá `?explain=true` a `/predict` o `/predict/batch` (y a sus versiones `raw`) para recibir la contribución de cada campo a la probabilidad de sobrevivir de ese pasajero.
+    - Para gráficos de sensibilidad, enviá un POST a `/predict/sweep` con un pasajero base y uno o dos campos a variar.
+    - Para exportaciones grandes, enviá un POST a `/predict/stream` con NDJSON o CSV; los resultados vuelven como NDJSON a medida que se procesan.
     - Los datos deben seguir el esquema `PassengerInput`. Algunas características son categóricas y deben coincidir con las categorías usadas en el entrenamiento.
     - El nombre del pasajero (`name`) es opcional y se usa solo para personalizar la respuesta.
 
     ### Notas sobre las características:
-    - **Age**: Edad original en años (se categoriza internamente en rangos numéricos: 0 a 8).
-    - **Fare**: Tarifa original en valor numérico (se categoriza internamente en rangos numéricos: 0 a 6).
-    - **Title**: Títulos mapeados como 'Mr', 'Mrs', 'Miss', 'Master', 'military', 'nobility', 'unmarried_women', 'married_women', 'religious'.
-    - **TicketLocation**: Prefijos normalizados (ver categorías en `EXPECTED_CATEGORIES`).
+    - **Age**: En `/predict`, el código de edad de 0 a 8 con el que se entrenó el modelo (ver `PassengerInput`), no los años. `/predict/raw` recibe los años y calcula el código.
+    - **Fare**: En `/predict`, el código de tarifa de 0 a 6 con el que se entrenó el modelo, no las libras. `/predict/raw` recibe las libras y calcula el código.
+    - **Title**: Títulos mapeados como 'Mr', 'Master', 'Dr', 'military', 'nobility', 'unmarried_women', 'married_women', 'religious'.
+    - **TicketLocation**: Prefijos normalizados (ver `/categories`).
     - **Family_Size_Grouped**: Basado en el tamaño de la familia (1 = Alone, 2-4 = Small, 5-6 = Medium, 7+ = Large).
     - **Feature Importances**: Las características más importantes son `Title_Mr` (0.15), `Sex_male` (0.14), `Sex_female` (0.13), `Pclass` (0.08), y `Fare` (0.07).
     """,
-    version="2.0"
+    version="2.0",
+    lifespan=lifespan,
 )
+app.state.executor = InferenceExecutor()
+app.state.batcher = None
+app.state.cache = None
+app.state.prediction_log = None
+app.state.admission = None
 
 app.add_middleware(
     CORSMiddleware,
@@ -34,129 +171,685 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, registry=metrics, paths=lambda: [route.path for route in app.routes])
+metrics.register_gauge(
+    "admission_in_flight",
+    "Solicitudes ocupando un lugar del control de admisión",
+    lambda: app.state.admission.in_flight if app.state.admission is not None else 0,
+)
+metrics.register_gauge(
+    "admission_queue_depth",
+    "Solicitudes esperando en la cola del control de admisión",
+    lambda: app.state.admission.queue_depth if app.state.admission is not None else 0,
+)
 
-# Definir categorías válidas
-EXPECTED_CATEGORIES = {
-    "Sex": ["male", "female"],
-    "Embarked": ["C", "Q", "S"],
-    "Title": ["Dr", "Master", "Mr", "married_women", "military", "nobility", "religious", "unmarried_women"],    
-    "TicketLocation": [
-        "A/4", "A/5", "CA", "PC", "SOTON/OQ", "SC/Paris", "W/C", "Blank", "C", "F.C.", "F.C.C.", 
-        "Fa", "P/PP", "PP", "S.C./A.4.", "S.O./P.P.", "S.O.C.", "S.O.P.", "S.P.", "SC", 
-        "SC/AH", "SO/C", "STON/O", "STON/O2.", "SW/PP", "W.E.P.", "WE/P", "A4.", "A/S", "C.A./SOTON"
-    ],
-    "Family_Size_Grouped": ["Alone", "Small", "Medium", "Large"],
-    "Age_Cut": ["0", "1", "2", "3", "4", "5", "6", "7", "8"],
-    "Fare_cut": ["0", "1", "2", "3", "4", "5", "6"],
-    "Name_LengthGB": [
-        "(11.999, 18.0]", "(18.0, 20.0]", "(20.0, 23.0]", "(23.0, 25.0]", 
-        "(25.0, 27.25]", "(27.25, 30.0]", "(30.0, 38.0]", "(38.0, 82.0]"
-    ],
-    "details": {
-        "Age_Cut": {
-            "0": "<=16 years",
-            "1": ">16 to 20.125 years",
-            "2": ">20.125 to 24 years",
-            "3": ">24 to 28 years",
-            "4": ">28 to 32.312 years",
-            "5": ">32.312 to 38 years",
-            "6": ">38 to 47 years",
-            "7": ">47 to 80 years",
-            "8": ">80 years"
-        },
-        "Fare_cut": {
-            "0": "<=7.775 pounds",
-            "1": ">7.775 to 8.662 pounds",
-            "2": ">8.662 to 14.454 pounds",
-            "3": ">14.454 to 26 pounds",
-            "4": ">26 to 52.369 pounds",
-            "5": ">52.369 to 512.329 pounds",
-            "6": ">512.329 pounds"
-        },
-        "Family_Size_Grouped": {
-            "Alone": "1 person",
-            "Small": "2 to 4 people",
-            "Medium": "5 to 6 people",
-            "Large": "7 or more people"
-        },
-        "Name_LengthGB": {
-            "(11.999, 18.0]": "Name length between 12 and 18 characters",
-            "(18.0, 20.0]": "Name length between 18 and 20 characters",
-            "(20.0, 23.0]": "Name length between 20 and 23 characters",
-            "(23.0, 25.0]": "Name length between 23 and 25 characters",
-            "(25.0, 27.25]": "Name length between 25 and 27.25 characters",
-            "(27.25, 30.0]": "Name length between 27.25 and 30 characters",
-            "(30.0, 38.0]": "Name length between 30 and 38 characters",
-            "(38.0, 82.0]": "Name length between 38 and 82 characters"
-        }
-    }
+
+@app.exception_handler(RequestValidationError)
+async def count_validation_errors(request: Request, exc: RequestValidationError):
+    # Contar los 422 de pydantic por tipo de excepción, igual que el resto de los errores
+    metrics.record_error(request.url.path, exc)
+    return await request_validation_exception_handler(request, exc)
+
+
+@app.exception_handler(ModelNotReady)
+async def model_not_ready(request: Request, exc: ModelNotReady):
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+
+def require_model():
+    """
+    Dependencia de los endpoints que usan el modelo: 503 mientras no hay un
+    modelo cargado (se está cargando en segundo plano o la carga falló), sin
+    cargarlo en la solicitud. Una carga fallida se reintenta con
+    `POST /admin/reload` o con la recarga automática.
+    """
+    if not model_module.manager.ready:
+        raise model_module.manager.not_ready()
+
+
+def require_explanations(explain: bool = False):
+    """
+    Dependencia de los endpoints con `?explain=true`: 501 si el modelo vigente
+    no puede explicar sus predicciones (motor sklearn, o codificador o bosque
+    plano que no pasaron la verificación), antes de admitir la solicitud.
+    """
+    if explain:
+        motivo = model_module.explanation_unavailable()
+        if motivo is not None:
+            raise HTTPException(status_code=501, detail=motivo)
+
+
+async def admit(request: Request):
+    """
+    Dependencia de los endpoints de predicción: ocupa un lugar del control de
+    admisión mientras dura la solicitud. Responde 503 con `Retry-After` si la
+    cola está llena o vence el plazo de espera (`X-Request-Timeout-Ms` lo
+    acorta), y 499 si el cliente se fue mientras esperaba.
+    """
+    admission = app.state.admission
+    if admission is None:
+        yield
+        return
+
+    timeout = None
+    header = request.headers.get("x-request-timeout-ms")
+    if header:
+        try:
+            timeout = float(header) / 1000.0
+        except ValueError:
+            raise HTTPException(status_code=422, detail="X-Request-Timeout-Ms debe ser un número de milisegundos")
+
+    async def disconnected():
+        # El cuerpo ya fue leído: el próximo mensaje solo llega si el cliente se desconecta
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    try:
+        waited = await admission.acquire(timeout, disconnected)
+    except Overloaded as e:
+        metrics.observe_admission(e.reason)
+        if e.reason == "disconnected":
+            raise HTTPException(status_code=499, detail="El cliente cerró la conexión")
+        raise HTTPException(
+            status_code=503,
+            detail="Servicio saturado, reintentá más tarde",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    metrics.observe_admission("queued" if waited else "admitted", waited)
+    request.state.admission_seconds = waited
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        admission.release(time.perf_counter() - start)
+
+
+# Respuesta del control de admisión, para la documentación de OpenAPI
+OVERLOADED_RESPONSES = {
+    503: {"description": "Modelo todavía no disponible, o servicio saturado: cola llena o plazo vencido (ver `Retry-After`)"}
 }
 
-@app.post("/predict", response_model=PredictionOutput)
-async def predict(passenger: PassengerInput):
+# Formatos alternativos de las respuestas masivas, para la documentación de OpenAPI
+COLUMNAR_RESPONSES = {200: {"content": {MSGPACK: {}, ARROW: {}}}, **OVERLOADED_RESPONSES}
+
+# Endpoints con `?explain=true`
+EXPLAIN_RESPONSES = {501: {"description": "`explain=true` con un modelo que no puede explicar sus predicciones"}}
+
+
+@app.post("/predict", response_model=PredictionOutput, responses={**OVERLOADED_RESPONSES, **EXPLAIN_RESPONSES}, dependencies=[Depends(require_model), Depends(require_explanations), Depends(admit)])
+async def predict(passenger: PassengerInput, request: Request, explain: bool = False):
     """
     Predice si un pasajero habría sobrevivido al desastre del Titanic.
 
     - **Entrada**: Datos del pasajero en formato JSON, siguiendo el esquema `PassengerInput`.
     - **Salida**: Predicción de supervivencia, probabilidades y nivel de confianza.
+    - **explain=true**: agrega `explanation`, la contribución de cada campo a la
+      probabilidad de sobrevivir según los caminos de decisión de los árboles
+      (no usa la caché ni el micro-batching).
 
     Ejemplo de uso:
     ```json
     {
         "name": "Kelly, Mr. James",
         "Pclass": 3,
-        "Age": 34.5,
-        "Fare": 7.8292,
+        "Age": 5.0,
+        "Fare": 1.0,
         "Cabin_Assigned": 0,
-        "Name_Size": 2.0,
+        "Name_Size": 0.0,
         "TicketNumberCounts": 1,
         "Sex": "male",
         "Embarked": "Q",
         "Title": "Mr",
-        "TicketLocation": "3",
+        "TicketLocation": "Blank",
         "Family_Size_Grouped": "Alone",
-        "Age_Cut": "Adult",
-        "Fare_cut": "Low",
-        "Name_LengthGB": "Medium"
+        "Age_Cut": "(29.0, 35.0]",
+        "Fare_cut": "(7.775, 8.662]",
+        "Name_LengthGB": "(11.999, 18.0]"
     }
     """
+    start = time.perf_counter()
     try:
-        # Convertir entrada a DataFrame
-        input_dict = passenger.model_dump()
-        input_df = pd.DataFrame([input_dict])
-
         # Obtener nombre o usar uno por defecto si no viene
-        nombre_pasajero = input_dict.get("name", "Pasajero desconocido")
+        nombre_pasajero = passenger.name or "Pasajero desconocido"
 
         # Predecir
-        pred, prob_die, prob_survive, nivel_confianza = predict_survival(input_df)
-
-        # Generar mensaje interpretativo
-        if pred == 1:
-            mensaje = f"🟢 {nombre_pasajero} HABRÍA SOBREVIVIDO"
+        explicacion = None
+        if explain:
+            (pred, prob_die, prob_survive, nivel_confianza, exacta), explicacion = await explain_one(passenger)
         else:
-            mensaje = f"🔴 {nombre_pasajero} NO habría sobrevivido"
+            pred, prob_die, prob_survive, nivel_confianza, exacta = await predict_one(passenger)
 
         # Respuesta
-        return PredictionOutput(
-            name=nombre_pasajero,
-            survived=bool(pred),
-            probability_survive=round(prob_survive * 100, 2),
-            probability_die=round(prob_die * 100, 2),
-            message=mensaje,
-            confidence_level=nivel_confianza,
-        )
+        built = time.perf_counter()
+        respuesta = build_prediction_output(nombre_pasajero, pred, prob_die, prob_survive, nivel_confianza, explicacion, exacta)
+        log_prediction("/predict", passenger, prob_die, prob_survive, nivel_confianza, start)
+        metrics.observe_stage("response", time.perf_counter() - built)
+        return respuesta
     except Exception as e:
+        metrics.record_error("/predict", e)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        request.state.handler_seconds = time.perf_counter() - start
+
+
+@app.post("/predict/batch", response_model=BatchPredictionOutput, responses={**COLUMNAR_RESPONSES, **EXPLAIN_RESPONSES}, dependencies=[Depends(require_model), Depends(require_explanations), Depends(admit)])
+async def predict_batch(batch: BatchPredictionInput, request: Request, explain: bool = False):
+    """
+    Predice la supervivencia de una lista de pasajeros en una sola pasada del modelo.
+
+    - **Entrada**: `{"passengers": [...]}`, cada elemento con el esquema `PassengerInput`.
+    - **Salida**: un resultado por pasajero, en el mismo orden. Las filas inválidas
+      se informan en `error` sin afectar la predicción del resto.
+    - **explain=true**: cada predicción incluye `explanation` (ver `/predict`),
+      calculada para todo el lote en un solo recorrido del bosque.
+    - **Formato**: JSON por defecto. Con `Accept: application/x-msgpack` o
+      `Accept: application/vnd.apache.arrow.stream` los resultados se devuelven
+      por columnas (índice, clase, probabilidades, confianza y error), si el
+      servidor tiene instaladas `msgpack` o `pyarrow`.
+    """
+    start = time.perf_counter()
+    resultados: list = [None] * len(batch.passengers)
+    validos = []
+    posiciones = []
+
+    # Validar cada fila por separado para no descartar el lote completo
+    for i, raw in enumerate(batch.passengers):
+        try:
+            validos.append(PassengerInput.model_validate(raw))
+            posiciones.append(i)
+        except ValidationError as e:
+            resultados[i] = {"index": i, "prediction": None, "error": format_validation_error(e)}
+
+    try:
+        await score_batch_items(validos, [p.name for p in validos], posiciones, resultados, explain, "/predict/batch", start)
+    except Exception as e:
+        metrics.record_error("/predict/batch", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        request.state.handler_seconds = time.perf_counter() - start
+    return batch_response(len(resultados), resultados, negotiate(request.headers.get("accept")))
+
+
+@app.post("/predict/raw", response_model=PredictionOutput, responses={**OVERLOADED_RESPONSES, **EXPLAIN_RESPONSES}, dependencies=[Depends(require_model), Depends(require_explanations), Depends(admit)])
+async def predict_raw(passenger: RawPassengerInput, request: Request, explain: bool = False):
+    """
+    Igual que `/predict`, pero con los campos crudos del dataset (Name, Age,
+    Fare, SibSp, Parch, Ticket, Cabin, ...). `Title`, `Age_Cut`, `Fare_cut`,
+    `Name_LengthGB`, `Family_Size_Grouped`, `TicketLocation` y el resto de las
+    características se derivan en el servidor con los cortes del modelo cargado.
+    Acepta `explain=true` igual que `/predict`.
+    """
+    start = time.perf_counter()
+    try:
+        record = derive_features([passenger])[0]
+        # Sex y Embarked no se derivan: un valor que el modelo no conoce es un error del cliente
+        errores = model_module.manager.current.categories.errors(record)
+        if errores:
+            raise HTTPException(status_code=422, detail="; ".join(errores))
+        explicacion = None
+        if explain:
+            (pred, prob_die, prob_survive, nivel_confianza, exacta), explicacion = await explain_one(record)
+        else:
+            pred, prob_die, prob_survive, nivel_confianza, exacta = await predict_one(record)
+
+        built = time.perf_counter()
+        respuesta = build_prediction_output(passenger.Name, pred, prob_die, prob_survive, nivel_confianza, explicacion, exacta)
+        log_prediction("/predict/raw", record, prob_die, prob_survive, nivel_confianza, start)
+        metrics.observe_stage("response", time.perf_counter() - built)
+        return respuesta
+    except HTTPException:
+        raise
+    except Exception as e:
+        metrics.record_error("/predict/raw", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        request.state.handler_seconds = time.perf_counter() - start
+
+
+@app.post("/predict/raw/batch", response_model=BatchPredictionOutput, responses={**COLUMNAR_RESPONSES, **EXPLAIN_RESPONSES}, dependencies=[Depends(require_model), Depends(require_explanations), Depends(admit)])
+async def predict_raw_batch(batch: RawBatchPredictionInput, request: Request, explain: bool = False):
+    """
+    Igual que `/predict/batch`, con pasajeros `RawPassengerInput`. Las
+    características se derivan para todo el lote de una vez; si una fila no
+    trae `TicketNumberCounts`, se cuentan las filas del lote con el mismo número
+    de ticket. Acepta `explain=true` igual que `/predict/batch`.
+    """
+    start = time.perf_counter()
+    resultados: list = [None] * len(batch.passengers)
+    validos = []
+    posiciones = []
+
+    for i, raw in enumerate(batch.passengers):
+        try:
+            validos.append(RawPassengerInput.model_validate(raw))
+            posiciones.append(i)
+        except ValidationError as e:
+            resultados[i] = {"index": i, "prediction": None, "error": format_validation_error(e)}
+
+    try:
+        records = derive_features(validos)
+        await score_batch_items(records, [p.Name for p in validos], posiciones, resultados, explain, "/predict/raw/batch", start)
+    except Exception as e:
+        metrics.record_error("/predict/raw/batch", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        request.state.handler_seconds = time.perf_counter() - start
+    return batch_response(len(resultados), resultados, negotiate(request.headers.get("accept")))
+
+
+@app.post("/predict/sweep", response_model=SweepOutput, responses=COLUMNAR_RESPONSES, dependencies=[Depends(require_model), Depends(admit)])
+async def predict_sweep(sweep: SweepInput, request: Request):
+    """
+    Barrida "qué pasaría si": varía uno o dos campos de un pasajero base y
+    devuelve la probabilidad de sobrevivir en cada punto de la grilla.
+
+    - **Entrada**: `passenger` (esquema `PassengerInput`) y `axes`, uno o dos
+      `{"field": ..., "values": [...]}`. Sin `values` se usan todas las
+      categorías que conoce el modelo (o todos los enteros válidos, como
+      `Pclass` 1 a 3).
+    - **Salida**: los valores de cada eje y la matriz de probabilidades (%), con
+      una fila por valor del primer eje.
+
+    Toda la grilla (hasta `SWEEP_MAX_POINTS` puntos) se puntúa en una sola
+    llamada al modelo. Hasta `FLAT_ENGINE_MAX_ROWS` puntos (256 por defecto)
+    se evalúa con el bosque plano y cuesta casi lo mismo que un `/predict`; por
+    encima pasa a sklearn y el costo crece con la cantidad de puntos (unas 10
+    veces un `/predict` con 2000). Acepta los mismos formatos que
+    `/predict/batch`; en Arrow la grilla viene en formato largo, una fila por
+    punto.
+    """
+    start = time.perf_counter()
+    try:
+        base = sweep.passenger.model_dump()
+        fields = [axis.field for axis in sweep.axes]
+        if len(set(fields)) != len(fields):
+            raise HTTPException(status_code=422, detail="Los ejes deben ser campos distintos")
+        ejes = [sweep_axis_values(base, axis) for axis in sweep.axes]
+
+        puntos = int(np.prod([len(valores) for valores in ejes]))
+        if puntos > config.SWEEP_MAX_POINTS:
+            raise HTTPException(
+                status_code=422, detail=f"La grilla tiene {puntos} puntos; el máximo es {config.SWEEP_MAX_POINTS}"
+            )
+
+        inference = time.perf_counter()
+        probabilidades = await app.state.executor.run(sweep_survival, base, fields, ejes)
+        metrics.observe_stage("inference", time.perf_counter() - inference)
+
+        built = time.perf_counter()
+        matriz = np.round(probabilidades * 100, 2)
+        respuesta = sweep_response(fields, ejes, matriz, negotiate(request.headers.get("accept")))
+        metrics.observe_stage("response", time.perf_counter() - built)
+        return respuesta
+    except HTTPException:
+        raise
+    except Exception as e:
+        metrics.record_error("/predict/sweep", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        request.state.handler_seconds = time.perf_counter() - start
+
+
+def sweep_axis_values(base: dict, axis: SweepAxis) -> list:
+    """
+    Valores validados de un eje de la barrida. Cada valor se valida con
+    `PassengerInput` sobre el pasajero base, así que se rechazan (422) los
+    mismos valores que rechazaría `/predict`.
+    """
+    field = axis.field
+    if field not in PassengerInput.model_fields or field == "name":
+        raise HTTPException(status_code=422, detail=f"Campo desconocido para la barrida: {field!r}")
+
+    valores = axis.values
+    if valores is None:
+        categories = model_module.manager.current.categories.categories
+        if field in categories:
+            valores = categories[field]
+        else:
+            valores = integer_field_range(field)
+            if valores is None:
+                raise HTTPException(status_code=422, detail=f"{field} no es categórico: indicá los valores en `values`")
+
+    validados = []
+    for valor in valores:
+        try:
+            validados.append(getattr(PassengerInput.model_validate({**base, field: valor}), field))
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"{field}={valor!r}: {format_validation_error(e)}")
+    return validados
+
+
+def integer_field_range(field: str) -> Optional[list]:
+    """Todos los valores de un campo entero acotado de `PassengerInput` (p. ej. Pclass: 1 a 3)."""
+    info = PassengerInput.model_fields[field]
+    if info.annotation is not int:
+        return None
+    ge = next((m.ge for m in info.metadata if hasattr(m, "ge")), None)
+    le = next((m.le for m in info.metadata if hasattr(m, "le")), None)
+    if ge is None or le is None:
+        return None
+    return list(range(ge, le + 1))
+
+
+def derive_features(passengers: list) -> list:
+    """
+    Deriva las características del modelo vigente para pasajeros `RawPassengerInput`.
+    """
+    if not passengers:
+        return []
+    start = time.perf_counter()
+    records = model_module.manager.current.features.derive(passengers)
+    metrics.observe_stage("derive", time.perf_counter() - start)
+    return records
+
+
+async def score_batch_items(
+    records: list,
+    nombres: list,
+    posiciones: list,
+    resultados: list,
+    explain: bool = False,
+    endpoint: Optional[str] = None,
+    start: Optional[float] = None,
+):
+    """
+    Puntúa los registros válidos de un lote y completa `resultados` en la
+    posición original de cada uno. Las filas con categorías desconocidas se
+    informan sin afectar al resto. Con `endpoint`, cada predicción se agrega al
+    registro de predicciones con la latencia del lote desde `start`.
+    """
+    if not records:
+        return
+    if explain:
+        predicciones, errores, explicaciones = await explain_records(records)
+    else:
+        predicciones, errores = await score_records(records)
+        explicaciones = None
+    for pos, i in enumerate(posiciones):
+        if pos in errores:
+            resultados[i] = {"index": i, "prediction": None, "error": errores[pos]}
+            continue
+        pred, prob_die, prob_survive, nivel_confianza, exacta = predicciones[pos]
+        if endpoint is not None:
+            log_prediction(endpoint, records[pos], prob_die, prob_survive, nivel_confianza, start)
+        nombre_pasajero = nombres[pos] or "Pasajero desconocido"
+        resultados[i] = {
+            "index": i,
+            "prediction": prediction_dict(
+                nombre_pasajero, pred, prob_die, prob_survive, nivel_confianza,
+                explicaciones[pos] if explicaciones is not None else None, exacta,
+            ),
+            "error": None,
+        }
+
+
+def log_prediction(endpoint: str, record, prob_die: float, prob_survive: float, nivel_confianza: str, start: float):
+    """
+    Agrega una predicción al registro SQL, si está habilitado. Solo encola: la
+    escritura ocurre en segundo plano (ver app/prediction_log.py).
+    """
+    prediction_log = app.state.prediction_log
+    if prediction_log is None:
+        return
+    values = record if isinstance(record, dict) else record.__dict__
+    prediction_log.record(
+        endpoint,
+        {field: value for field, value in values.items() if field != "name"},
+        prob_survive,
+        prob_die,
+        nivel_confianza,
+        model_module.manager.version,
+        (time.perf_counter() - start) * 1000.0,
+    )
+
+
+@app.post(
+    "/predict/stream",
+    summary="Puntuación en streaming de NDJSON o CSV",
+    dependencies=[Depends(require_model)],
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string", "format": "binary"}},
+                "text/csv": {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    },
+)
+async def predict_stream(request: Request):
+    """
+    Puntúa exportaciones grandes sin cargarlas completas en memoria.
+
+    - **Entrada**: cuerpo (puede ser chunked) en NDJSON, un pasajero `PassengerInput`
+      por línea, o en CSV con encabezado (`Content-Type: text/csv`).
+    - **Salida**: NDJSON, una línea por pasajero en el orden de entrada:
+      `{"index": 0, "prediction": {...}}` o `{"index": 1, "error": "..."}`.
+
+    Los resultados se envían por bloques de `STREAM_CHUNK_ROWS` filas mientras la
+    carga todavía está llegando; las filas malformadas se informan en línea sin
+    cortar el stream. El cliente debe leer la respuesta mientras sube el cuerpo
+    (por ejemplo `curl -T archivo.ndjson -X POST ...`): un cliente que primero
+    envía todo y después lee se bloquea cuando se llenan los buffers del socket.
+    """
+    content_type = request.headers.get("content-type", "")
+    parse = iter_csv_records if "csv" in content_type else iter_ndjson_records
+    records = parse(iter_lines(request.stream()))
+
+    async def body():
+        async for chunk in iter_chunks(records, config.STREAM_CHUNK_ROWS):
+            lines = [json.dumps(item, ensure_ascii=False) for item in await score_stream_chunk(chunk)]
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    return DuplexStreamingResponse(body(), media_type="application/x-ndjson")
+
+
+async def score_stream_chunk(chunk: list) -> list:
+    """
+    Valida y puntúa un bloque de registros del stream; devuelve un resultado por registro.
+    """
+    resultados = []
+    validos = []
+    posiciones = []
+    for index, record in chunk:
+        if isinstance(record, str):
+            resultados.append({"index": index, "error": record})
+            continue
+        try:
+            passenger = PassengerInput.model_validate(record)
+        except ValidationError as e:
+            resultados.append({"index": index, "error": format_validation_error(e)})
+            continue
+        posiciones.append(len(resultados))
+        validos.append(passenger)
+        resultados.append({"index": index})
+
+    if not validos:
+        return resultados
+
+    try:
+        predicciones, errores = await score_records(validos)
+    except Exception as e:
+        metrics.record_error("/predict/stream", e)
+        for pos in posiciones:
+            resultados[pos]["error"] = str(e)
+        return resultados
+
+    for j, pos in enumerate(posiciones):
+        if j in errores:
+            resultados[pos]["error"] = errores[j]
+            continue
+        pred, prob_die, prob_survive, nivel_confianza, exacta = predicciones[j]
+        nombre_pasajero = validos[j].name or "Pasajero desconocido"
+        resultados[pos]["prediction"] = prediction_dict(
+            nombre_pasajero, pred, prob_die, prob_survive, nivel_confianza, exacta=exacta
+        )
+    return resultados
+
+
+async def predict_one(passenger: PassengerInput):
+    """
+    Predice un pasajero: primero la caché, después el micro-batcher (si está
+    activo) o el backend de inferencia.
+    """
+    cache = app.state.cache
+    if cache is not None:
+        start = time.perf_counter()
+        version = model_module.manager.version
+        key = cache.key(passenger)
+        cached = cache.get(key, version)
+        metrics.observe_stage("cache", time.perf_counter() - start)
+        if cached is not None:
+            return cached
+
+    # Agrupado con otras solicitudes concurrentes si el micro-batching está activo
+    start = time.perf_counter()
+    if app.state.batcher is not None:
+        resultado = await app.state.batcher.predict(passenger)
+    else:
+        resultado = await app.state.executor.run(predict_survival_row, passenger)
+    metrics.observe_stage("inference", time.perf_counter() - start)
+
+    if cache is not None:
+        cache.put(key, resultado, version)
+    return resultado
+
+
+async def explain_one(passenger):
+    """
+    Predice y explica un pasajero. No pasa por la caché ni por el micro-batcher.
+
+    Returns:
+        Tuple: la tupla de `predict_survival` y la explicación
+    """
+    resultados, errores, explicaciones = await explain_records([passenger])
+    if errores:
+        raise ValueError(errores[0])
+    return resultados[0], explicaciones[0]
+
+
+async def explain_records(records: list):
+    """
+    Ejecuta `explain_survival_records` en el backend de inferencia.
+
+    Returns:
+        Tuple: lo mismo que `explain_survival_records`
+    """
+    start = time.perf_counter()
+    resultado = await app.state.executor.run(explain_survival_records, records)
+    metrics.observe_stage("inference", time.perf_counter() - start)
+    return resultado
+
+
+async def score_records(records: list):
+    """
+    Predice una lista de pasajeros; solo los que no están en caché llegan al modelo.
+
+    Returns:
+        Tuple: lo mismo que `predict_survival_records`
+    """
+    cache = app.state.cache
+    if cache is None:
+        start = time.perf_counter()
+        resultado = await app.state.executor.run(predict_survival_records, records)
+        metrics.observe_stage("inference", time.perf_counter() - start)
+        return resultado
+
+    start = time.perf_counter()
+    version = model_module.manager.version
+    keys = [cache.key(r) for r in records]
+    resultados = [cache.get(key, version) for key in keys]
+    pendientes = [pos for pos, resultado in enumerate(resultados) if resultado is None]
+    errores = {}
+    metrics.observe_stage("cache", time.perf_counter() - start)
+
+    if pendientes:
+        start = time.perf_counter()
+        nuevos, errores_nuevos = await app.state.executor.run(
+            predict_survival_records, [records[pos] for pos in pendientes]
+        )
+        metrics.observe_stage("inference", time.perf_counter() - start)
+        for j, pos in enumerate(pendientes):
+            if j in errores_nuevos:
+                errores[pos] = errores_nuevos[j]
+            else:
+                resultados[pos] = nuevos[j]
+                cache.put(keys[pos], nuevos[j], version)
+
+    return resultados, errores
+
+
+def build_prediction_output(
+    nombre_pasajero: str,
+    pred,
+    prob_die: float,
+    prob_survive: float,
+    nivel_confianza: str,
+    explicacion: Optional[dict] = None,
+    exacta: bool = True,
+) -> PredictionOutput:
+    """
+    Arma la respuesta de una predicción individual con su mensaje interpretativo.
+    """
+    return PredictionOutput(
+        **prediction_dict(nombre_pasajero, pred, prob_die, prob_survive, nivel_confianza, explicacion, exacta)
+    )
+
+
+def prediction_dict(
+    nombre_pasajero: str,
+    pred,
+    prob_die: float,
+    prob_survive: float,
+    nivel_confianza: str,
+    explicacion: Optional[dict] = None,
+    exacta: bool = True,
+) -> dict:
+    """
+    Lo mismo que `build_prediction_output` como diccionario simple, con los
+    campos de `PredictionOutput` en el mismo orden. Lo usan los lotes y el
+    streaming, que se serializan sin pasar por pydantic (ver app/serialization.py).
+    """
+    if pred == 1:
+        mensaje = f"🟢 {nombre_pasajero} HABRÍA SOBREVIVIDO"
+    else:
+        mensaje = f"🔴 {nombre_pasajero} NO habría sobrevivido"
+
+    return {
+        "name": nombre_pasajero,
+        "survived": bool(pred),
+        "probability_survive": round(float(prob_survive) * 100, 2),
+        "probability_die": round(float(prob_die) * 100, 2),
+        "message": mensaje,
+        "confidence_level": nivel_confianza,
+        "exact": bool(exacta),
+        "explanation": explicacion,
+    }
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """
+    Resume un error de pydantic en una línea: `campo: mensaje; campo: mensaje`.
+    """
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'passenger'}: {err['msg']}"
+        for err in error.errors()
+    )
 
 
 @app.get("/", summary="API Root Endpoint")
-async def root():
+async def root(request: Request):
     """
     Punto de entrada principal de la API de predicción de supervivencia del Titanic.
 
     Proporciona información sobre la API, los endpoints disponibles y cómo usarla.
+    La respuesta se serializa una sola vez y se sirve con `ETag`.
     """
+    return ROOT_PAYLOAD.response(request)
+
+
+def root_info() -> dict:
     return {
         "status": "running",
         "message": "Bienvenido a la Titanic Survival Prediction API",
@@ -173,25 +866,65 @@ async def root():
                 "example_request": {
                     "name": "Kelly, Mr. James",
                     "Pclass": 3,
-                    "Age": 34.5,
-                    "Fare": 7.8292,
+                    "Age": 5.0,
+                    "Fare": 1.0,
                     "Cabin_Assigned": 0,
-                    "Name_Size": 2.0,
+                    "Name_Size": 0.0,
                     "TicketNumberCounts": 1,
                     "Sex": "male",
                     "Embarked": "Q",
                     "Title": "Mr",
-                    "TicketLocation": "SOTON/OQ",
+                    "TicketLocation": "Blank",
                     "Family_Size_Grouped": "Alone",
-                    "Age_Cut": "5",
-                    "Fare_cut": "0",
-                    "Name_LengthGB": "(23.0, 25.0]"
+                    "Age_Cut": "(29.0, 35.0]",
+                    "Fare_cut": "(7.775, 8.662]",
+                    "Name_LengthGB": "(11.999, 18.0]"
                 }
             },
+            {
+                "path": "/predict/batch",
+                "method": "POST",
+                "description": "Predice la supervivencia de una lista de pasajeros en una sola llamada al modelo. Las filas inválidas se informan por separado."
+            },
+            {
+                "path": "/predict/raw",
+                "method": "POST",
+                "description": "Predice a partir de los campos crudos del dataset (Name, Age, Fare, SibSp, Parch, Ticket, Cabin); las características se derivan en el servidor."
+            },
+            {
+                "path": "/predict/raw/batch",
+                "method": "POST",
+                "description": "Igual que /predict/raw para una lista de pasajeros, con la derivación vectorizada sobre todo el lote."
+            },
+            {
+                "path": "/predict/sweep",
+                "method": "POST",
+                "description": "Varía uno o dos campos de un pasajero y devuelve la matriz de probabilidades de sobrevivir, puntuada en una sola llamada al modelo."
+            },
+            {
+                "path": "/predict/stream",
+                "method": "POST",
+                "description": "Puntúa un cuerpo NDJSON o CSV en streaming y devuelve NDJSON por bloques, con memoria acotada."
+            },
             {
                 "path": "/categories",
                 "method": "GET",
                 "description": "Devuelve las categorías válidas para las variables categóricas del modelo."
+            },
+            {
+                "path": "/metrics",
+                "method": "GET",
+                "description": "Métricas de latencia por etapa, solicitudes, errores y tamaños de lote en formato Prometheus."
+            },
+            {
+                "path": "/ready",
+                "method": "GET",
+                "description": "Indica si el modelo está cargado, con su versión y los tiempos de carga y calentamiento."
+            },
+            {
+                "path": "/admin/reload",
+                "method": "POST",
+                "description": "Recarga el modelo desde disco sin cortar las solicitudes en curso."
             }
         ],
         "documentation": "https://titanicbackendss.onrender.com/docs",
@@ -210,29 +943,149 @@ async def root():
         }
     }
 
-@app.get("/categories", summary="Categorías válidas para las variables categóricas")
-async def get_categories():
+
+# El contenido de / no cambia mientras corre el proceso
+ROOT_PAYLOAD = StaticPayload(root_info())
+
+# Respuesta de /categories serializada para la tabla de categorías vigente
+_categories_payload = (None, None)
+
+
+def categories_payload() -> StaticPayload:
+    """Serializa `/categories` una vez por modelo cargado (cambia con una recarga)."""
+    global _categories_payload
+    table = model_module.manager.current.categories
+    cached_table, payload = _categories_payload
+    if cached_table is not table:
+        payload = StaticPayload(table.response)
+        _categories_payload = (table, payload)
+    return payload
+
+@app.get("/ready", summary="Estado de carga del modelo")
+async def ready():
+    """
+    Indica si el modelo está listo para predecir (503 si todavía no lo está),
+    con la versión vigente, los tiempos de carga y calentamiento y el estado de
+    las recargas.
+    """
+    info = model_module.manager.info()
+    if not info["ready"]:
+        return JSONResponse(status_code=503, content=info)
+    return info
+
+@app.post("/admin/reload", summary="Recarga el modelo desde disco")
+async def reload_model(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Carga y calienta el artefacto que hay en disco en segundo plano y lo publica
+    de forma atómica; las solicitudes en curso terminan con el modelo anterior.
+    Si el contenido no cambió no hace nada, salvo con `force=true`.
+
+    Si `ADMIN_TOKEN` está configurado hay que enviarlo en el header `X-Admin-Token`.
+    """
+    if config.ADMIN_TOKEN and x_admin_token != config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+    loop = asyncio.get_running_loop()
+    try:
+        reloaded = await loop.run_in_executor(None, model_module.manager.reload, force)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error recargando el modelo: {str(e)}")
+
+    # Los workers del backend de procesos tienen su propia copia del modelo
+    if reloaded:
+        await app.state.executor.restart()
+    return {"reloaded": reloaded, **model_module.manager.info()}
+
+@app.get("/metrics", summary="Métricas en formato Prometheus", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Latencia por etapa y por ruta (histogramas y percentiles p50/p95/p99),
+    solicitudes y errores por tipo de excepción y distribución del tamaño de
+    lote del modelo, en formato de texto de Prometheus.
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/metrics/summary", summary="Percentiles por etapa en milisegundos")
+async def get_metrics_summary():
+    """
+    Resumen legible de `/metrics`: cantidad, media y p50/p95/p99 de cada etapa.
+    """
+    return metrics.summary()
+
+@app.get("/batching/stats", summary="Estadísticas del micro-batching de /predict")
+async def batching_stats():
+    """
+    Devuelve la profundidad de la cola, la distribución de tamaños de lote y los
+    tiempos de espera del micro-batching de `/predict` (activado con `PREDICT_BATCHING=1`).
+    """
+    if app.state.batcher is None:
+        return {"enabled": False}
+    return app.state.batcher.stats()
+
+@app.get("/admission/stats", summary="Estadísticas del control de admisión")
+async def admission_stats():
+    """
+    Devuelve las solicitudes en inferencia, la profundidad de la cola, las
+    admitidas, las que esperaron y las descartadas por motivo (cola llena,
+    plazo vencido o cliente desconectado) del control de admisión
+    (`ADMISSION_MAX_IN_FLIGHT=0` lo deshabilita).
+    """
+    if app.state.admission is None:
+        return {"enabled": False}
+    return app.state.admission.stats()
+
+@app.get("/prediction-log/stats", summary="Estadísticas del registro de predicciones")
+async def prediction_log_stats():
+    """
+    Devuelve las filas en el buffer, escritas, descartadas por buffer lleno y
+    perdidas por errores de escritura del registro de predicciones
+    (`PREDICTION_LOG_URL` vacío lo deshabilita).
+    """
+    if app.state.prediction_log is None:
+        return {"enabled": False}
+    return app.state.prediction_log.stats()
+
+@app.get("/cache/stats", summary="Estadísticas de la caché de predicciones")
+async def cache_stats():
+    """
+    Devuelve el tamaño, los aciertos, fallos, desalojos e invalidaciones de la
+    caché LRU de predicciones (`PREDICTION_CACHE_SIZE=0` la deshabilita).
+    """
+    if app.state.cache is None:
+        return {"enabled": False}
+    return app.state.cache.stats()
+
+@app.get(
+    "/categories", summary="Categorías válidas para las variables categóricas", dependencies=[Depends(require_model)]
+)
+async def get_categories(request: Request):
     """
     Devuelve las categorías válidas para las variables categóricas esperadas por el modelo de predicción de supervivencia del Titanic.
 
     ### Descripción
-    Este endpoint proporciona las categorías aceptadas para las variables categóricas requeridas por el modelo Random Forest. Estas categorías se derivan del preprocesamiento realizado en los datos de entrenamiento, incluyendo normalización de valores (e.g., `TicketLocation`), mapeo de títulos (`Title`), y categorización de variables continuas (`Age`, `Fare`, `Family_Size`, `Name_Length`).
+    Este endpoint proporciona las categorías aceptadas para las variables categóricas requeridas por el modelo Random Forest. Estas categorías se leen de los codificadores del modelo cargado, que las aprendió en el preprocesamiento de los datos de entrenamiento, incluyendo normalización de valores (e.g., `TicketLocation`), mapeo de títulos (`Title`), y categorización de variables continuas (`Age`, `Fare`, `Family_Size`, `Name_Length`). Son las mismas que usa `PassengerInput` para rechazar valores inválidos.
+
+    Cada campo lista los valores aceptados; `model_categories` tiene solo los que conoce el modelo y `legacy_codes` los códigos numéricos de `Age_Cut` y `Fare_cut` que se siguen aceptando por compatibilidad (el modelo los trata como desconocidos).
 
     ### Detalles de las categorías
     - **Sex**: Sexo del pasajero, codificado como 'male' o 'female'.
     - **Embarked**: Puerto de embarque, codificado como 'C' (Cherbourg), 'Q' (Queenstown), 'S' (Southampton).
-    - **Title**: Título extraído del nombre, mapeado a categorías como 'Mr', 'Mrs', 'Miss', 'Master', o agrupaciones como 'military', 'nobility', 'unmarried_women', 'married_women', 'religious'.
+    - **Title**: Título extraído del nombre, mapeado a categorías como 'Mr', 'Master', 'Dr', o agrupaciones como 'military', 'nobility', 'unmarried_women', 'married_women', 'religious'.
     - **TicketLocation**: Prefijo normalizado del ticket, derivado de la limpieza de datos (e.g., 'SOTON/O.Q.' → 'SOTON/OQ').
     - **Family_Size_Grouped**: Tamaño de la familia a bordo, agrupado en 'Alone' (1 persona), 'Small' (2-4), 'Medium' (5-6), 'Large' (7+).
-    - **Age_Cut**: Edad categorizada en rangos numéricos (0 a 8), basados en los cortes definidos en el preprocesamiento.
-    - **Fare_cut**: Tarifa categorizada en rangos numéricos (0 a 6), basados en los cortes definidos en el preprocesamiento.
+    - **Age_Cut**: Edad categorizada en los intervalos del preprocesamiento (e.g., '(17.0, 22.0]'), o los códigos heredados 0 a 8.
+    - **Fare_cut**: Tarifa categorizada en los intervalos del preprocesamiento (e.g., '(7.775, 8.662]'), o los códigos heredados 0 a 6.
     - **Name_LengthGB**: Longitud del nombre categorizada en rangos (e.g., '(11.999, 18.0]', '(18.0, 20.0]').
+
+    La respuesta se serializa una vez por versión del modelo y se sirve con
+    `ETag`: un `If-None-Match` con la misma etiqueta recibe 304 sin cuerpo.
     """
     try:
-        return EXPECTED_CATEGORIES
+        return categories_payload().response(request)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener categorías: {str(e)}")
     
 if __name__ == "__main__":
+    # Un solo proceso (desarrollo); en producción: python -m app.server --workers N
     port = int(os.getenv("PORT", 8000))
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
@@ -0,0 +1,360 @@
+# app/metrics.py
+"""
+Métricas en proceso con exposición en formato de texto de Prometheus.
+
+Cada etapa del camino caliente se mide con `time.perf_counter` y se acumula en
+un histograma de buckets fijos (sin guardar muestras ni tomar locks), así que
+registrar una observación cuesta una búsqueda binaria y dos sumas. Los percentiles p50/p95/p99
+se estiman interpolando dentro del bucket, igual que `histogram_quantile` de
+Prometheus.
+
+Las etapas que corren dentro de `app.model` (validate, encode, predict,
+summarize) solo se registran en el proceso que las ejecuta: con el backend
+`process` quedan en los workers y `/metrics` no las ve.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app import config
+
+# 5 µs a ~10 s, cuatro buckets por década
+LATENCY_BUCKETS = tuple(round(5e-6 * 10 ** (i / 4), 9) for i in range(26))
+# Filas por llamada al modelo
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Etapas de una predicción, en el orden en que ocurren
+STAGES = {
+    "framework": "Parseo y validación pydantic, enrutado y serialización de la respuesta",
+    "admission": "Espera en la cola del control de admisión",
+    "derive": "Derivación de características desde campos crudos",
+    "cache": "Búsqueda en la caché de predicciones",
+    "inference": "Envío al backend de inferencia (incluye cola del micro-batching)",
+    "validate": "Validación de categorías",
+    "encode": "Codificación de características (o construcción del DataFrame)",
+    "predict": "Evaluación del bosque (predict_proba)",
+    "summarize": "Clase, probabilidades y nivel de confianza",
+    "explain": "Contribuciones por característica (modo explicación)",
+    "response": "Armado de la respuesta",
+}
+
+
+class Histogram:
+    """
+    Histograma acumulativo de buckets fijos, seguro entre hilos.
+
+    Cada hilo suma en su propia copia de los contadores (sin lock en `observe`);
+    `snapshot` las combina.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.bounds = list(buckets)
+        self._local = threading.local()
+        self._shards: List[List[float]] = []
+        self._lock = threading.Lock()
+
+    def _new_shard(self) -> List[float]:
+        # Un contador por bucket (el último es +Inf) y la suma al final
+        shard = [0] * (len(self.bounds) + 1) + [0.0]
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def observe(self, value: float):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[bisect_left(self.bounds, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Conteo por bucket, suma y cantidad de observaciones."""
+        n = len(self.bounds) + 1
+        counts = [0] * n
+        total = 0.0
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            values = list(shard)
+            for i in range(n):
+                counts[i] += values[i]
+            total += values[-1]
+        return counts, total, sum(counts)
+
+    def quantile(self, q: float, counts: Optional[List[int]] = None) -> float:
+        """Percentil estimado por interpolación lineal dentro del bucket."""
+        if counts is None:
+            counts = self.snapshot()[0]
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class Counter:
+    """
+    Contador con etiquetas (tupla de valores en el orden de `labels`), con una
+    copia por hilo igual que `Histogram`.
+    """
+
+    def __init__(self, labels: Sequence[str]):
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._shards: List[Dict[Tuple[str, ...], int]] = []
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: int = 1):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        shard[label_values] = shard.get(label_values, 0) + amount
+
+    def snapshot(self) -> Dict[Tuple[str, ...], int]:
+        totals: Dict[Tuple[str, ...], int] = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, value in list(shard.items()):
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+
+class MetricsRegistry:
+    """
+    Métricas de la API: latencia por etapa y por ruta, solicitudes, errores por
+    tipo de excepción y tamaños de lote del modelo.
+
+    Args:
+        enabled: con False, todas las observaciones se descartan
+        prefix: prefijo de los nombres en la exposición de Prometheus
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = "titanic"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.started_at = time.time()
+        self.stage_seconds: Dict[str, Histogram] = {stage: Histogram(LATENCY_BUCKETS) for stage in STAGES}
+        self.request_seconds: Dict[str, Histogram] = {}
+        self.requests = Counter(("path", "method", "status"))
+        self.errors = Counter(("path", "exception"))
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.forest_trees = Counter(("kind",))
+        self.forest_rows = Counter(("result",))
+        self.admission = Counter(("result",))
+        self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe_stage(self, stage: str, seconds: float):
+        if self.enabled:
+            self.stage_seconds[stage].observe(seconds)
+
+    def observe_batch(self, rows: int):
+        if self.enabled:
+            self.batch_size.observe(rows)
+
+    def observe_trees(self, evaluated: int, total: int, early_rows: int):
+        """Árboles evaluados y omitidos, y filas que salieron antes, en una evaluación con salida temprana."""
+        if self.enabled:
+            self.forest_trees.inc("evaluated", amount=evaluated)
+            self.forest_trees.inc("skipped", amount=total - evaluated)
+            self.forest_rows.inc("early_exit", amount=early_rows)
+
+    def observe_admission(self, result: str, waited: Optional[float] = None):
+        """
+        Resultado del control de admisión: "admitted" (sin esperar), "queued"
+        (admitida tras esperar `waited` segundos) o el motivo del descarte.
+        """
+        if self.enabled:
+            self.admission.inc(result)
+            if waited is not None:
+                self.stage_seconds["admission"].observe(waited)
+
+    def register_gauge(self, name: str, help_text: str, read: Callable[[], float]):
+        """Valor instantáneo que se lee en cada exposición (p. ej. la profundidad de una cola)."""
+        self._gauges[name] = (help_text, read)
+
+    def observe_request(self, path: str, method: str, status: int, seconds: float):
+        if not self.enabled:
+            return
+        histogram = self.request_seconds.get(path)
+        if histogram is None:
+            with self._lock:
+                histogram = self.request_seconds.setdefault(path, Histogram(LATENCY_BUCKETS))
+        histogram.observe(seconds)
+        self.requests.inc(path, method, str(status))
+
+    def record_error(self, path: str, error: BaseException):
+        if self.enabled:
+            self.errors.inc(path, type(error).__name__)
+
+    def summary(self) -> Dict[str, Any]:
+        """Percentiles por etapa en milisegundos (para inspección rápida, sin Prometheus)."""
+        stages = {}
+        for stage, histogram in self.stage_seconds.items():
+            counts, total, count = histogram.snapshot()
+            if count:
+                stages[stage] = {
+                    "count": count,
+                    "mean_ms": total / count * 1000.0,
+                    **{f"p{int(q * 100)}_ms": histogram.quantile(q, counts) * 1000.0 for q in QUANTILES},
+                }
+        return {"enabled": self.enabled, "stages": stages}
+
+    def render(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus (versión 0.0.4)."""
+        p = self.prefix
+        lines: List[str] = []
+
+        lines += _histogram(
+            f"{p}_stage_duration_seconds",
+            "Duración de cada etapa de una predicción",
+            (({"stage": stage}, h) for stage, h in self.stage_seconds.items()),
+        )
+        lines += _quantiles(
+            f"{p}_stage_duration_quantile_seconds",
+            "Percentiles estimados de la duración de cada etapa",
+            (({"stage": stage}, h) for stage, h in self.stage_seconds.items()),
+        )
+        lines += _histogram(
+            f"{p}_request_duration_seconds",
+            "Duración de las solicitudes HTTP por ruta",
+            (({"path": path}, h) for path, h in sorted(self.request_seconds.items())),
+        )
+        lines += _quantiles(
+            f"{p}_request_duration_quantile_seconds",
+            "Percentiles estimados de la duración de las solicitudes HTTP por ruta",
+            (({"path": path}, h) for path, h in sorted(self.request_seconds.items())),
+        )
+        lines += _counter(f"{p}_requests_total", "Solicitudes HTTP por ruta, método y estado", self.requests)
+        lines += _counter(f"{p}_errors_total", "Errores por ruta y tipo de excepción", self.errors)
+        lines += _histogram(
+            f"{p}_model_batch_size",
+            "Filas por llamada al modelo",
+            [({}, self.batch_size)],
+        )
+        lines += _counter(
+            f"{p}_forest_trees_total", "Árboles evaluados y omitidos por la salida temprana", self.forest_trees
+        )
+        lines += _counter(f"{p}_forest_early_exit_rows_total", "Filas que salieron antes del último árbol", self.forest_rows)
+        lines += _counter(
+            f"{p}_admission_total", "Solicitudes admitidas sin esperar, admitidas tras esperar en la cola y descartadas por motivo", self.admission
+        )
+        for name, (help_text, read) in self._gauges.items():
+            lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} gauge", f"{p}_{name} {read()}"]
+        lines += [
+            f"# HELP {p}_start_time_seconds Momento de arranque del proceso",
+            f"# TYPE {p}_start_time_seconds gauge",
+            f"{p}_start_time_seconds {self.started_at}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _histogram(name: str, help_text: str, series: Iterable[Tuple[Dict[str, Any], Histogram]]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        counts, total, count = histogram.snapshot()
+        cumulative = 0
+        for bound, bucket in zip(histogram.bounds, counts):
+            cumulative += bucket
+            lines.append(f"{name}_bucket{_labels({**labels, 'le': _format_bound(bound)})} {cumulative}")
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': '+Inf'})} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {total}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+    return lines
+
+
+def _quantiles(name: str, help_text: str, series: Iterable[Tuple[Dict[str, Any], Histogram]]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, histogram in series:
+        counts = histogram.snapshot()[0]
+        for q in QUANTILES:
+            lines.append(f"{name}{_labels({**labels, 'quantile': str(q)})} {histogram.quantile(q, counts)}")
+    return lines
+
+
+def _counter(name: str, help_text: str, counter: Counter) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for values, total in sorted(counter.snapshot().items()):
+        lines.append(f"{name}{_labels(dict(zip(counter.labels, values)))} {total}")
+    return lines
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada solicitud HTTP y cuenta los errores no manejados.
+
+    Las rutas desconocidas se agrupan en `path="other"` para acotar la cardinalidad.
+    La etapa `framework` es la duración total menos el tiempo del endpoint, que
+    el endpoint deja en `request.state.handler_seconds`, y menos la espera en
+    la cola de admisión (`request.state.admission_seconds`).
+    """
+
+    def __init__(self, app: Callable, registry: MetricsRegistry, paths: Callable[[], Iterable[str]]):
+        self.app = app
+        self.registry = registry
+        self._paths = paths
+        self._known: Optional[frozenset] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        if self._known is None:
+            self._known = frozenset(self._paths())
+        path = scope["path"] if scope["path"] in self._known else "other"
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            self.registry.record_error(path, e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.registry.observe_request(path, scope["method"], status, elapsed)
+            state = scope.get("state", {})
+            handler = state.get("handler_seconds")
+            if handler is not None:
+                waited = state.get("admission_seconds", 0.0)
+                self.registry.observe_stage("framework", max(elapsed - handler - waited, 0.0))
+
+
+metrics = MetricsRegistry(enabled=config.METRICS_ENABLED)
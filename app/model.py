@@ -1,43 +1,334 @@
+import bisect
+import itertools
 import joblib
+import logging
+import numpy as np
+import os
 import pandas as pd
+import time
 from pathlib import Path
-from typing import Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app import config
+from app.categories import CategoryTable
+from app.encoder import FeatureEncoder, UnsupportedPipelineError
+from app.features import FeatureDeriver
+from app.forest import FlatForest
+from app.metrics import metrics
+from app.registry import LoadedModel, ModelManager, ModelNotReady, artifact_version  # noqa: F401
+
+logger = logging.getLogger(__name__)
 
 # Ruta al modelo
-model_path = Path(__file__).resolve().parent.parent / "models" / "modelo_titanic_rfc.pkl"
-
-try:
-    model = joblib.load(model_path)
-except FileNotFoundError:
-    raise RuntimeError(f"Modelo no encontrado en: {model_path}")
-except Exception as e:
-    raise RuntimeError(f"Error cargando el modelo: {e}")
-
-EXPECTED_CATEGORIES = {
-    'Sex': ['male', 'female'],
-    'Embarked': ['C', 'Q', 'S'],
-    'Title': ['Mr', 'Mrs', 'Miss', 'Master', 'military', 'nobility', 'unmarried_women', 'married_women', 'religious'],
-    'TicketLocation': [
-        'A/4', 'A/5', 'CA', 'PC', 'SOTON/OQ', 'SC/Paris', 'W/C', 'Blank', 'C', 'F.C.', 'F.C.C.', 'Fa', 
-        'P/PP', 'PP', 'S.C./A.4.', 'S.O./P.P.', 'S.O.C.', 'S.O.P.', 'S.P.', 'SC', 'SC/AH', 'SO/C', 
-        'STON/O', 'STON/O2.', 'SW/PP', 'W.E.P.', 'WE/P', 'A4.', 'A/S', 'C.A./SOTON'
-    ],
-    'Family_Size_Grouped': ['Alone', 'Small', 'Medium', 'Large'],
-    'Age_Cut': ['0', '1', '2', '3', '4', '5', '6', '7', '8'],
-    'Fare_cut': ['0', '1', '2', '3', '4', '5', '6'],
-    'Name_LengthGB': [
-        '(11.999, 18.0]', '(18.0, 20.0]', '(20.0, 23.0]', '(23.0, 25.0]', 
-        '(25.0, 27.25]', '(27.25, 30.0]', '(30.0, 38.0]', '(38.0, 82.0]'
-    ]
-}
+model_path = config.MODEL_PATH
+
+def build_encoder(pipeline) -> Optional[FeatureEncoder]:
+    """
+    Compila el codificador sin pandas y verifica que reproduce exactamente el
+    preprocesamiento del pipeline. Si no puede garantizarlo, devuelve None y la
+    API sigue usando el camino con DataFrame.
+    """
+    try:
+        encoder = FeatureEncoder(pipeline)
+    except UnsupportedPipelineError as e:
+        logger.warning("Codificador compilado deshabilitado: %s", e)
+        return None
+    if not encoder.verify(encoder.probe_records()):
+        logger.warning("Codificador compilado deshabilitado: no coincide con el pipeline")
+        return None
+    return encoder
+
+
+def build_forest(encoder: Optional[FeatureEncoder], version: Optional[str] = None) -> Tuple[Optional[FlatForest], Optional[str]]:
+    """
+    Exporta el bosque a arrays planos si el motor configurado es "flat" y
+    verifica que reproduce exactamente a sklearn; si no, el bosque es None.
+
+    Con `MODEL_MMAP` los arrays se guardan una vez por versión en
+    `MODEL_CACHE_DIR` y se abren con mmap, de modo que todos los workers
+    comparten la misma copia desde el page cache.
+
+    Returns:
+        Tuple: el bosque (o None) y su origen, "mmap" o "memory"
+    """
+    if encoder is None or config.INFERENCE_ENGINE != "flat":
+        return None, None
+
+    cache_path = None
+    if config.MODEL_MMAP and config.MODEL_CACHE_DIR and version is not None:
+        cache_path = Path(config.MODEL_CACHE_DIR) / f"{model_path.stem}-{version}.flat"
+
+    forest, source = None, "memory"
+    if cache_path is not None and cache_path.exists():
+        try:
+            forest, source = FlatForest.load(cache_path), "mmap"
+        except Exception as e:
+            logger.warning("No se pudo abrir el bosque plano guardado en %s: %s", cache_path, e)
+
+    if forest is None:
+        try:
+            forest = FlatForest(encoder.estimator)
+        except ValueError as e:
+            logger.warning("Motor flat deshabilitado: %s", e)
+            return None, None
+        if cache_path is not None:
+            try:
+                save_forest(forest, cache_path)
+                forest, source = FlatForest.load(cache_path), "mmap"
+            except OSError as e:
+                logger.warning("Bosque plano en memoria privada, no se pudo guardar en %s: %s", cache_path, e)
+
+    # Filas de prueba: todas las categorías más una muestra aleatoria
+    X = encoder.transform(encoder.probe_records())
+    rng = np.random.default_rng(0)
+    X = np.vstack([X, X[rng.integers(0, len(X), 256)] * rng.uniform(0, 2, (256, X.shape[1]))])
+    if not forest.verify(encoder.estimator, X):
+        logger.warning("Motor flat deshabilitado: no coincide con sklearn")
+        return None, None
+    return forest, source
+
+
+def save_forest(forest: FlatForest, path: Path):
+    # Escribir aparte y renombrar: otro worker puede estar leyendo el mismo archivo
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        forest.save(tmp)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+    # Borrar los de versiones anteriores; quien todavía los tenga abiertos conserva su mapeo
+    for old in path.parent.glob(f"{model_path.stem}-*.flat"):
+        if old != path:
+            old.unlink(missing_ok=True)
+
+
+def limit_n_jobs(estimator: Any, n_jobs: int) -> int:
+    """
+    Fija `n_jobs` en el estimador y en todos los que contiene (pasos del
+    pipeline, transformadores del ColumnTransformer, `best_estimator_` de
+    GridSearchCV, ...), para que una predicción no abra su propio pool de joblib.
+
+    Returns:
+        int: cantidad de estimadores modificados
+    """
+    from sklearn.base import BaseEstimator
+
+    changed = 0
+    seen = set()
+    pending = [estimator]
+    while pending:
+        current = pending.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        if isinstance(current, BaseEstimator):
+            if hasattr(current, "n_jobs") and current.n_jobs != n_jobs:
+                current.n_jobs = n_jobs
+                changed += 1
+            pending.extend(vars(current).values())
+        elif isinstance(current, (list, tuple)):
+            pending.extend(current)
+        elif isinstance(current, dict):
+            pending.extend(current.values())
+    return changed
+
+
+def load_model(path: Path, version: str) -> LoadedModel:
+    """
+    Carga el artefacto y prepara los motores rápidos (codificador compilado y
+    bosque plano), verificados contra sklearn antes de publicarse.
+    """
+    start = time.perf_counter()
+    try:
+        pipeline = joblib.load(path, mmap_mode="r" if config.MODEL_MMAP else None)
+    except FileNotFoundError:
+        raise RuntimeError(f"Modelo no encontrado en: {path}")
+    except Exception as e:
+        raise RuntimeError(f"Error cargando el modelo: {e}")
+    load_seconds = time.perf_counter() - start
+    if config.MODEL_N_JOBS:
+        limit_n_jobs(pipeline, config.MODEL_N_JOBS)
+
+    start = time.perf_counter()
+    categories = CategoryTable.from_pipeline(pipeline)
+    features = FeatureDeriver.from_pipeline(pipeline, categories)
+    encoder = build_encoder(pipeline)
+    forest, forest_source = build_forest(encoder, version)
+    warmup_seconds = time.perf_counter() - start
+
+    return LoadedModel(
+        pipeline, encoder, forest, version, path, load_seconds, warmup_seconds, forest_source, categories, features
+    )
+
+
+# El modelo se carga la primera vez que se usa (o al arrancar la API, en segundo plano)
+manager = ModelManager(model_path, load_model)
+
+
+def __getattr__(name: str) -> Any:
+    # Compatibilidad para scripts: `model`, `encoder`, `forest` y `model_version`
+    # apuntan al modelo vigente y lo cargan si hace falta (la API nunca los usa)
+    if name == "model":
+        return manager.load().pipeline
+    if name in ("encoder", "forest"):
+        return getattr(manager.load(), name)
+    if name == "model_version":
+        return manager.load().version
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def validate_categories(data: pd.DataFrame):
-    for col, valid_values in EXPECTED_CATEGORIES.items():
+    # Los frozensets ya están armados en la tabla del modelo; solo se recorren las columnas
+    for col, valid_values in manager.current.categories.accepted.items():
         if col in data.columns:
-            invalid = set(data[col]) - set(valid_values)
-            if invalid:
-                raise ValueError(f"Valores inválidos en {col}: {invalid}")
+            columna = data[col]
+            invalid = columna[~columna.isin(valid_values)]
+            if len(invalid):
+                raise ValueError(f"Valores inválidos en {col}: {set(invalid)}")
+
+
+def invalid_category_rows(data: pd.DataFrame) -> Dict[int, str]:
+    """
+    Versión vectorizada de `validate_categories` para lotes: en lugar de fallar
+    ante el primer valor inválido, devuelve el error de cada fila afectada.
+
+    Returns:
+        Dict[int, str]: posición de la fila -> mensaje de error
+    """
+    errores: Dict[int, List[str]] = {}
+    for col, valid_values in manager.current.categories.accepted.items():
+        if col in data.columns:
+            columna = data[col]
+            invalidos = np.flatnonzero(~columna.isin(valid_values).to_numpy())
+            for pos in invalidos:
+                errores.setdefault(int(pos), []).append(f"Valor inválido en {col}: {columna.iat[pos]!r}")
+    return {pos: "; ".join(mensajes) for pos, mensajes in errores.items()}
+
+
+# Cortes de `confidence_level` sobre la probabilidad de la clase predicha y
+# el nivel de cada tramo. Con dos clases la probabilidad máxima nunca baja de 0.5
+CONFIDENCE_CUTS = (0.55, 0.60, 0.70, 0.85)
+CONFIDENCE_LEVELS = ("Muy Baja", "Baja", "Media", "Alta", "Muy Alta")
+
+# Modo de salida temprana -> cortes que una fila que sale antes no puede cruzar
+EARLY_EXIT_CUTS = {"class": (), "confidence": CONFIDENCE_CUTS}
+
+
+def confidence_level(max_prob: float) -> str:
+    """Traduce la probabilidad de la clase predicha a un nivel de confianza textual."""
+    return CONFIDENCE_LEVELS[bisect.bisect_right(CONFIDENCE_CUTS, max_prob)]
+
+
+def invalid_category_records(records: Sequence[Any]) -> Dict[int, str]:
+    """
+    Igual que `invalid_category_rows`, pero sobre diccionarios o `PassengerInput`
+    sin construir un DataFrame.
+    """
+    errores: Dict[int, str] = {}
+    table = manager.current.categories
+    for pos, record in enumerate(records):
+        if not isinstance(record, dict):
+            record = record.__dict__
+        mensajes = table.errors(record)
+        if mensajes:
+            errores[pos] = "; ".join(mensajes)
+    return errores
+
 
+def _summarize(classes: np.ndarray, probabilities: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    # La clase es el argmax de las probabilidades, igual que model.predict
+    predictions = classes[probabilities.argmax(axis=1)]
+    confidence = [confidence_level(p) for p in probabilities.max(axis=1)]
+    return predictions, probabilities[:, 0], probabilities[:, 1], confidence
+
+
+def predict_proba_records(records: Sequence[Any], loaded: Optional[LoadedModel] = None) -> np.ndarray:
+    """
+    Probabilidades de cada clase para una lista de pasajeros (diccionarios o
+    `PassengerInput`). Usa el codificador compilado cuando está disponible y el
+    pipeline completo sobre un DataFrame en caso contrario. Los lotes chicos
+    se evalúan con el bosque plano y los grandes con sklearn.
+    """
+    probabilities, _ = _predict_proba(records, loaded or manager.current, "off")
+    return probabilities
+
+
+def _predict_proba(records: Sequence[Any], loaded: LoadedModel, early_exit: str) -> Tuple[np.ndarray, np.ndarray]:
+    # Como predict_proba_records, con salida temprana opcional; también devuelve
+    # qué filas recorrieron el bosque completo
+    if early_exit != "off" and early_exit not in EARLY_EXIT_CUTS:
+        raise ValueError(f"Modo de salida temprana desconocido: {early_exit!r}. Opciones: {('off', *EARLY_EXIT_CUTS)}")
+    encoder, forest = loaded.encoder, loaded.forest
+    n = len(records)
+    metrics.observe_batch(n)
+
+    start = time.perf_counter()
+    if encoder is not None:
+        X = encoder.transform(records)
+        estimator = _estimator_for(loaded, len(records))
+    else:
+        estimator = loaded.pipeline
+        data = pd.DataFrame([r if isinstance(r, dict) else r.model_dump() for r in records])
+        X = data[estimator.feature_names_in_]
+    encoded = time.perf_counter()
+    metrics.observe_stage("encode", encoded - start)
+
+    if early_exit != "off" and encoder is not None and forest is not None and (
+        config.EARLY_EXIT_MIN_ROWS <= n <= config.EARLY_EXIT_MAX_ROWS
+    ):
+        probabilities, trees = forest.predict_proba_early_exit(
+            X, EARLY_EXIT_CUTS[early_exit], config.EARLY_EXIT_CHUNK_TREES
+        )
+        exact = trees == forest.n_trees
+        metrics.observe_trees(int(trees.sum()), forest.n_trees * n, int(n - exact.sum()))
+    else:
+        probabilities = estimator.predict_proba(X)
+        exact = np.ones(n, dtype=bool)
+    metrics.observe_stage("predict", time.perf_counter() - encoded)
+    return probabilities, exact
+
+
+def _estimator_for(loaded: LoadedModel, rows: int) -> Any:
+    # Los lotes chicos se evalúan con el bosque plano y los grandes con sklearn
+    if loaded.forest is not None and rows <= config.FLAT_ENGINE_MAX_ROWS:
+        return loaded.forest
+    return loaded.encoder.estimator
+
+
+def _survived_column(loaded: LoadedModel) -> int:
+    return int(np.flatnonzero(loaded.pipeline.classes_ == 1)[0])
+
+
+def predict_survival_batch(data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    """
+    Predice la supervivencia de varios pasajeros con una única pasada del modelo.
+
+    Las categorías deben validarse antes (ver `invalid_category_rows`).
+
+    Args:
+        data (pd.DataFrame): DataFrame con una fila por pasajero
+
+    Returns:
+        Tuple:
+            - predictions (np.ndarray): 0 = no sobrevive, 1 = sobrevive
+            - prob_die (np.ndarray): probabilidades de no sobrevivir
+            - prob_survive (np.ndarray): probabilidades de sobrevivir
+            - confidence (List[str]): nivel de confianza textual por fila
+    """
+    model = manager.current.pipeline
+    required_cols = model.feature_names_in_
+    missing = [col for col in required_cols if col not in data.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas requeridas por el modelo: {missing}")
+
+    # Asegurarse de que estén en el mismo orden
+    data = data[required_cols]
+
+    # Una sola llamada a predict_proba
+    return _summarize(model.classes_, model.predict_proba(data))
 
 
 def predict_survival(data: pd.DataFrame) -> Tuple[int, float, float, str]:
@@ -54,34 +345,193 @@ def predict_survival(data: pd.DataFrame) -> Tuple[int, float, float, str]:
             - prob_survive (float): probabilidad de sobrevivir
             - confidence (str): nivel de confianza textual
     """
-    # Verificar que el input tenga las columnas necesarias
+    # Verificar que el input tenga categorías válidas
     validate_categories(data)
-    required_cols = model.feature_names_in_
-    missing = [col for col in required_cols if col not in data.columns]
-    if missing:
-        raise ValueError(f"Faltan columnas requeridas por el modelo: {missing}")
 
-    # Asegurarse de que estén en el mismo orden
-    data = data[required_cols]
+    predictions, prob_die, prob_survive, confidence = predict_survival_batch(data)
 
-    # Predicción
-    prediction = model.predict(data)[0]
-    probabilities = model.predict_proba(data)[0]
-
-    prob_die = probabilities[0]
-    prob_survive = probabilities[1]
-
-    # Nivel de confianza
-    max_prob = max(prob_die, prob_survive)
-    if max_prob >= 0.85:
-        confidence = "Muy Alta"
-    elif max_prob >= 0.70:
-        confidence = "Alta"
-    elif max_prob >= 0.60:
-        confidence = "Media"
-    elif max_prob >= 0.6:
-        confidence = "Baja"
-    else:
-        confidence = "Muy Baja"
+    return predictions[0], prob_die[0], prob_survive[0], confidence[0]
+
+
+def predict_survival_row(row: Any) -> Tuple[int, float, float, str, bool]:
+    """
+    Igual que `predict_survival`, pero recibe el pasajero (diccionario o
+    `PassengerInput`) y no construye ningún DataFrame si el codificador
+    compilado está disponible. Agrega `exact` como en `predict_survival_records`.
+    """
+    resultados, errores = predict_survival_records([row])
+    if errores:
+        raise ValueError(errores[0])
+    return resultados[0]
+
+
+def predict_survival_records(
+    records: Sequence[Any],
+    loaded: Optional[LoadedModel] = None,
+    early_exit: Optional[str] = None,
+) -> Tuple[List[Optional[Tuple[int, float, float, str, bool]]], Dict[int, str]]:
+    """
+    Valida las categorías y predice un lote de pasajeros ya validados por el esquema.
+
+    Args:
+        records (Sequence[Any]): un diccionario o `PassengerInput` por pasajero
+        loaded: modelo a usar; por defecto el vigente
+        early_exit: "off", "class" o "confidence"; por defecto `EARLY_EXIT`
+
+    Returns:
+        Tuple:
+            - resultados: tupla de `predict_survival` por fila más `exact` (False si
+              la fila salió antes de evaluar todo el bosque), o None si la fila es inválida
+            - errores: posición de la fila -> mensaje de error
+    """
+    resultados: List[Optional[Tuple[int, float, float, str, bool]]] = [None] * len(records)
+
+    # Descartar filas con categorías desconocidas
+    start = time.perf_counter()
+    errores = invalid_category_records(records)
+    keep = [pos for pos in range(len(records)) if pos not in errores]
+    metrics.observe_stage("validate", time.perf_counter() - start)
+
+    if keep:
+        validos = [records[pos] for pos in keep] if errores else records
+        # Un solo modelo para todo el lote, aunque se publique otro mientras tanto
+        loaded = loaded or manager.current
+        probabilities, exact = _predict_proba(validos, loaded, early_exit or config.EARLY_EXIT)
+
+        start = time.perf_counter()
+        predictions, prob_die, prob_survive, confidence = _summarize(loaded.pipeline.classes_, probabilities)
+        exact = exact.tolist()
+        for j, pos in enumerate(keep):
+            resultados[pos] = (predictions[j], prob_die[j], prob_survive[j], confidence[j], exact[j])
+        metrics.observe_stage("summarize", time.perf_counter() - start)
+
+    return resultados, errores
+
+
+def sweep_survival(base: Dict[str, Any], fields: Sequence[str], values: Sequence[Sequence[Any]]) -> np.ndarray:
+    """
+    Probabilidad de sobrevivir en cada punto de la grilla cartesiana que resulta
+    de reemplazar `fields` del pasajero base por cada combinación de `values`,
+    en una sola llamada al modelo. Los valores deben estar validados.
+
+    Con el codificador compilado no se arma un registro por punto: se codifica
+    el pasajero base una vez, cada valor de cada eje una vez, y la matriz se
+    completa copiando las columnas de cada eje. La grilla se evalúa con el
+    bosque plano hasta `FLAT_ENGINE_MAX_ROWS` puntos y con sklearn por encima,
+    igual que un lote. Sin codificador compilado cada punto pasa por el
+    pipeline completo sobre un DataFrame.
+
+    Returns:
+        np.ndarray: probabilidades con forma (len(values[0]), len(values[1]), ...)
+    """
+    loaded = manager.current
+    encoder = loaded.encoder
+    shape = [len(v) for v in values]
+    n = int(np.prod(shape))
+
+    if encoder is None:
+        records = [{**base, **dict(zip(fields, combo))} for combo in itertools.product(*values)]
+        probabilities = predict_proba_records(records, loaded)
+        return probabilities[:, _survived_column(loaded)].reshape(shape)
+
+    metrics.observe_batch(n)
+    start = time.perf_counter()
+    X = np.repeat(encoder.transform([base]), n, axis=0)
+    output_fields = np.asarray(encoder.output_fields)
+    outer = 1
+    for field, axis_values in zip(fields, values):
+        # Orden de itertools.product: el primer eje varía más lento
+        cols = np.flatnonzero(output_fields == field)
+        encoded = encoder.transform([{**base, field: v} for v in axis_values])[:, cols]
+        inner = n // (outer * len(axis_values))
+        X[:, cols] = np.tile(np.repeat(encoded, inner, axis=0), (outer, 1))
+        outer *= len(axis_values)
+    encoded_at = time.perf_counter()
+    metrics.observe_stage("encode", encoded_at - start)
+
+    probabilities = _estimator_for(loaded, n).predict_proba(X)
+    metrics.observe_stage("predict", time.perf_counter() - encoded_at)
+    return probabilities[:, _survived_column(loaded)].reshape(shape)
+
+
+def explanation_unavailable(loaded: Optional[LoadedModel] = None) -> Optional[str]:
+    """
+    Motivo por el que el modelo no puede explicar sus predicciones, o None si puede.
+    Las contribuciones salen de los caminos del bosque plano sobre la matriz del
+    codificador compilado, así que hacen falta los dos.
+    """
+    loaded = loaded or manager.current
+    if config.INFERENCE_ENGINE != "flat":
+        return f"Las explicaciones requieren INFERENCE_ENGINE=flat; el servidor usa {config.INFERENCE_ENGINE!r}"
+    if loaded.encoder is None or loaded.forest is None:
+        return (
+            f"Las explicaciones no están disponibles para el modelo {loaded.version}: el codificador "
+            "compilado o el bosque plano no reproducen exactamente al pipeline"
+        )
+    return None
+
+
+def feature_contributions(records: Sequence[Any], loaded: Optional[LoadedModel] = None) -> Tuple[float, List[str], np.ndarray]:
+    """
+    Contribución de cada campo de `PassengerInput` a la probabilidad de
+    sobrevivir, según los caminos de decisión del bosque plano. Las columnas
+    one-hot de un mismo campo se suman en una sola contribución.
+
+    Returns:
+        Tuple:
+            - base: probabilidad media de sobrevivir antes de mirar al pasajero
+            - fields: nombre del campo de cada columna de la matriz
+            - contributions: matriz (n, campos); base + suma por fila = probabilidad
+    """
+    loaded = loaded or manager.current
+    motivo = explanation_unavailable(loaded)
+    if motivo is not None:
+        raise ValueError(motivo)
+
+    X = loaded.encoder.transform(records)
+    base, contributions = loaded.forest.contributions(X, _survived_column(loaded))
+
+    # Matriz de agregación columna de salida -> campo de entrada
+    output_fields = loaded.encoder.output_fields
+    fields = list(dict.fromkeys(output_fields))
+    position = {field: i for i, field in enumerate(fields)}
+    aggregate = np.zeros((len(output_fields), len(fields)))
+    aggregate[np.arange(len(output_fields)), [position[f] for f in output_fields]] = 1.0
+    return base, fields, contributions @ aggregate
+
+
+def explain_survival_records(
+    records: Sequence[Any],
+) -> Tuple[List[Optional[Tuple[int, float, float, str, bool]]], Dict[int, str], List[Optional[Dict[str, Any]]]]:
+    """
+    Igual que `predict_survival_records`, con la explicación de cada fila válida.
+
+    Returns:
+        Tuple:
+            - resultados y errores: lo mismo que `predict_survival_records`
+            - explicaciones: `{"base_value", "contributions"}` por fila (en puntos
+              porcentuales de probabilidad de sobrevivir, de mayor a menor impacto),
+              o None si la fila es inválida
+    """
+    loaded = manager.current
+    # Las contribuciones suman la probabilidad del bosque completo
+    resultados, errores = predict_survival_records(records, loaded, early_exit="off")
+    explicaciones: List[Optional[Dict[str, Any]]] = [None] * len(records)
+
+    keep = [pos for pos in range(len(records)) if pos not in errores]
+    if keep:
+        start = time.perf_counter()
+        validos = [records[pos] for pos in keep] if errores else records
+        base, fields, contributions = feature_contributions(validos, loaded)
+        order = np.argsort(-np.abs(contributions), axis=1, kind="stable")
+        rounded = np.round(contributions * 100, 2).tolist()
+        base = round(base * 100, 2)
+        for j, pos in enumerate(keep):
+            row = rounded[j]
+            explicaciones[pos] = {
+                "base_value": base,
+                "contributions": {fields[i]: row[i] for i in order[j].tolist()},
+            }
+        metrics.observe_stage("explain", time.perf_counter() - start)
 
-    return prediction, prob_die, prob_survive, confidence
\ No newline at end of file
+    return resultados, errores, explicaciones
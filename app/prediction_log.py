@@ -0,0 +1,190 @@
+# app/prediction_log.py
+"""
+Registro de predicciones en una base SQL, escrito en segundo plano.
+
+Los endpoints solo agregan una fila a un buffer en memoria (sin I/O ni locks:
+se llama desde el event loop); una tarea de fondo lo vacía con INSERTs de
+muchas filas a través de un engine de SQLAlchemy con pool de conexiones. El
+buffer se vacía al juntar `flush_rows` filas o cada `flush_seconds`, lo que
+ocurra primero. Si está lleno, la fila se descarta y se cuenta en `dropped`:
+el registro nunca frena una predicción.
+
+Sirve con cualquier URL de SQLAlchemy: `sqlite:///predicciones.db` para
+pruebas (un archivo; `:memory:` no, porque cada hilo vería otra base) y
+`postgresql+psycopg2://...` en producción.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionLog:
+    """
+    Buffer acotado de predicciones con escritura diferida.
+
+    Args:
+        url: URL de SQLAlchemy de la base
+        max_buffer: filas máximas en memoria; las que no entran se descartan
+        flush_rows: filas que disparan una escritura (y filas por INSERT)
+        flush_seconds: tiempo máximo que una fila espera en el buffer
+        table: nombre de la tabla (se crea si no existe)
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_buffer: int = 10000,
+        flush_rows: int = 500,
+        flush_seconds: float = 1.0,
+        table: str = "predictions",
+    ):
+        self.url = url
+        self.max_buffer = max_buffer
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.table_name = table
+        self.buffer: Deque[Dict[str, Any]] = deque()
+
+        self._engine = None
+        self._table = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self.flush_seconds_total = 0.0
+        self.last_error: Optional[str] = None
+
+    def record(
+        self,
+        endpoint: str,
+        features: Dict[str, Any],
+        prob_survive: float,
+        prob_die: float,
+        confidence: str,
+        model_version: Optional[str],
+        latency_ms: float,
+    ) -> bool:
+        """
+        Encola una predicción. No bloquea: si el buffer está lleno la descarta.
+
+        Returns:
+            bool: False si la fila se descartó
+        """
+        if len(self.buffer) >= self.max_buffer:
+            self.dropped += 1
+            return False
+        self.buffer.append(
+            {
+                "created_at": datetime.now(timezone.utc),
+                "endpoint": endpoint,
+                "model_version": model_version,
+                "features": features,
+                "probability_survive": float(prob_survive),
+                "probability_die": float(prob_die),
+                "survived": bool(prob_survive > prob_die),
+                "confidence_level": confidence,
+                "latency_ms": latency_ms,
+            }
+        )
+        if len(self.buffer) >= self.flush_rows and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        # Conectar y crear la tabla fuera del event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._connect)
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Detiene la tarea de fondo y escribe lo que quedó en el buffer."""
+        if self._task is not None:
+            # Sin cancel(): una escritura en curso termina y sus filas no se pierden
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._engine is not None:
+            await self.flush()
+            self._engine.dispose()
+
+    def _connect(self):
+        # SQLAlchemy se importa solo si el registro está habilitado
+        from sqlalchemy import JSON, Boolean, Column, DateTime, Float, Integer, MetaData, String, Table, create_engine
+
+        self._engine = create_engine(self.url, pool_pre_ping=True)
+        metadata = MetaData()
+        self._table = Table(
+            self.table_name,
+            metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("created_at", DateTime(timezone=True), nullable=False, index=True),
+            Column("endpoint", String(64), nullable=False),
+            Column("model_version", String(32)),
+            Column("features", JSON, nullable=False),
+            Column("probability_survive", Float, nullable=False),
+            Column("probability_die", Float, nullable=False),
+            Column("survived", Boolean, nullable=False),
+            Column("confidence_level", String(16), nullable=False),
+            Column("latency_ms", Float, nullable=False),
+        )
+        metadata.create_all(self._engine)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """
+        Escribe el buffer en bloques de `flush_rows` filas. Si una escritura
+        falla, ese bloque se descarta (se cuenta en `failed`) para no acumular
+        memoria mientras la base no responde.
+        """
+        loop = asyncio.get_running_loop()
+        while self.buffer:
+            rows = [self.buffer.popleft() for _ in range(min(len(self.buffer), self.flush_rows))]
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(None, self._insert, rows)
+            except Exception as e:
+                self.failed += len(rows)
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning("No se pudieron guardar %d predicciones: %s", len(rows), self.last_error)
+                return
+            self.written += len(rows)
+            self.flushes += 1
+            self.flush_seconds_total += time.perf_counter() - start
+
+    def _insert(self, rows: List[Dict[str, Any]]):
+        # Con una lista de filas SQLAlchemy arma INSERTs de muchos VALUES ("insertmanyvalues")
+        with self._engine.begin() as conn:
+            conn.execute(self._table.insert(), rows)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "table": self.table_name,
+            "buffered": len(self.buffer),
+            "max_buffer": self.max_buffer,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "avg_flush_ms": self.flush_seconds_total / self.flushes * 1000.0 if self.flushes else 0.0,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,254 @@
+# app/registry.py
+"""
+Gestión del modelo cargado: carga diferida, recarga en caliente y estado.
+
+`ModelManager` guarda un único `LoadedModel` (el artefacto más todo lo que se
+deriva de él: codificador compilado, bosque plano, versión y tiempos). Una
+recarga construye y calienta el modelo nuevo aparte y lo publica con una sola
+asignación de referencia: cada solicitud toma el modelo vigente una vez al
+empezar, así que las que están en curso terminan con el anterior y ninguna ve
+una mezcla de los dos.
+
+El artefacto debe reemplazarse de forma atómica (escribir a un archivo temporal
+y `mv`), nunca sobrescribirse en el lugar: con `mmap_mode` el modelo vigente
+puede seguir leyendo páginas del archivo viejo.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_version(path: Path) -> str:
+    """Identificador del artefacto: prefijo del SHA-256 de su contenido."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+class ModelNotReady(RuntimeError):
+    """No hay un modelo cargado: todavía se está cargando o su carga falló."""
+
+
+class LoadedModel:
+    """
+    Modelo listo para predecir. Nunca se modifica: una recarga crea otro.
+
+    Attributes:
+        pipeline: pipeline de sklearn tal como se cargó del artefacto
+        encoder: `FeatureEncoder` compilado, o None si no es exacto
+        forest: `FlatForest`, o None si el motor flat está deshabilitado
+        version: versión del artefacto (ver `artifact_version`)
+        load_seconds: tiempo de `joblib.load`
+        warmup_seconds: tiempo de compilar, exportar y verificar los motores rápidos
+        forest_source: "mmap" si el bosque plano se comparte desde disco, "memory" si es privado
+        categories: `CategoryTable` con los valores categóricos aceptados
+        features: `FeatureDeriver` para pasajeros con campos crudos
+    """
+
+    def __init__(
+        self,
+        pipeline: Any,
+        encoder: Any,
+        forest: Any,
+        version: str,
+        path: Path,
+        load_seconds: float,
+        warmup_seconds: float,
+        forest_source: Optional[str] = None,
+        categories: Any = None,
+        features: Any = None,
+    ):
+        self.pipeline = pipeline
+        self.encoder = encoder
+        self.forest = forest
+        self.version = version
+        self.path = Path(path)
+        self.load_seconds = load_seconds
+        self.warmup_seconds = warmup_seconds
+        self.forest_source = forest_source
+        self.categories = categories
+        self.features = features
+        self.loaded_at = time.time()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "model_version": self.version,
+            "path": str(self.path),
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 4),
+            "warmup_seconds": round(self.warmup_seconds, 4),
+            "encoder": "compiled" if self.encoder is not None else "pipeline",
+            "flat_forest": self.forest_source,
+        }
+
+
+class ModelManager:
+    """
+    Mantiene el modelo vigente y lo recarga desde disco sin cortar solicitudes.
+
+    Args:
+        path: ruta del artefacto
+        loader: función `loader(path, version) -> LoadedModel` que carga y calienta
+    """
+
+    def __init__(self, path: Path, loader: Callable[[Path, str], LoadedModel]):
+        self.path = Path(path)
+        self._loader = loader
+        self._current: Optional[LoadedModel] = None
+        # Serializa cargas y recargas; las lecturas de `current` no lo toman
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int, int]] = None
+
+        self.reloading = False
+        self.reloads = 0
+        self.failed_loads = 0
+        self.last_error: Optional[str] = None
+        self.last_check: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._current is not None
+
+    @property
+    def version(self) -> Optional[str]:
+        """Versión vigente, o None si todavía no hay modelo (no bloquea)."""
+        current = self._current
+        return current.version if current is not None else None
+
+    @property
+    def current(self) -> LoadedModel:
+        """
+        Modelo vigente. No carga nada: la carga corre en segundo plano (o con
+        `load`), así que una solicitud nunca espera al artefacto.
+
+        Raises:
+            ModelNotReady: si todavía no hay un modelo cargado
+        """
+        current = self._current
+        if current is None:
+            raise self.not_ready()
+        return current
+
+    def not_ready(self) -> "ModelNotReady":
+        """Error que describe por qué no hay modelo: carga en curso o la última falla."""
+        if self.last_error is not None:
+            return ModelNotReady(f"El modelo no está disponible: {self.last_error}")
+        return ModelNotReady("El modelo todavía se está cargando")
+
+    @property
+    def categories(self) -> Optional[Any]:
+        """`CategoryTable` del modelo vigente, o None si todavía no hay modelo (no bloquea)."""
+        current = self._current
+        return current.categories if current is not None else None
+
+    def load(self) -> LoadedModel:
+        """Carga el artefacto si todavía no hay un modelo vigente (idempotente)."""
+        with self._lock:
+            if self._current is None:
+                self._stamp = self._file_stamp()
+                self._current = self._build()
+            return self._current
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Carga y calienta el artefacto que hay en disco y lo publica.
+
+        Si la carga falla se conserva el modelo vigente y se propaga el error.
+
+        Args:
+            force: recargar aunque el contenido no haya cambiado
+
+        Returns:
+            bool: True si se publicó un modelo nuevo
+        """
+        with self._lock:
+            self._stamp = self._file_stamp()
+            version = self._attempt(artifact_version, self.path)
+            if not force and self._current is not None and self._current.version == version:
+                return False
+
+            self.reloading = True
+            try:
+                loaded = self._build(version)
+            finally:
+                self.reloading = False
+
+            previous = self._current
+            self._current = loaded
+            if previous is not None:
+                self.reloads += 1
+                logger.info("Modelo recargado: %s -> %s", previous.version, loaded.version)
+            return True
+
+    def _build(self, version: Optional[str] = None) -> LoadedModel:
+        if version is None:
+            version = self._attempt(artifact_version, self.path)
+        loaded = self._attempt(self._loader, self.path, version)
+        self.last_error = None
+        return loaded
+
+    def _attempt(self, fn: Callable[..., Any], *args: Any) -> Any:
+        # Toda falla de carga (también leer el artefacto para su versión) queda en el estado
+        try:
+            return fn(*args)
+        except Exception as e:
+            self.failed_loads += 1
+            self.last_error = f"{type(e).__name__}: {e}"
+            logger.error("No se pudo cargar el modelo %s: %s", self.path, self.last_error)
+            raise
+
+    def changed_on_disk(self) -> bool:
+        """Compara mtime, tamaño e inodo con los de la última carga (sin leer el archivo)."""
+        self.last_check = time.time()
+        return self._file_stamp() != self._stamp
+
+    def _file_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    async def watch(self, interval: float, on_reload: Optional[Callable[[], Awaitable[None]]] = None):
+        """
+        Revisa el archivo cada `interval` segundos y recarga en un hilo aparte si cambió.
+
+        Args:
+            interval: segundos entre revisiones
+            on_reload: corrutina a ejecutar después de publicar un modelo nuevo
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval)
+            if not self.changed_on_disk():
+                continue
+            try:
+                changed = await loop.run_in_executor(None, self.reload)
+            except Exception:
+                # Ya registrado en `last_error`; se reintenta con el próximo cambio
+                continue
+            if changed and on_reload is not None:
+                await on_reload()
+
+    def info(self) -> Dict[str, Any]:
+        current = self._current
+        info: Dict[str, Any] = {"ready": current is not None}
+        if current is not None:
+            info.update(current.info())
+        info.update(
+            reloading=self.reloading,
+            reloads=self.reloads,
+            failed_loads=self.failed_loads,
+            last_error=self.last_error,
+            last_check=self.last_check,
+        )
+        return info
@@ -1,19 +1,34 @@
 # app/schemas.py
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from pydantic_core import InitErrorDetails, PydanticCustomError
+from typing import Any, Callable, Dict, List, Optional
+
+# Tabla de categorías del modelo vigente, o None si todavía no hay modelo (ver `use_categories`)
+_category_source: Callable[[], Optional[Any]] = lambda: None
+
+
+def use_categories(source: Callable[[], Optional[Any]]):
+    """
+    Registra de dónde lee `PassengerInput` las categorías aceptadas: una
+    función sin argumentos que devuelve la `CategoryTable` vigente o None, sin
+    bloquear (la API usa `manager.categories`).
+    """
+    global _category_source
+    _category_source = source
+
 
 class PassengerInput(BaseModel):
     name: Optional[str] = Field(None, description="Nombre del pasajero (opcional, solo para mostrar en la respuesta)")
     Pclass: int = Field(..., ge=1, le=3, description="Clase del pasajero: 1 = Primera, 2 = Segunda, 3 = Tercera")
-    Age: float = Field(..., ge=0, le=80, description="Edad original en años")
-    Fare: float = Field(..., ge=0, description="Tarifa original en libras")
+    Age: float = Field(..., ge=0, le=8, description="Código de edad con el que se entrenó el modelo, no los años: 0 (<=16), 1 (16-20.125), 2 (20.125-24), 3 (24-28), 4 (28-32.312), 5 (32.312-38), 6 (38-47), 7 (47-80), 8 (>80)")
+    Fare: float = Field(..., ge=0, le=6, description="Código de tarifa con el que se entrenó el modelo, no las libras: 0 (<=7.775), 1 (7.775-8.662), 2 (8.662-14.454), 3 (14.454-26), 4 (26-52.369), 5 (52.369-512.329), 6 (>512.329)")
     Cabin_Assigned: int = Field(..., ge=0, le=1, description="Indicador de cabina asignada: 1 = Sí, 0 = No")
-    Name_Size: float = Field(..., ge=0, description="Tamaño categórico del nombre, derivado de su longitud")
+    Name_Size: float = Field(..., ge=0, le=7, description="Posición del intervalo de `Name_LengthGB` (0 a 7): 0 = '(11.999, 18.0]', ..., 7 = '(38.0, 82.0]'")
     TicketNumberCounts: int = Field(..., ge=1, le=11, description="Número de pasajeros con el mismo ticket (1 a 11)")
     Sex: str = Field(..., description="Sexo: 'male' o 'female'")
     Embarked: str = Field(..., description="Puerto: 'C' = Cherbourg, 'Q' = Queenstown, 'S' = Southampton")
-    Title: str = Field(..., description="Título: 'Mr', 'Mrs', 'Miss', 'Master', 'military', 'nobility', 'unmarried_women', 'married_women', 'religious'")
-    TicketLocation: str = Field(..., description="Prefijo del ticket normalizado: 'A/4', 'A/5', 'CA', 'PC', 'SOTON/OQ', 'SC/Paris', 'W/C', 'Blank', etc.")
+    Title: str = Field(..., description="Título: 'Mr', 'Master', 'Dr', 'military', 'nobility', 'unmarried_women', 'married_women', 'religious'")
+    TicketLocation: str = Field(..., description="Prefijo del ticket normalizado: 'A/4', 'A/5', 'CA', 'PC', 'SOTON/OQ', 'SC/Paris', 'W/C', 'Blank', etc. (lista completa en /categories)")
     Family_Size_Grouped: str = Field(..., description="Tamaño familiar: 'Alone' (1), 'Small' (2-4), 'Medium' (5-6), 'Large' (7+)")
     Age_Cut: str = Field(..., description="Categoría de edad: '0' (<=16), '1' (16-20.125), '2' (20.125-24), '3' (24-28), '4' (28-32.312), '5' (32.312-38), '6' (38-47), '7' (47-80)")
     Fare_cut: str = Field(..., description="Categoría de tarifa: '0' (<=7.775), '1' (7.775-8.662), '2' (8.662-14.454), '3' (14.454-26), '4' (26-52.369), '5' (52.369-512.329), '6' (>512.329)")
@@ -21,26 +36,108 @@ class PassengerInput(BaseModel):
 
     class Config:
         json_schema_extra = {
+            # El mismo pasajero que el ejemplo de `RawPassengerInput`: 34.5 años y 7.8292 libras
             "example": {
                 "name": "Kelly, Mr. James",
                 "Pclass": 3,
-                "Age": 34.5,
-                "Fare": 7.8292,
+                "Age": 5.0,
+                "Fare": 1.0,
                 "Cabin_Assigned": 0,
-                "Name_Size": 2.0,
+                "Name_Size": 0.0,
                 "TicketNumberCounts": 1,
                 "Sex": "male",
                 "Embarked": "Q",
                 "Title": "Mr",
-                "TicketLocation": "SOTON/OQ",
+                "TicketLocation": "Blank",
                 "Family_Size_Grouped": "Alone",
-                "Age_Cut": "5",
-                "Fare_cut": "0",
-                "Name_LengthGB": "(23.0, 25.0]"
+                "Age_Cut": "(29.0, 35.0]",
+                "Fare_cut": "(7.775, 8.662]",
+                "Name_LengthGB": "(11.999, 18.0]"
+            }
+        }
+
+    @model_validator(mode="after")
+    def check_categories(self):
+        """
+        Rechaza en el parseo, antes de tocar el modelo, los valores categóricos
+        que el modelo cargado no conoce (ver app/categories.py). Un solo recorrido
+        por frozensets precompilados; cada error queda en su campo. Nunca carga
+        el modelo: lee la tabla registrada con `use_categories`.
+        """
+        table = _category_source()
+        if table is None:
+            # Sin modelo no hay contra qué validar; los endpoints ya respondieron 503
+            return self
+        values = self.__dict__
+        accepted = table.accepted
+        for field, valid in accepted.items():
+            if values[field] not in valid:
+                break
+        else:
+            return self
+
+        errors = [
+            InitErrorDetails(
+                type=PydanticCustomError("category", "valor inválido '{value}'; consultá GET /categories", {"value": values[field]}),
+                loc=(field,),
+                input=values[field],
+            )
+            for field, valid in accepted.items()
+            if values[field] not in valid
+        ]
+        raise ValidationError.from_exception_data(type(self).__name__, errors)
+
+
+class RawPassengerInput(BaseModel):
+    """
+    Pasajero con los campos crudos del dataset del Titanic. El servidor deriva
+    las características del modelo (ver app/features.py).
+    """
+
+    Name: str = Field(..., min_length=1, description="Nombre completo con el formato del dataset: 'Apellido, Título. Nombres'")
+    Pclass: int = Field(..., ge=1, le=3, description="Clase del pasajero: 1 = Primera, 2 = Segunda, 3 = Tercera")
+    Sex: str = Field(..., description="Sexo: 'male' o 'female'")
+    Age: Optional[float] = Field(None, ge=0, description="Edad en años (si falta se imputa)")
+    Fare: Optional[float] = Field(None, ge=0, description="Tarifa en libras (si falta se imputa)")
+    SibSp: int = Field(0, ge=0, description="Hermanos y cónyuges a bordo")
+    Parch: int = Field(0, ge=0, description="Padres e hijos a bordo")
+    Ticket: Optional[str] = Field(None, description="Ticket tal como figura en el dataset, p. ej. 'A/5 21171'")
+    Cabin: Optional[str] = Field(None, description="Cabina, vacía si no tenía asignada")
+    Embarked: Optional[str] = Field(None, description="Puerto: 'C', 'Q' o 'S' (si falta se imputa)")
+    TicketNumberCounts: Optional[int] = Field(
+        None, ge=1, le=11, description="Pasajeros con el mismo ticket; si falta se cuentan los del mismo lote"
+    )
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "Name": "Kelly, Mr. James",
+                "Pclass": 3,
+                "Sex": "male",
+                "Age": 34.5,
+                "Fare": 7.8292,
+                "SibSp": 0,
+                "Parch": 0,
+                "Ticket": "330911",
+                "Cabin": None,
+                "Embarked": "Q",
             }
         }
 
 
+class FeatureExplanation(BaseModel):
+    """
+    Por qué el modelo dio esa probabilidad: parte de la probabilidad media del
+    bosque y suma la contribución de cada campo a lo largo de los caminos de
+    decisión de los árboles.
+    """
+
+    base_value: float = Field(..., description="Probabilidad media de sobrevivir del modelo, antes de mirar al pasajero (%)")
+    contributions: Dict[str, float] = Field(
+        ..., description="Puntos porcentuales que cada campo suma o resta a la probabilidad de sobrevivir, de mayor a menor impacto"
+    )
+
+
 class PredictionOutput(BaseModel):
     """
     Esquema de salida que representa el resultado de la predicción de supervivencia.
@@ -51,7 +148,9 @@ class PredictionOutput(BaseModel):
     probability_survive: float = Field(..., description="Probabilidad de que sobreviva (%)")
     probability_die: float = Field(..., description="Probabilidad de que no sobreviva (%)")
     message: str = Field(..., description="Mensaje interpretativo de la predicción")
-    confidence_level: str = Field(..., description="Nivel de confianza de la predicción (Alta, Media, Baja)")
+    confidence_level: str = Field(..., description="Nivel de confianza de la predicción según la probabilidad de la clase predicha: Muy Alta (>= 85%), Alta (>= 70%), Media (>= 60%), Baja (>= 55%), Muy Baja")
+    exact: bool = Field(True, description="False si la salida temprana (`EARLY_EXIT`) dejó de evaluar árboles: la clase es la del bosque completo, las probabilidades son aproximadas")
+    explanation: Optional[FeatureExplanation] = Field(None, description="Contribución de cada campo, solo con `explain=true`")
 
     class Config:
         json_schema_extra = {
@@ -64,3 +163,106 @@ class PredictionOutput(BaseModel):
                 "confidence_level": "Alta",
             }
         }
+
+
+class BatchPredictionInput(BaseModel):
+    """
+    Esquema de entrada para la predicción por lotes.
+
+    Cada pasajero se valida por separado contra `PassengerInput`, de modo que una
+    fila inválida no impide puntuar el resto del lote.
+    """
+
+    passengers: List[Dict[str, Any]] = Field(..., min_length=1, max_length=10000, description="Lista de pasajeros con el esquema PassengerInput")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "passengers": [
+                    PassengerInput.model_config["json_schema_extra"]["example"],
+                ]
+            }
+        }
+
+
+class BatchPredictionItem(BaseModel):
+    """
+    Resultado de una fila del lote: la predicción o el error de validación.
+    """
+
+    index: int = Field(..., description="Posición del pasajero en el lote de entrada")
+    prediction: Optional[PredictionOutput] = Field(None, description="Predicción, si la fila es válida")
+    error: Optional[str] = Field(None, description="Motivo por el que la fila no pudo puntuarse")
+
+
+class BatchPredictionOutput(BaseModel):
+    """
+    Esquema de salida de la predicción por lotes, en el mismo orden que la entrada.
+    """
+
+    total: int = Field(..., description="Cantidad de pasajeros recibidos")
+    succeeded: int = Field(..., description="Cantidad de pasajeros puntuados")
+    failed: int = Field(..., description="Cantidad de pasajeros con errores de validación")
+    results: List[BatchPredictionItem] = Field(..., description="Resultado por pasajero")
+
+
+class RawBatchPredictionInput(BaseModel):
+    """
+    Esquema de entrada para la predicción por lotes con campos crudos.
+
+    Igual que `BatchPredictionInput`, cada fila se valida por separado.
+    """
+
+    passengers: List[Dict[str, Any]] = Field(..., min_length=1, max_length=10000, description="Lista de pasajeros con el esquema RawPassengerInput")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "passengers": [
+                    RawPassengerInput.model_config["json_schema_extra"]["example"],
+                ]
+            }
+        }
+
+
+class SweepAxis(BaseModel):
+    """
+    Campo a variar en una barrida y sus valores.
+    """
+
+    field: str = Field(..., description="Campo de PassengerInput a variar, p. ej. 'Pclass' o 'Age_Cut'")
+    values: Optional[List[Any]] = Field(
+        None,
+        min_length=1,
+        description="Valores a probar; si se omite, todas las categorías del modelo (o todos los enteros válidos, p. ej. Pclass 1 a 3)",
+    )
+
+
+class SweepInput(BaseModel):
+    """
+    Pasajero base y uno o dos campos a variar. El servidor arma la grilla
+    cartesiana y la puntúa en una sola llamada al modelo.
+    """
+
+    passenger: PassengerInput = Field(..., description="Pasajero base; los campos barridos reemplazan sus valores")
+    axes: List[SweepAxis] = Field(..., min_length=1, max_length=2, description="Uno o dos campos a variar")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "passenger": PassengerInput.model_config["json_schema_extra"]["example"],
+                "axes": [{"field": "Pclass"}, {"field": "Age_Cut"}],
+            }
+        }
+
+
+class SweepOutput(BaseModel):
+    """
+    Probabilidades de sobrevivir sobre la grilla, en forma de matriz compacta.
+    """
+
+    fields: List[str] = Field(..., description="Campos barridos, en el orden de los ejes")
+    values: List[List[Any]] = Field(..., description="Valores de cada eje")
+    probability_survive: List[Any] = Field(
+        ..., description="Probabilidad de sobrevivir (%): lista por valor del primer eje; con dos ejes, una fila por valor del primero y una columna por valor del segundo"
+    )
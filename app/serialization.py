@@ -0,0 +1,199 @@
+# app/serialization.py
+"""
+Serialización de respuestas sin pasar por pydantic.
+
+- JSON (default): `orjson` si está instalado, si no el `json` de la stdlib en
+  modo compacto. Los resultados de lotes se arman como diccionarios simples,
+  así que no se construye ni se valida un modelo pydantic por fila.
+- Columnar, por negociación de contenido (header `Accept`): MessagePack
+  (`application/x-msgpack`, requiere `msgpack`) o Arrow IPC stream
+  (`application/vnd.apache.arrow.stream`, requiere `pyarrow`). Si la
+  biblioteca no está instalada se responde JSON.
+- `StaticPayload`: cuerpo JSON serializado una sola vez, servido con `ETag` y
+  respuesta 304 ante un `If-None-Match` que coincide.
+
+Las dependencias opcionales se instalan con `pip install orjson msgpack pyarrow`.
+"""
+import hashlib
+import itertools
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover
+    pa = None
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+ARROW = "application/vnd.apache.arrow.stream"
+
+# Alias aceptados en Accept -> formato
+_MEDIA_TYPES = {
+    "application/json": JSON,
+    "application/x-msgpack": MSGPACK,
+    "application/msgpack": MSGPACK,
+    "application/vnd.msgpack": MSGPACK,
+    "application/vnd.apache.arrow.stream": ARROW,
+}
+
+# Columnas de un lote de predicciones en los formatos columnares
+BATCH_COLUMNS = ("index", "survived", "probability_survive", "probability_die", "confidence_level", "exact", "error")
+
+# Las respuestas negociadas dependen de Accept (para caches intermedios)
+_VARY = {"Vary": "Accept"}
+
+# Formatos que se pueden producir en este entorno (JSON siempre)
+AVAILABLE = frozenset(
+    [JSON] + ([MSGPACK] if msgpack is not None else []) + ([ARROW] if pa is not None else [])
+)
+
+
+def dumps_json(obj: Any) -> bytes:
+    """JSON compacto en UTF-8."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """
+    Formato de respuesta según el header `Accept`: el de mayor `q` entre los
+    disponibles, o JSON si no se pidió ninguno que se pueda producir.
+    """
+    if not accept:
+        return JSON
+    best, best_q = JSON, -1.0
+    for item in accept.split(","):
+        media, _, params = item.strip().partition(";")
+        media_type = _MEDIA_TYPES.get(media.strip().lower())
+        if media_type is None or media_type not in AVAILABLE:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        # A igual q gana el primero de la lista
+        if q > best_q and q > 0:
+            best, best_q = media_type, q
+    return best
+
+
+def columnar_batch(total: int, results: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Resultados de un lote como una lista por columna (ver `BATCH_COLUMNS`)."""
+    columns: Dict[str, List[Any]] = {name: [] for name in BATCH_COLUMNS}
+    for item in results:
+        prediction = item["prediction"]
+        columns["index"].append(item["index"])
+        columns["error"].append(item["error"])
+        if prediction is None:
+            for name in BATCH_COLUMNS[1:-1]:
+                columns[name].append(None)
+        else:
+            for name in BATCH_COLUMNS[1:-1]:
+                columns[name].append(prediction[name])
+    succeeded = sum(1 for error in columns["error"] if error is None)
+    return {"total": total, "succeeded": succeeded, "failed": total - succeeded, "columns": columns}
+
+
+def _arrow_stream(columns: Dict[str, List[Any]], metadata: Dict[str, Any], types: Dict[str, Any]) -> bytes:
+    arrays = [pa.array(values, type=types.get(name)) for name, values in columns.items()]
+    schema_metadata = {key: json.dumps(value) for key, value in metadata.items()}
+    batch = pa.RecordBatch.from_arrays(arrays, names=list(columns)).replace_schema_metadata(schema_metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def batch_response(total: int, results: Sequence[Dict[str, Any]], media_type: str) -> Response:
+    """
+    Respuesta de un lote de predicciones en el formato negociado.
+
+    En JSON tiene la forma de `BatchPredictionOutput`. En MessagePack es
+    `{"total", "succeeded", "failed", "columns": {columna: [valores]}}`. En
+    Arrow es un record batch con las columnas de `BATCH_COLUMNS` y los totales
+    en los metadatos del schema. Los formatos columnares no incluyen nombre,
+    mensaje ni explicación.
+    """
+    if media_type == JSON:
+        succeeded = sum(1 for item in results if item["prediction"] is not None)
+        body = {"total": total, "succeeded": succeeded, "failed": total - succeeded, "results": results}
+        return Response(dumps_json(body), media_type=JSON, headers=_VARY)
+
+    payload = columnar_batch(total, results)
+    if media_type == MSGPACK:
+        return Response(msgpack.packb(payload, use_bin_type=True), media_type=MSGPACK, headers=_VARY)
+
+    types = {
+        "index": pa.int32(),
+        "survived": pa.bool_(),
+        "probability_survive": pa.float64(),
+        "probability_die": pa.float64(),
+        "confidence_level": pa.string(),
+        "exact": pa.bool_(),
+        "error": pa.string(),
+    }
+    metadata = {key: payload[key] for key in ("total", "succeeded", "failed")}
+    return Response(_arrow_stream(payload["columns"], metadata, types), media_type=ARROW, headers=_VARY)
+
+
+def sweep_response(fields: List[str], values: List[List[Any]], matrix: Any, media_type: str) -> Response:
+    """
+    Respuesta de `/predict/sweep`. JSON y MessagePack llevan la matriz anidada
+    (forma de `SweepOutput`); Arrow la lleva en formato largo, una fila por
+    punto con una columna por campo barrido más `probability_survive`.
+    """
+    if media_type == ARROW:
+        points = list(itertools.product(*values))
+        columns = {field: [point[i] for point in points] for i, field in enumerate(fields)}
+        columns["probability_survive"] = matrix.reshape(-1).tolist()
+        return Response(_arrow_stream(columns, {"fields": fields}, {}), media_type=ARROW, headers=_VARY)
+
+    body = {"fields": fields, "values": values, "probability_survive": matrix.tolist()}
+    if media_type == MSGPACK:
+        return Response(msgpack.packb(body, use_bin_type=True), media_type=MSGPACK, headers=_VARY)
+    return Response(dumps_json(body), media_type=JSON, headers=_VARY)
+
+
+class StaticPayload:
+    """
+    Respuesta JSON que no cambia: se serializa una vez y se sirve como bytes,
+    con `ETag` (hash del contenido) y 304 si el cliente ya la tiene.
+    """
+
+    def __init__(self, content: Any, max_age: int = 0):
+        self.body = dumps_json(content)
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+        self.headers = {"ETag": self.etag, "Cache-Control": f"public, max-age={max_age}, must-revalidate"}
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # Comparación débil: W/"x" equivale a "x"
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return self.etag in tags
+
+    def response(self, request: Request) -> Response:
+        if self.not_modified(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers=self.headers)
+        return Response(self.body, media_type=JSON, headers=self.headers)
@@ -0,0 +1,286 @@
+# app/server.py
+"""
+Lanzador de producción con varios workers de uvicorn.
+
+El proceso principal:
+
+1. Limita los hilos de BLAS/OpenMP (`OMP_NUM_THREADS`, `OPENBLAS_NUM_THREADS`,
+   ...) antes de importar numpy, y los de inferencia de cada worker
+   (`INFERENCE_WORKERS`). Los `n_jobs` de los estimadores quedan en
+   `MODEL_N_JOBS` (ver `app.model.limit_n_jobs`). Así N workers usan N × hilos
+   CPUs y no N × núcleos cada uno.
+2. Carga el modelo una sola vez, lo calienta por los dos motores (bosque plano
+   y sklearn) y congela el heap (`gc.freeze`) para que el recolector no toque
+   sus páginas.
+3. Abre el socket y hace `fork` de los workers: todos heredan el modelo ya
+   cargado y lo comparten copy-on-write (los arrays del bosque plano, además,
+   vienen por mmap del page cache). Con `--cpu-affinity` cada worker se fija a
+   sus CPUs.
+4. Supervisa los workers: reemplaza los que mueren y, ante SIGTERM o SIGINT, los
+   detiene con un apagado ordenado de uvicorn.
+
+Cada worker es un proceso independiente: la recarga del modelo
+(`/admin/reload`, `MODEL_WATCH_INTERVAL`), la caché, el control de admisión y
+las métricas son por worker. Con `INFERENCE_BACKEND=process` cada worker
+levantaría su propio pool de procesos; lo habitual es `thread` o `inline`.
+
+Solo funciona en sistemas con `fork` (Linux, macOS); la afinidad de CPU, solo
+en Linux.
+
+Uso:
+    python -m app.server [--workers 4] [--threads 1] [--cpu-affinity auto] [--port 8000]
+
+La escala con la cantidad de workers se mide con `benchmarks/bench_workers.py`.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Set
+
+from app import config
+
+logger = logging.getLogger("app.server")
+
+# Variables que leen numpy/scipy (OpenBLAS, MKL, BLIS, Accelerate), OpenMP y numexpr al importarse
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "BLIS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+# Un worker que muere antes de esto se reemplaza con una pausa, para no entrar en un bucle de fork
+_MIN_UPTIME = 1.0
+
+
+def limit_threads(threads: int):
+    """
+    Limita los pools de hilos nativos a `threads` por proceso. Las variables
+    de entorno solo sirven antes de importar numpy: los workers las heredan
+    junto con las bibliotecas ya inicializadas.
+
+    El pool de inferencia de cada worker también queda en `threads`, salvo que
+    `INFERENCE_WORKERS` se haya fijado explícitamente. `app.config` ya leyó el
+    entorno al importarse, así que se ajusta el valor en el módulo.
+    """
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    if not os.getenv("INFERENCE_WORKERS"):
+        config.INFERENCE_WORKERS = threads
+
+
+def _limit_loaded_pools(threads: int):
+    # Las bibliotecas que no leen las variables de entorno se ajustan con
+    # threadpoolctl (viene con sklearn), una vez que están cargadas
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:  # pragma: no cover - depende del entorno
+        return
+    threadpool_limits(threads)
+
+
+def parse_cpus(spec: str) -> List[int]:
+    """CPUs de una lista como "0-3,6,8-9"."""
+    cpus: List[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def available_cpus() -> List[int]:
+    """CPUs en las que puede correr este proceso (respeta cgroups/taskset en Linux)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_affinity(spec: str, workers: int, threads: int) -> List[Optional[Set[int]]]:
+    """
+    CPUs de cada worker: con "auto", bloques consecutivos de `threads` CPUs
+    entre las disponibles; con una lista, bloques de esa lista. Si hay más
+    workers que bloques se reparten de forma circular. "none" no fija nada.
+    """
+    if spec == "none":
+        return [None] * workers
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("La afinidad de CPU no está disponible en esta plataforma; se ignora")
+        return [None] * workers
+    cpus = available_cpus() if spec == "auto" else parse_cpus(spec)
+    if not cpus:
+        raise ValueError(f"Lista de CPUs vacía: {spec!r}")
+    size = max(1, min(threads, len(cpus)))
+    blocks = [set(cpus[i : i + size]) for i in range(0, len(cpus) - size + 1, size)]
+    return [blocks[i % len(blocks)] for i in range(workers)]
+
+
+def preload(threads: int):
+    """Carga y calienta el modelo en el proceso principal, antes del fork."""
+    from app import model as model_module
+    from app.synthetic import synthetic_passengers
+
+    _limit_loaded_pools(threads)
+    start = time.perf_counter()
+    loaded = model_module.manager.load()
+    # Un lote por motor: el bosque plano hasta FLAT_ENGINE_MAX_ROWS filas y sklearn por encima
+    for rows in (1, config.FLAT_ENGINE_MAX_ROWS + 1):
+        model_module.predict_survival_records(synthetic_passengers(rows, seed=rows))
+    logger.info(
+        "Modelo %s cargado y calentado en %.2f s (bosque plano: %s, %d hilos por worker)",
+        loaded.version,
+        time.perf_counter() - start,
+        loaded.forest_source,
+        threads,
+    )
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """
+    Proceso principal: hace fork de los workers, los reemplaza si mueren y
+    los detiene con SIGTERM al recibir SIGTERM o SIGINT.
+    """
+
+    def __init__(self, sock: socket.socket, workers: int, affinity: Sequence[Optional[Set[int]]], uvicorn_options: Dict):
+        self.sock = sock
+        self.workers = workers
+        self.affinity = affinity
+        self.uvicorn_options = uvicorn_options
+        self.children: Dict[int, int] = {}  # pid -> número de worker
+        self.started: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self, index: int):
+        pid = os.fork()
+        if pid == 0:
+            self._run_worker(index)
+        self.children[pid] = index
+        self.started[pid] = time.monotonic()
+        cpus = self.affinity[index]
+        logger.info("Worker %d iniciado (pid %d%s)", index, pid, f", CPUs {sorted(cpus)}" if cpus else "")
+
+    def _run_worker(self, index: int):
+        # Proceso hijo: nunca vuelve al código del supervisor
+        status = 1
+        try:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            cpus = self.affinity[index]
+            if cpus:
+                os.sched_setaffinity(0, cpus)
+
+            import uvicorn
+
+            from app.main import app
+
+            server = uvicorn.Server(uvicorn.Config(app, **self.uvicorn_options))
+            server.run(sockets=[self.sock])
+            status = 0
+        except BaseException:
+            logger.exception("El worker %d terminó con error", index)
+        finally:
+            os._exit(status)
+
+    def stop(self, signum, frame):
+        if self.stopping:
+            return
+        self.stopping = True
+        logger.info("Deteniendo %d workers", len(self.children))
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for index in range(self.workers):
+            self.spawn(index)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = self.children.pop(pid, None)
+            uptime = time.monotonic() - self.started.pop(pid, time.monotonic())
+            if index is None or self.stopping:
+                continue
+            logger.warning(
+                "El worker %d (pid %d) terminó con código %d; se reemplaza", index, pid, os.waitstatus_to_exitcode(status)
+            )
+            if uptime < _MIN_UPTIME:
+                time.sleep(_MIN_UPTIME)
+            if not self.stopping:
+                self.spawn(index)
+        self.sock.close()
+        return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=config.env_int("PORT", 8000))
+    parser.add_argument(
+        "--workers", type=int, default=config.SERVER_WORKERS, help="Cantidad de workers (0: uno por CPU disponible)"
+    )
+    parser.add_argument(
+        "--threads", type=int, default=config.SERVER_THREADS, help="Hilos de BLAS/OpenMP e inferencia por worker"
+    )
+    parser.add_argument(
+        "--cpu-affinity", default=config.SERVER_CPU_AFFINITY, help='"none", "auto" o una lista de CPUs como "0-3,6"'
+    )
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(process)d] %(message)s")
+    if not hasattr(os, "fork"):
+        raise SystemExit("El lanzador multi-worker requiere fork; usá `python -m app.main` en esta plataforma")
+
+    threads = max(1, args.threads)
+    workers = args.workers or max(1, len(available_cpus()) // threads)
+    # Antes de cualquier import de numpy
+    limit_threads(threads)
+    affinity = plan_affinity(args.cpu_affinity, workers, threads)
+
+    if config.INFERENCE_BACKEND == "process":
+        logger.warning("INFERENCE_BACKEND=process: cada uno de los %d workers levanta su propio pool de procesos", workers)
+
+    preload(threads)
+    # La app se importa antes del fork para que también se comparta
+    import app.main  # noqa: F401
+
+    sock = bind_socket(args.host, args.port, args.backlog)
+    logger.info("Escuchando en %s:%d con %d workers", args.host, args.port, workers)
+
+    # Lo que ya está cargado no cambia: sacarlo del recolector evita copiar sus páginas en cada worker
+    gc.collect()
+    gc.freeze()
+
+    options = {"log_level": args.log_level, "lifespan": "on", "timeout_graceful_shutdown": 30}
+    return Supervisor(sock, workers, affinity, options).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
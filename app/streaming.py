@@ -0,0 +1,139 @@
+# app/streaming.py
+"""
+Parseo incremental de cuerpos NDJSON o CSV para la puntuación en streaming.
+
+Todo el pipeline son generadores asíncronos: los bytes se parten en líneas a
+medida que llegan, cada línea se convierte en un registro y los registros se
+agrupan en bloques de tamaño fijo. La memoria usada depende del tamaño del
+bloque, no del tamaño de la entrada.
+"""
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+# (posición del registro, diccionario o mensaje de error)
+Record = Tuple[int, Union[Dict[str, Any], str]]
+
+# Una línea más larga que esto se considera malformada en lugar de acumularse sin límite
+MAX_LINE_BYTES = 1 << 20
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Parte un flujo de bytes en líneas de texto, sin el salto de línea final.
+
+    Las líneas que superan `MAX_LINE_BYTES` se descartan y se emiten como None.
+    """
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        if b"\n" in chunk:
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if skipping:
+                    skipping = False
+                    continue
+                yield line.rstrip(b"\r").decode("utf-8", errors="replace")
+        if len(buffer) > MAX_LINE_BYTES:
+            buffer = b""
+            if not skipping:
+                skipping = True
+                yield None
+    if buffer and not skipping:
+        yield buffer.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Record]:
+    """Un registro por línea JSON no vacía; las líneas inválidas se informan como error."""
+    index = 0
+    async for line in lines:
+        if line is None:
+            yield index, f"Línea demasiado larga (más de {MAX_LINE_BYTES} bytes)"
+            index += 1
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield index, f"JSON inválido: {e.msg}"
+        else:
+            yield index, record if isinstance(record, dict) else "Se esperaba un objeto JSON"
+        index += 1
+
+
+async def iter_csv_records(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Record]:
+    """
+    Un registro por fila CSV, usando la primera fila como encabezado.
+
+    Los campos entre comillas pueden contener saltos de línea; las celdas
+    vacías se tratan como ausentes.
+    """
+    header: Optional[List[str]] = None
+    pending = ""
+    index = 0
+    async for line in lines:
+        if line is None:
+            pending = ""
+            yield index, f"Línea demasiado larga (más de {MAX_LINE_BYTES} bytes)"
+            index += 1
+            continue
+
+        # Un número impar de comillas indica un campo que sigue en la próxima línea
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield index, f"Se esperaban {len(header)} columnas, se recibieron {len(values)}"
+        else:
+            yield index, {name: value for name, value in zip(header, values) if value != ""}
+        index += 1
+
+    if pending:
+        yield index, "Comillas sin cerrar al final de la entrada"
+
+
+async def iter_chunks(records: AsyncIterator[Record], size: int) -> AsyncIterator[List[Record]]:
+    """Agrupa registros en bloques de como máximo `size` elementos."""
+    chunk: List[Record] = []
+    async for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    `StreamingResponse` que puede enviar la respuesta mientras todavía lee el
+    cuerpo de la solicitud.
+
+    Con servidores ASGI anteriores a la spec 2.4, `StreamingResponse` escucha
+    la desconexión del cliente llamando a `receive()` en paralelo, y esos
+    llamados consumen (y descartan) los mensajes del cuerpo que el generador
+    necesita. Aquí la desconexión se detecta al leer el cuerpo
+    (`ClientDisconnect`) o al fallar el envío.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,112 @@
+# app/synthetic.py
+"""
+Generador de pasajeros sintéticos dentro del espacio de entrada válido.
+
+Se usa para verificar los motores de inferencia y en los benchmarks: cada
+campo categórico toma valores de las categorías que conoce el modelo cargado y
+los numéricos respetan los rangos de `PassengerInput`.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.model import manager
+
+
+def _synthetic_columns(n: int, seed: Optional[int]) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    columns: Dict[str, Any] = {
+        "Pclass": rng.integers(1, 4, n),
+        # Códigos de edad y tarifa, como en el entrenamiento (ver `PassengerInput`)
+        "Age": rng.integers(0, 9, n).astype(float),
+        "Fare": rng.integers(0, 7, n).astype(float),
+        "Cabin_Assigned": rng.integers(0, 2, n),
+        "Name_Size": rng.integers(0, 8, n).astype(float),
+        "TicketNumberCounts": rng.integers(1, 12, n),
+    }
+    # Datos de prueba para scripts y benchmarks: cargar el modelo si todavía no está
+    for col, values in manager.load().categories.categories.items():
+        columns[col] = rng.choice(np.array(values, dtype=object), n)
+    return columns
+
+
+def synthetic_passengers(n: int, seed: Optional[int] = 0) -> List[Dict[str, Any]]:
+    """
+    Genera `n` pasajeros válidos según `PassengerInput`.
+
+    Args:
+        n (int): cantidad de pasajeros
+        seed (Optional[int]): semilla para que los datos sean reproducibles
+
+    Returns:
+        List[Dict[str, Any]]: un diccionario por pasajero
+    """
+    columns = {col: values.tolist() for col, values in _synthetic_columns(n, seed).items()}
+    return [
+        {"name": f"Pasajero {i}", **{col: values[i] for col, values in columns.items()}}
+        for i in range(n)
+    ]
+
+
+def synthetic_frame(n: int, seed: Optional[int] = 0) -> pd.DataFrame:
+    """Igual que `synthetic_passengers`, pero construido por columnas como DataFrame."""
+    columns = _synthetic_columns(n, seed)
+    return pd.DataFrame({"name": [f"Pasajero {i}" for i in range(n)], **columns})
+
+
+# Prefijos de ticket con sus variantes de escritura, como aparecen en el dataset
+_TICKET_PREFIXES = ("PC", "C.A.", "A/5", "STON/O 2.", "SOTON/O.Q.", "W./C.", "SC/PARIS", "CA.", "A/4.", "S.O.C.")
+_GIVEN_NAMES = ("John", "William", "Mary", "Anna", "Charles", "Elizabeth", "James Henry", "Margaret Ellen")
+_SURNAMES = ("Smith", "Andersson", "Kelly", "Sage", "Goodwin", "Carter", "Williams", "Johnson", "Brown")
+
+
+def synthetic_raw_passengers(n: int, seed: Optional[int] = 0) -> List[Dict[str, Any]]:
+    """
+    Genera `n` pasajeros con los campos crudos de `RawPassengerInput`, con
+    distribuciones parecidas a las del dataset de entrenamiento (proporción de
+    clases y sexos, edades, tarifas por clase, familias y tickets), a diferencia
+    de `synthetic_passengers`, que sortea cada campo de manera uniforme.
+
+    Args:
+        n (int): cantidad de pasajeros
+        seed (Optional[int]): semilla para que los datos sean reproducibles
+
+    Returns:
+        List[Dict[str, Any]]: un diccionario por pasajero
+    """
+    rng = np.random.default_rng(seed)
+    pclass = rng.choice([1, 2, 3], n, p=[0.24, 0.21, 0.55])
+    female = rng.random(n) < np.select([pclass == 1, pclass == 2], [0.44, 0.41], 0.29)
+    age = np.clip(rng.normal(np.select([pclass == 1, pclass == 2], [38.0, 30.0], 25.0), 13.0), 0.42, 80.0)
+    age_missing = rng.random(n) < np.select([pclass == 1, pclass == 2], [0.14, 0.06], 0.28)
+    fare = np.round(rng.lognormal(np.log(np.select([pclass == 1, pclass == 2], [60.0, 14.0], 8.0)), 0.5), 4)
+    sibsp = rng.choice([0, 1, 2, 3, 4, 5, 8], n, p=[0.68, 0.235, 0.031, 0.018, 0.02, 0.006, 0.01])
+    parch = rng.choice([0, 1, 2, 3, 4, 5], n, p=[0.76, 0.132, 0.09, 0.006, 0.006, 0.006])
+    cabin = rng.random(n) < np.select([pclass == 1, pclass == 2], [0.81, 0.09], 0.02)
+    embarked = rng.choice(["S", "C", "Q"], n, p=[0.72, 0.19, 0.09])
+    married = rng.random(n) < 0.45
+    prefixed = rng.random(n) < 0.26
+
+    passengers = []
+    for i in range(n):
+        if female[i]:
+            title = "Mrs" if married[i] and age[i] >= 18 else "Miss"
+        else:
+            title = "Master" if age[i] < 13 else "Mr"
+        number = str(rng.integers(1000, 400000))
+        passengers.append(
+            {
+                "Name": f"{rng.choice(_SURNAMES)}, {title}. {rng.choice(_GIVEN_NAMES)}",
+                "Pclass": int(pclass[i]),
+                "Sex": "female" if female[i] else "male",
+                "Age": None if age_missing[i] else round(float(age[i]), 1),
+                "Fare": float(fare[i]),
+                "SibSp": int(sibsp[i]),
+                "Parch": int(parch[i]),
+                "Ticket": f"{rng.choice(_TICKET_PREFIXES)} {number}" if prefixed[i] else number,
+                "Cabin": f"C{rng.integers(1, 130)}" if cabin[i] else None,
+                "Embarked": str(embarked[i]),
+            }
+        )
+    return passengers
@@ -0,0 +1,106 @@
+# benchmarks/bench_early_exit.py
+"""
+Mide la salida temprana del bosque plano (`FlatForest.predict_proba_early_exit`).
+
+Para cada tamaño de lote y modo ("class" y "confidence") informa cuántos
+árboles se evalúan en promedio por fila, qué fracción de las filas sale antes
+del último árbol y la latencia frente a `predict_proba` sobre la misma matriz
+ya codificada (y frente a sklearn, que es el motor de los lotes de más de
+`FLAT_ENGINE_MAX_ROWS` filas). También verifica que la clase (y en el modo "confidence" el
+nivel de confianza) coincide con el bosque completo y que las filas exactas dan
+los mismos bits.
+
+Por defecto los pasajeros tienen distribuciones parecidas a las del dataset
+(`synthetic_raw_passengers`, con las características derivadas en el servidor);
+`--data uniform` usa `synthetic_passengers`, que sortea cada campo de manera
+uniforme.
+
+Uso:
+    python -m benchmarks.bench_early_exit [--sizes 1 64 256 1024 4096] [--chunk-trees 25] [--repeat 20]
+
+El rango de tamaños de lote en el que la salida temprana es más rápida que el
+motor que se usaría sin ella es el que conviene configurar en
+`EARLY_EXIT_MIN_ROWS` y `EARLY_EXIT_MAX_ROWS`.
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+from app.forest import DEFAULT_CHUNK_TREES  # noqa: E402
+from app.model import EARLY_EXIT_CUTS, confidence_level, manager  # noqa: E402
+from app.synthetic import synthetic_passengers, synthetic_raw_passengers  # noqa: E402
+
+
+def _time_alternating(fns, repeat: int):
+    # Alternar las variantes reparte por igual el ruido de la máquina
+    for fn in fns:
+        fn()
+    samples = [[] for _ in fns]
+    for _ in range(repeat):
+        for fn, fn_samples in zip(fns, samples):
+            start = time.perf_counter()
+            fn()
+            fn_samples.append(time.perf_counter() - start)
+    return [np.median(fn_samples) for fn_samples in samples]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 64, 256, 1024, 4096])
+    parser.add_argument("--chunk-trees", type=int, default=DEFAULT_CHUNK_TREES)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--data", choices=("realistic", "uniform"), default="realistic")
+    args = parser.parse_args()
+
+    loaded = manager.load()
+    if loaded.encoder is None or loaded.forest is None:
+        raise SystemExit("La salida temprana requiere el codificador compilado y el motor flat")
+    forest = loaded.forest
+    sklearn_estimator = loaded.encoder.estimator
+
+    n = max(args.sizes)
+    if args.data == "realistic":
+        records = loaded.features.derive(synthetic_raw_passengers(n, seed=0))
+    else:
+        records = synthetic_passengers(n, seed=0)
+    X_all = loaded.encoder.transform(records)
+
+    print(f"Bosque: {forest.n_trees} árboles, tramos de {args.chunk_trees}, datos {args.data}\n")
+    print(
+        f"{'modo':>10} | {'lote':>6} | {'árboles/fila':>12} | {'filas antes':>11} | {'sklearn (ms)':>12} | "
+        f"{'completo (ms)':>13} | {'temprano (ms)':>13} | {'ahorro':>7} | verificación"
+    )
+    print("-" * 119)
+
+    for mode, cuts in EARLY_EXIT_CUTS.items():
+        for size in args.sizes:
+            X = X_all[:size]
+            exact = forest.predict_proba(X)
+            proba, trees = forest.predict_proba_early_exit(X, cuts, args.chunk_trees)
+
+            full_rows = trees == forest.n_trees
+            ok = np.array_equal(proba.argmax(axis=1), exact.argmax(axis=1))
+            ok &= np.array_equal(proba[full_rows], exact[full_rows])
+            if cuts:
+                ok &= [confidence_level(p) for p in proba.max(axis=1)] == [confidence_level(p) for p in exact.max(axis=1)]
+
+            sklearn_s, full_s, early_s = _time_alternating(
+                [
+                    lambda: sklearn_estimator.predict_proba(X),
+                    lambda: forest.predict_proba(X),
+                    lambda: forest.predict_proba_early_exit(X, cuts, args.chunk_trees),
+                ],
+                args.repeat,
+            )
+            print(
+                f"{mode:>10} | {size:>6} | {trees.mean():>12.1f} | {1 - full_rows.mean():>10.0%} | {sklearn_s * 1000:>12.3f} | "
+                f"{full_s * 1000:>13.3f} | {early_s * 1000:>13.3f} | {1 - early_s / full_s:>6.0%} | {'ok' if ok else 'DIFIERE'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
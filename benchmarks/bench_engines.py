@@ -0,0 +1,65 @@
+# benchmarks/bench_engines.py
+"""
+Compara el motor de sklearn con el bosque plano (`app/forest.py`).
+
+Para cada tamaño de lote verifica que ambos motores devuelven exactamente las
+mismas probabilidades y mide la latencia de `predict_proba` sobre la matriz
+ya codificada.
+
+Uso:
+    python -m benchmarks.bench_engines [--sizes 1 64 10000] [--repeat 20]
+
+El punto de cruce entre ambos motores es el que conviene usar en
+`FLAT_ENGINE_MAX_ROWS`.
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+from app.forest import FlatForest  # noqa: E402
+from app.model import encoder, model  # noqa: E402
+from app.synthetic import synthetic_passengers  # noqa: E402
+
+
+def _time(fn, X, repeat: int) -> np.ndarray:
+    fn(X)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        samples.append(time.perf_counter() - start)
+    return np.array(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 64, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if encoder is None:
+        raise SystemExit("El codificador compilado no está disponible para este modelo")
+
+    sklearn_estimator = encoder.estimator
+    flat = FlatForest(sklearn_estimator)
+    print(f"Modelo: {type(model).__name__}, {flat.n_trees} árboles, {len(flat.feature)} nodos, {flat.nbytes / 1024:.0f} KiB en arrays planos\n")
+    print(f"{'lote':>7} | {'sklearn p50 (ms)':>16} | {'flat p50 (ms)':>13} | {'speedup':>7} | {'filas/s flat':>12} | paridad")
+    print("-" * 80)
+
+    for size in args.sizes:
+        X = encoder.transform(synthetic_passengers(size, seed=size))
+        parity = np.array_equal(sklearn_estimator.predict_proba(X), flat.predict_proba(X))
+        base = np.median(_time(sklearn_estimator.predict_proba, X, args.repeat))
+        fast = np.median(_time(flat.predict_proba, X, args.repeat))
+        print(
+            f"{size:>7} | {base * 1000:>16.3f} | {fast * 1000:>13.3f} | {base / fast:>6.1f}x | "
+            f"{size / fast:>12.0f} | {'ok' if parity else 'DIFIERE'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
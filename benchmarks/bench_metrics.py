@@ -0,0 +1,75 @@
+# benchmarks/bench_metrics.py
+"""
+Mide el costo de la instrumentación de `app/metrics.py` por solicitud.
+
+Reproduce las operaciones que agrega una solicitud a `/predict` sin caché
+(middleware, etapas cache/inference/validate/encode/predict/summarize/response
+y framework, tamaño de lote) y las compara con las mismas llamadas con el
+registro deshabilitado.
+
+Uso:
+    python -m benchmarks.bench_metrics [--requests 200000]
+"""
+import argparse
+import asyncio
+import time
+
+from app.metrics import MetricsMiddleware, MetricsRegistry
+
+# Etapas que registra una solicitud a /predict que no está en caché
+PREDICT_STAGES = ("cache", "inference", "validate", "encode", "predict", "summarize", "response")
+
+
+def _instrumented_request(registry: MetricsRegistry):
+    # Un par de perf_counter y una observación por etapa, como en app.main y app.model
+    for stage in PREDICT_STAGES:
+        start = time.perf_counter()
+        registry.observe_stage(stage, time.perf_counter() - start)
+    registry.observe_batch(1)
+
+
+def _per_request(fn, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) / n
+
+
+async def _middleware_cost(registry: MetricsRegistry, n: int) -> float:
+    async def endpoint(scope, receive, send):
+        scope["state"]["handler_seconds"] = 0.0
+        await send({"type": "http.response.start", "status": 200})
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(endpoint, registry, paths=lambda: ["/predict"])
+    start = time.perf_counter()
+    for _ in range(n):
+        await middleware({"type": "http", "path": "/predict", "method": "POST", "state": {}}, None, send)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+
+    results = {}
+    for enabled in (False, True):
+        registry = MetricsRegistry(enabled=enabled)
+        stages = _per_request(lambda: _instrumented_request(registry), args.requests)
+        middleware = asyncio.run(_middleware_cost(registry, args.requests))
+        results[enabled] = (stages, middleware)
+
+    print(f"{'':>24} | {'deshabilitado (µs)':>18} | {'habilitado (µs)':>15} | {'costo (µs)':>10}")
+    print("-" * 78)
+    for label, i in (("etapas + lote", 0), ("middleware", 1)):
+        off, on = results[False][i] * 1e6, results[True][i] * 1e6
+        print(f"{label:>24} | {off:>18.2f} | {on:>15.2f} | {on - off:>10.2f}")
+    total = sum(results[True]) - sum(results[False])
+    print(f"\nCosto total por solicitud a /predict: {total * 1e6:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+# benchmarks/bench_workers.py
+"""
+Prueba de carga del lanzador multi-worker (`python -m app.server`).
+
+Para cada cantidad de workers levanta el servidor real en un puerto libre (con
+la caché de predicciones deshabilitada, así cada solicitud llega al modelo),
+espera a `/ready` y lo carga durante `--duration` segundos desde varios
+procesos cliente, cada uno con `--concurrency` conexiones. Informa el
+throughput, los percentiles de latencia, los errores (incluidos los 503 del
+control de admisión) y la escala respecto de un worker:
+`eficiencia = throughput(N) / (N × throughput(1))`.
+
+Los clientes compiten por CPU con el servidor: para medir la escala del
+servidor conviene que tengan sus propias CPUs (`--server-cpus 0-3
+--client-cpus 4-7`) y que cada solicitud tenga trabajo de modelo suficiente
+(`--rows`, filas por solicitud a `/predict/batch`; con 1 se usa `/predict`).
+En una máquina con menos CPUs que workers la eficiencia cae por debajo de
+1/N por construcción.
+
+Uso:
+    python -m benchmarks.bench_workers [--workers 1 2 4] [--threads 1] [--rows 32] [--duration 10] [-o resultados.json]
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import warnings
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+from app.server import parse_cpus  # noqa: E402
+from app.synthetic import synthetic_passengers  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workers: int, threads: int, cpus: str, env: Dict[str, str]) -> subprocess.Popen:
+    command = [
+        sys.executable, "-m", "app.server",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--threads", str(threads),
+        "--cpu-affinity", cpus, "--log-level", "warning",
+    ]  # fmt: skip
+    return subprocess.Popen(command, env=env)
+
+
+def wait_ready(port: int, process: subprocess.Popen, timeout: float = 120.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"El servidor terminó con código {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/ready", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"El servidor no estuvo listo en {timeout:.0f} s")
+
+
+def stop_server(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _pin_client(cpus: Optional[List[int]]):
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+
+def run_client(port: int, rows: int, concurrency: int, warmup: float, duration: float, seed: int) -> Dict[str, Any]:
+    """Un proceso cliente: `concurrency` conexiones en un event loop durante `warmup + duration` segundos."""
+    return asyncio.run(_client(port, rows, concurrency, warmup, duration, seed))
+
+
+async def _client(port: int, rows: int, concurrency: int, warmup: float, duration: float, seed: int) -> Dict[str, Any]:
+    import httpx
+
+    passengers = synthetic_passengers(max(rows, 1) * 64, seed=seed)
+    if rows == 1:
+        path, payloads = "/predict", passengers
+    else:
+        path = "/predict/batch"
+        payloads = [{"passengers": passengers[i : i + rows]} for i in range(0, len(passengers), rows)]
+
+    latencies: List[float] = []
+    errors = 0
+    measure_from = time.perf_counter() + warmup
+    until = measure_from + duration
+
+    async def worker(client, offset: int):
+        nonlocal errors
+        i = offset
+        while True:
+            start = time.perf_counter()
+            if start >= until:
+                return
+            response = await client.post(path, json=payloads[i % len(payloads)])
+            i += 1
+            if start >= measure_from:
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30.0) as client:
+        await asyncio.gather(*[worker(client, offset) for offset in range(concurrency)])
+    return {"latencies": latencies, "errors": errors}
+
+
+def measure(port: int, args) -> Dict[str, Any]:
+    client_cpus = parse_cpus(args.client_cpus) if args.client_cpus else None
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.clients, initializer=_pin_client, initargs=(client_cpus,)) as pool:
+        parts = pool.starmap(
+            run_client,
+            [(port, args.rows, args.concurrency, args.warmup, args.duration, seed) for seed in range(args.clients)],
+        )
+    latencies = np.concatenate([part["latencies"] for part in parts]) * 1000.0
+    requests = len(latencies)
+    return {
+        "requests": requests,
+        "errors": sum(part["errors"] for part in parts),
+        "throughput_rps": requests / args.duration,
+        "rows_per_s": requests * args.rows / args.duration,
+        "p50_ms": float(np.percentile(latencies, 50)) if requests else 0.0,
+        "p99_ms": float(np.percentile(latencies, 99)) if requests else 0.0,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=1, help="Hilos por worker (--threads de app.server)")
+    parser.add_argument("--rows", type=int, default=32, help="Filas por solicitud (1 usa /predict)")
+    parser.add_argument("--clients", type=int, default=2, help="Procesos cliente")
+    parser.add_argument("--concurrency", type=int, default=16, help="Conexiones por proceso cliente")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--server-cpus", default="auto", help='--cpu-affinity de app.server ("none", "auto" o "0-3")')
+    parser.add_argument("--client-cpus", default="", help='CPUs de los clientes, p. ej. "4-7"; vacío para no fijarlas')
+    parser.add_argument("-o", "--output", help="Guardar los resultados en JSON")
+    args = parser.parse_args(argv)
+
+    # Cada solicitud llega al modelo; el control de admisión queda con su configuración
+    env = {**os.environ, "PREDICTION_CACHE_SIZE": "0", "MODEL_WATCH_INTERVAL": "0"}
+
+    print(
+        f"{args.rows} filas por solicitud, {args.clients} clientes × {args.concurrency} conexiones, "
+        f"{args.duration:.0f} s por medición, {os.cpu_count()} CPUs\n"
+    )
+    print(f"{'workers':>7} | {'req/s':>9} | {'filas/s':>10} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | {'errores':>7} | {'escala':>6} | eficiencia")
+    print("-" * 92)
+
+    results: Dict[int, Dict[str, Any]] = {}
+    for workers in args.workers:
+        port = _free_port()
+        process = start_server(port, workers, args.threads, args.server_cpus, env)
+        try:
+            wait_ready(port, process)
+            result = measure(port, args)
+        finally:
+            stop_server(process)
+
+        base = results[min(results)] if results else result
+        base_workers = min(results) if results else workers
+        speedup = result["throughput_rps"] / base["throughput_rps"] if base["throughput_rps"] else 0.0
+        efficiency = speedup * base_workers / workers
+        result.update(workers=workers, speedup=speedup, efficiency=efficiency)
+        results[workers] = result
+        print(
+            f"{workers:>7} | {result['throughput_rps']:>9,.0f} | {result['rows_per_s']:>10,.0f} | {result['p50_ms']:>9.2f} | "
+            f"{result['p99_ms']:>9.2f} | {result['errors']:>7} | {speedup:>5.2f}x | {efficiency:>9.0%}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "cpu_count": os.cpu_count(), "results": list(results.values())}, f, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
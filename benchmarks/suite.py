@@ -0,0 +1,254 @@
+# benchmarks/suite.py
+"""
+Suite de benchmarks reproducible del servicio de predicción.
+
+Corre sin red: los microbenchmarks llaman directamente a `app.model` y la
+prueba de carga usa la app de FastAPI en proceso (cliente ASGI de httpx).
+
+- Microbenchmarks a varios tamaños de lote: `validate_categories`,
+  `invalid_category_records`, codificación (compilada y DataFrame),
+  `predict_survival` (una fila), `predict_survival_batch` y
+  `predict_survival_records`.
+- Carga: `/predict`, `/categories` y `/` con concurrencia configurable;
+  throughput y percentiles de latencia.
+
+Los resultados se guardan en JSON junto con las versiones de Python, numpy,
+pandas, sklearn y del modelo. `compare` marca como regresión toda medición que
+empeore más que el umbral respecto de una línea base guardada.
+
+Uso:
+    python -m benchmarks.suite run -o resultados.json [--sizes 1 64 1024] [--concurrency 1 16]
+    python -m benchmarks.suite compare base.json resultados.json [--threshold 0.10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Sequence
+
+import numpy as np
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+import pandas as pd  # noqa: E402
+import sklearn  # noqa: E402
+
+import app.model as model_module  # noqa: E402
+from app.synthetic import synthetic_passengers  # noqa: E402
+from benchmarks.timing import time_calls  # noqa: E402
+
+# Métrica principal de cada tipo de medición y si más alto es mejor
+PRIMARY_METRICS = {"micro": ("p50_ms", False), "load": ("throughput_rps", True)}
+LOAD_ENDPOINTS = ("/predict", "/categories", "/")
+
+
+def _percentiles(samples: Sequence[float]) -> Dict[str, float]:
+    ms = np.asarray(samples) * 1000.0
+    return {
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def run_micro(sizes: Sequence[int], repeat: int, min_seconds: float) -> Dict[str, Dict[str, Any]]:
+    """Microbenchmarks de `app.model` a cada tamaño de lote."""
+    loaded = model_module.manager.load()
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def record(name: str, rows: int, fn: Callable[[], Any]):
+        samples = time_calls(fn, repeat, min_seconds)
+        stats = _percentiles(samples)
+        stats.update(kind="micro", rows=rows, samples=len(samples), rows_per_s=rows / (stats["p50_ms"] / 1000.0))
+        results[name] = stats
+        print(f"  {name:<40} p50 {stats['p50_ms']:>9.3f} ms   {stats['rows_per_s']:>12,.0f} filas/s", file=sys.stderr)
+
+    single = pd.DataFrame(synthetic_passengers(1, seed=1))
+    record("predict_survival[1]", 1, lambda: model_module.predict_survival(single))
+
+    for size in sizes:
+        records = synthetic_passengers(size, seed=size)
+        frame = pd.DataFrame(records)
+        record(f"validate_categories[{size}]", size, lambda: model_module.validate_categories(frame))
+        record(f"invalid_category_records[{size}]", size, lambda: model_module.invalid_category_records(records))
+        record(f"dataframe_build[{size}]", size, lambda: pd.DataFrame(records))
+        if loaded.encoder is not None:
+            record(f"encode[{size}]", size, lambda: loaded.encoder.transform(records))
+        record(f"predict_survival_batch[{size}]", size, lambda: model_module.predict_survival_batch(frame))
+        record(f"predict_survival_records[{size}]", size, lambda: model_module.predict_survival_records(records))
+    return results
+
+
+async def _load_endpoint(client, method: str, path: str, payloads: List[Any], concurrency: int, requests: int):
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            if method == "POST":
+                response = await client.post(path, json=payloads[i % len(payloads)])
+            else:
+                response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+async def _run_load(concurrency_levels: Sequence[int], requests: int, use_cache: bool) -> Dict[str, Dict[str, Any]]:
+    import httpx
+
+    from app.main import app
+
+    results: Dict[str, Dict[str, Any]] = {}
+    # Pasajeros distintos para que /predict llegue al modelo salvo que se pida la caché
+    payloads = synthetic_passengers(max(requests, 1), seed=7)
+
+    async with app.router.lifespan_context(app):
+        await app.state.model_loading
+        if not use_cache:
+            app.state.cache = None
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for path in LOAD_ENDPOINTS:
+                method = "POST" if path == "/predict" else "GET"
+                # Calentamiento
+                await _load_endpoint(client, method, path, payloads, 1, 20)
+                for concurrency in concurrency_levels:
+                    latencies, errors, elapsed = await _load_endpoint(
+                        client, method, path, payloads, concurrency, requests
+                    )
+                    stats = _percentiles(latencies)
+                    stats.update(
+                        kind="load",
+                        requests=len(latencies),
+                        errors=errors,
+                        concurrency=concurrency,
+                        throughput_rps=len(latencies) / elapsed,
+                    )
+                    name = f"load {method} {path} c={concurrency}"
+                    results[name] = stats
+                    print(
+                        f"  {name:<40} {stats['throughput_rps']:>9,.0f} req/s   p50 {stats['p50_ms']:.2f} ms"
+                        f"   p99 {stats['p99_ms']:.2f} ms   errores {errors}",
+                        file=sys.stderr,
+                    )
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """Versiones y máquina, para saber si dos resultados son comparables."""
+    from app import config
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "model_version": model_module.manager.load().version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "inference_backend": config.INFERENCE_BACKEND,
+        "inference_engine": config.INFERENCE_ENGINE,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compara la métrica principal de cada medición presente en ambos archivos.
+
+    Returns:
+        List[Dict]: una fila por medición, con `regression=True` si empeoró más que `threshold`
+    """
+    rows = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        metric, higher_is_better = PRIMARY_METRICS[result["kind"]]
+        before, after = base[metric], result[metric]
+        if before == 0:
+            continue
+        change = (after - before) / before
+        worse = -change if higher_is_better else change
+        rows.append(
+            {"name": name, "metric": metric, "baseline": before, "current": after, "change": change, "regression": worse > threshold}
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Corre la suite y guarda los resultados en JSON")
+    run.add_argument("-o", "--output", default="benchmark_results.json")
+    run.add_argument("--sizes", type=int, nargs="+", default=[1, 64, 1024])
+    run.add_argument("--repeat", type=int, default=20, help="Muestras mínimas por microbenchmark")
+    run.add_argument("--min-seconds", type=float, default=0.5, help="Tiempo mínimo de medición por microbenchmark")
+    run.add_argument("--concurrency", type=int, nargs="+", default=[1, 16])
+    run.add_argument("--requests", type=int, default=500, help="Solicitudes por endpoint y nivel de concurrencia")
+    run.add_argument("--cache", action="store_true", help="Mantener la caché de predicciones durante la carga")
+    run.add_argument("--skip-micro", action="store_true")
+    run.add_argument("--skip-load", action="store_true")
+
+    cmp = sub.add_parser("compare", help="Compara resultados contra una línea base")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=0.10, help="Empeoramiento relativo tolerado (0.10 = 10%%)")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results: Dict[str, Dict[str, Any]] = {}
+        if not args.skip_micro:
+            print("Microbenchmarks:", file=sys.stderr)
+            results.update(run_micro(args.sizes, args.repeat, args.min_seconds))
+        if not args.skip_load:
+            print("Carga en proceso:", file=sys.stderr)
+            results.update(asyncio.run(_run_load(args.concurrency, args.requests, args.cache)))
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
+        print(f"Resultados guardados en {args.output}", file=sys.stderr)
+        return
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    for key in ("numpy", "pandas", "sklearn", "model_version", "platform"):
+        before, after = baseline["environment"].get(key), current["environment"].get(key)
+        if before != after:
+            print(f"Aviso: {key} cambió ({before} -> {after})")
+
+    rows = compare(baseline, current, args.threshold)
+    print(f"{'medición':<42} | {'métrica':<14} | {'base':>10} | {'actual':>10} | {'cambio':>8}")
+    print("-" * 96)
+    for row in rows:
+        flag = "  REGRESIÓN" if row["regression"] else ""
+        print(
+            f"{row['name']:<42} | {row['metric']:<14} | {row['baseline']:>10.3f} | {row['current']:>10.3f} | "
+            f"{row['change']:>+7.1%}{flag}"
+        )
+    regressions = [row for row in rows if row["regression"]]
+    print(f"\n{len(regressions)} regresiones de {len(rows)} mediciones (umbral {args.threshold:.0%})")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
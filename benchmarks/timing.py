@@ -0,0 +1,22 @@
+# benchmarks/timing.py
+"""
+Medición de tiempos compartida por los benchmarks y el perfil de artefactos
+(`models/ModelEval.py`).
+"""
+import time
+from typing import Any, Callable, List
+
+
+def time_calls(fn: Callable[[], Any], repeat: int, min_seconds: float) -> List[float]:
+    """
+    Segundos de cada llamada a `fn`, después de una llamada de calentamiento:
+    al menos `repeat` muestras y al menos `min_seconds` de medición.
+    """
+    fn()
+    samples = []
+    deadline = time.perf_counter() + min_seconds
+    while len(samples) < repeat or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
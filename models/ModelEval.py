@@ -1,157 +1,324 @@
-import joblib
-import pandas as pd
-import numpy as np
+# models/ModelEval.py
+"""
+Perfil de artefactos del modelo, para elegir qué desplegar con mediciones.
+
+Para cada artefacto `.pkl` candidato (y para el desplegado, que sirve de
+referencia) informa:
+
+- Tamaño del archivo, tiempo de `joblib.load` y memoria residente que agrega la
+  carga (RSS antes y después, y el pico del proceso).
+- Árboles: cantidad y distribución de profundidades, nodos y hojas. Se
+  recorren bosques, `GridSearchCV`, `Pipeline` y ensambles como `VotingClassifier`.
+- Latencia de `predict_proba` (p50/p95/p99) a cada tamaño de lote, con el
+  pipeline de sklearn sobre un DataFrame y con el camino que usa la API
+  (codificador compilado y bosque plano, ver `app.model.load_model`), si el
+  artefacto lo admite.
+- Coincidencia con el modelo desplegado sobre pasajeros sintéticos generados
+  del espacio de categorías válidas (`app.synthetic.synthetic_passengers`):
+  misma clase, mismo nivel de confianza y diferencia de probabilidades.
+
+Cada artefacto se mide en un proceso nuevo, así la carga y la memoria de uno no
+se mezclan con las del otro.
+
+Uso (desde la raíz del repositorio):
+    python -m models.ModelEval [candidato.pkl ...] [--baseline models/modelo_titanic_rfc.pkl]
+        [--sizes 1 10 100 1000 10000] [--samples 10000] [--min-seconds 0.5] [-o perfil.json]
+
+Sin candidatos, perfila solo el modelo desplegado.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
 from pathlib import Path
-import pprint
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+# Ni este proceso ni los de medición (que heredan el entorno) escriben o borran
+# la caché del bosque plano de la API. `app.config` lee el entorno al
+# importarse, así que tiene que ir antes de cualquier import de `app`
+os.environ["MODEL_CACHE_DIR"] = ""
+
+import joblib  # noqa: E402
+import pandas as pd  # noqa: E402
+import sklearn  # noqa: E402
+
+from app import config  # noqa: E402
+from benchmarks.timing import time_calls  # noqa: E402
+
+DEFAULT_SIZES = (1, 10, 100, 1000, 10000)
+QUANTILES = (50, 95, 99)
+
+
+def rss_bytes() -> Optional[int]:
+    """Memoria residente actual del proceso (solo Linux), o None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Pico de memoria residente del proceso, o None si no se puede medir."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo informa en KiB y macOS en bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def find_trees(estimator: Any) -> List[Any]:
+    """Árboles ajustados (`tree_`) de un estimador, atravesando envoltorios y ensambles."""
+    if hasattr(estimator, "tree_"):
+        return [estimator.tree_]
+    if hasattr(estimator, "best_estimator_"):
+        return find_trees(estimator.best_estimator_)
+    if hasattr(estimator, "steps"):
+        return find_trees(estimator.steps[-1][1])
+    trees: List[Any] = []
+    for child in np.ravel(getattr(estimator, "estimators_", [])):
+        trees.extend(find_trees(child))
+    return trees
+
+
+def _distribution(values: Sequence[float]) -> Dict[str, float]:
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "min": float(values.min()),
+        "p50": float(np.percentile(values, 50)),
+        "mean": float(values.mean()),
+        "p95": float(np.percentile(values, 95)),
+        "max": float(values.max()),
+        "total": float(values.sum()),
+    }
+
+
+def tree_stats(estimator: Any) -> Optional[Dict[str, Any]]:
+    """Cantidad de árboles y distribución de profundidad, nodos y hojas, o None si no hay árboles."""
+    trees = find_trees(estimator)
+    if not trees:
+        return None
+    return {
+        "trees": len(trees),
+        "depth": _distribution([t.max_depth for t in trees]),
+        "nodes": _distribution([t.node_count for t in trees]),
+        "leaves": _distribution([t.n_leaves for t in trees]),
+    }
+
+
+def _latency(fn: Callable[[], Any], repeat: int, min_seconds: float) -> Dict[str, float]:
+    samples = time_calls(fn, repeat, min_seconds)
+    ms = np.asarray(samples) * 1000.0
+    stats = {f"p{q}_ms": float(np.percentile(ms, q)) for q in QUANTILES}
+    stats["samples"] = len(samples)
+    return stats
+
+
+def _model_input(pipeline: Any, frame: pd.DataFrame) -> pd.DataFrame:
+    columns = getattr(pipeline, "feature_names_in_", None)
+    return frame if columns is None else frame[list(columns)]
 
-# Ruta específica para el proyecto TITANIC_API
-MODEL_PATH = Path("models") / "modelo_titanic_vc2.pkl"
 
-def analizar_modelo_titanic():
+def profile_artifact(
+    path: str, frame: pd.DataFrame, sizes: Sequence[int], repeat: int, min_seconds: float
+) -> Dict[str, Any]:
     """
-    Analiza específicamente el modelo del Titanic y muestra información
-    relevante para el desarrollo de la API.
+    Mide un artefacto. Corre en un proceso propio (ver `main`).
+
+    Returns:
+        Dict: mediciones del artefacto y sus probabilidades sobre `frame`
+            (o el error, si el artefacto no puede predecir esos datos)
     """
-    print(f"\n{'='*60}")
-    print(f"ANÁLISIS DEL MODELO TITANIC: {MODEL_PATH}")
-    print(f"{'='*60}\n")
-    
+    from app.model import artifact_version, load_model, predict_proba_records
+
+    path = Path(path)
+    report: Dict[str, Any] = {"path": str(path), "file_bytes": path.stat().st_size, "version": artifact_version(path)}
+
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    pipeline = joblib.load(path)
+    report["load_seconds"] = time.perf_counter() - start
+    rss_after = rss_bytes()
+    report["rss_load_bytes"] = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+    report["rss_bytes"] = rss_after
+    report["type"] = type(pipeline).__name__
+    report["tree_stats"] = tree_stats(pipeline)
+
+    try:
+        X = _model_input(pipeline, frame)
+        report["probabilities"] = pipeline.predict_proba(X)
+        report["classes"] = list(getattr(pipeline, "classes_", range(report["probabilities"].shape[1])))
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+        report["peak_rss_bytes"] = peak_rss_bytes()
+        return report
+
+    report["latency"] = {"pipeline": {}}
+    for size in sizes:
+        batch = X.iloc[:size]
+        report["latency"]["pipeline"][size] = _latency(lambda: pipeline.predict_proba(batch), repeat, min_seconds)
+
+    # El camino de la API: codificador compilado y bosque plano, si el artefacto los admite
     try:
-        # Cargar el modelo
-        print(f"Cargando modelo desde: {MODEL_PATH}")
-        modelo = joblib.load(MODEL_PATH)
-        print("✅ Modelo cargado exitosamente\n")
-        
-        # Información básica
-        print(f"Tipo de modelo: {type(modelo).__name__}")
-        
-        # Analizar estructura del VotingClassifier
-        if hasattr(modelo, 'estimators'):
-            print("\nEstimadores del VotingClassifier:")
-            for nombre, estimador in modelo.estimators:
-                print(f"  - {nombre}: {type(estimador).__name__}")
-                
-                # Si es un Pipeline, analizar sus pasos
-                if hasattr(estimador, 'steps'):
-                    print(f"    Pasos del Pipeline {nombre}:")
-                    for i, (nombre_paso, paso) in enumerate(estimador.steps):
-                        print(f"      {i+1}. {nombre_paso}: {type(paso).__name__}")
-        
-        # Intentar determinar las columnas y características esperadas
-        print("\nAnalizando características esperadas...")
-        
-        # Crear un pequeño DataFrame de prueba con datos similares a la petición de Postman
-        test_data = pd.DataFrame({
-            "name": ["Test Person"],
-            "Pclass": [1],
-            "Sex": ["male"],
-            "Age": [30],
-            "SibSp": [1],
-            "Parch": [0],
-            "Fare": [71.3],
-            "Embarked": ["S"],
-            "Cabin_Assigned": [0],
-            "Name_Size": [10],
-            "TicketNumberCounts": [2],
-            "Family_Size_Grouped": ["Small"]
-        })
-        
-        print("\nEstructura de los datos de prueba:")
-        print(f"Columnas: {test_data.columns.tolist()}")
-        print(f"Número de características: {test_data.shape[1]}")
-        
-        # Intentar hacer una predicción para ver qué error obtenemos
-        print("\nIntentando predicción con datos de prueba...")
-        try:
-            prediction = modelo.predict(test_data)
-            print("✅ Predicción exitosa")
-            print(f"Resultado: {prediction}")
-        except Exception as e:
-            print(f"❌ Error en la predicción: {str(e)}")
-            
-            # Si hay error por número de características, intentar determinar cuántas espera
-            if "features" in str(e) and "expecting" in str(e):
-                error_msg = str(e)
-                import re
-                match = re.search(r'(\d+) features, but .+ is expecting (\d+)', error_msg)
-                if match:
-                    enviadas, esperadas = match.groups()
-                    print(f"\nEnviaste {enviadas} características, pero el modelo espera {esperadas}")
-                    print("Necesitamos reconciliar esta diferencia.")
-            
-            # Probar añadiendo Family_Size
-            print("\nProbando con Family_Size = SibSp + Parch")
-            test_data['Family_Size'] = test_data['SibSp'] + test_data['Parch']
-            try:
-                prediction = modelo.predict(test_data)
-                print("✅ Predicción exitosa al añadir Family_Size")
-                print(f"Resultado: {prediction}")
-            except Exception as e:
-                print(f"❌ Sigue fallando: {str(e)}")
-        
-        # Probar con varias combinaciones de columnas
-        print("\nProbando combinaciones de columnas comunes...")
-        column_sets = [
-            ['Pclass', 'Sex', 'Age', 'Fare', 'Embarked', 'Family_Size_Grouped', 
-             'Cabin_Assigned', 'Name_Size', 'TicketNumberCounts', 'Family_Size'],
-            
-            ['Pclass', 'Sex', 'Age', 'SibSp', 'Parch', 'Fare', 'Embarked', 
-             'Family_Size_Grouped', 'Cabin_Assigned', 'Name_Size', 'TicketNumberCounts'],
-            
-            ['Pclass', 'Sex', 'Age', 'Fare', 'Embarked', 'Family_Size_Grouped', 
-             'Family_Size', 'Cabin_Assigned', 'Name_Size', 'TicketNumberCounts', 'Title'],
-        ]
-        
-        for i, cols in enumerate(column_sets):
-            # Verificar qué columnas del conjunto están en nuestros datos de prueba
-            missing = [col for col in cols if col not in test_data.columns]
-            if missing:
-                print(f"\nConjunto {i+1}: Faltan columnas: {missing}")
-                continue
-                
-            test_subset = test_data[cols]
-            print(f"\nProbando conjunto {i+1} con columnas: {cols}")
-            try:
-                prediction = modelo.predict(test_subset)
-                print(f"✅ ¡ÉXITO! El modelo funciona con este conjunto de {len(cols)} columnas")
-                print(f"Columnas: {cols}")
-                break
-            except Exception as e:
-                print(f"❌ Error: {str(e)}")
-        
-        # Verificar la generación de probabilidades
-        print("\nProbando generación de probabilidades...")
-        try:
-            if hasattr(modelo, 'predict_proba'):
-                proba = modelo.predict_proba(test_subset)
-                print("✅ predict_proba disponible y funciona")
-                print(f"Probabilidades: {proba}")
-            else:
-                print("❌ El modelo no tiene método predict_proba")
-                
-                # Probar con el método de votos
-                print("\nProbando cálculo manual de probabilidades mediante votos...")
-                try:
-                    individual_preds = [est.predict(test_subset)[0] for _, est in modelo.estimators]
-                    votes = sum(individual_preds)
-                    probability = float(votes / len(modelo.estimators))
-                    print("✅ Cálculo por votos funciona")
-                    print(f"Votos positivos: {votes}/{len(modelo.estimators)}")
-                    print(f"Probabilidad: {probability}")
-                except Exception as e:
-                    print(f"❌ Error calculando por votos: {str(e)}")
-        except Exception as e:
-            print(f"Error probando probabilidades: {str(e)}")
-        
-        # Recomendaciones finales
-        print(f"\n{'='*30} RECOMENDACIONES {'='*30}")
-        print("1. Asegúrate de incluir la columna 'Family_Size' = SibSp + Parch")
-        print("2. Usa exactamente las columnas en el mismo orden que funcionaron en las pruebas")
-        print("3. Si las probabilidades siempre son 0 o 1, usa el método de votos implementado aquí")
-        print("4. Considera entrenar un nuevo modelo que incluya el pipeline completo")
-        
+        loaded = load_model(path, report["version"])
     except Exception as e:
-        print(f"❌ ERROR CRÍTICO: {str(e)}")
+        report["api_error"] = f"{type(e).__name__}: {e}"
+    else:
+        report["api_engines"] = {
+            "encoder": loaded.encoder is not None,
+            "forest": loaded.forest is not None,
+            "warmup_seconds": loaded.warmup_seconds,
+        }
+        if loaded.encoder is not None:
+            records = frame.to_dict("records")
+            report["latency"]["api"] = {
+                size: _latency(lambda: predict_proba_records(records[:size], loaded), repeat, min_seconds)
+                for size in sizes
+            }
+    report["peak_rss_bytes"] = peak_rss_bytes()
+    return report
+
+
+def agreement(candidate: Dict[str, Any], baseline: Dict[str, Any]) -> Optional[Dict[str, float]]:
+    """Coincidencia de clase, nivel de confianza y probabilidad de sobrevivir con la referencia."""
+    from app.model import confidence_level
+
+    if "probabilities" not in candidate or "probabilities" not in baseline:
+        return None
+    ours, theirs = candidate["probabilities"], baseline["probabilities"]
+    survive = [c == 1 for c in candidate["classes"]].index(True), [c == 1 for c in baseline["classes"]].index(True)
+    diff = np.abs(ours[:, survive[0]] - theirs[:, survive[1]])
+    same_class = np.asarray(candidate["classes"])[ours.argmax(axis=1)] == np.asarray(baseline["classes"])[theirs.argmax(axis=1)]
+    same_confidence = [confidence_level(a) == confidence_level(b) for a, b in zip(ours.max(axis=1), theirs.max(axis=1))]
+    return {
+        "class": float(same_class.mean()),
+        "confidence_level": float(np.mean(same_confidence)),
+        "probability_mean_abs_diff": float(diff.mean()),
+        "probability_max_abs_diff": float(diff.max()),
+    }
+
+
+def _mib(value: Optional[float]) -> str:
+    return "n/d" if value is None else f"{value / 2**20:.1f} MiB"
+
+
+def print_report(report: Dict[str, Any], sizes: Sequence[int]):
+    print(f"\n{'=' * 72}\n{report['path']}  ({report['type']}, versión {report['version']})\n{'=' * 72}")
+    print(f"Archivo: {_mib(report['file_bytes'])}   carga: {report['load_seconds'] * 1000:.0f} ms")
+    print(
+        f"Memoria: +{_mib(report['rss_load_bytes'])} al cargar, {_mib(report['rss_bytes'])} residente, "
+        f"pico {_mib(report['peak_rss_bytes'])}"
+    )
+
+    stats = report["tree_stats"]
+    if stats is None:
+        print("Árboles: el modelo no contiene árboles de decisión")
+    else:
+        print(f"Árboles: {stats['trees']}")
+        for name in ("depth", "nodes", "leaves"):
+            d = stats[name]
+            print(
+                f"  {name:<7} min {d['min']:>7.0f}  p50 {d['p50']:>7.0f}  media {d['mean']:>8.1f}  "
+                f"p95 {d['p95']:>7.0f}  max {d['max']:>7.0f}  total {d['total']:>9.0f}"
+            )
+
+    if "error" in report:
+        print(f"No puede predecir los pasajeros sintéticos: {report['error']}")
+        return
+
+    engines = report.get("api_engines")
+    if engines is not None:
+        print(
+            f"API: codificador compilado {'sí' if engines['encoder'] else 'no'}, bosque plano "
+            f"{'sí' if engines['forest'] else 'no'}, preparación {engines['warmup_seconds'] * 1000:.0f} ms"
+        )
+    else:
+        print(f"API: no se pudo preparar ({report.get('api_error')})")
+
+    print(f"\n  {'motor':<9} | {'lote':>6} | {'p50 (ms)':>9} | {'p95 (ms)':>9} | {'p99 (ms)':>9} | {'filas/s (p50)':>13}")
+    print("  " + "-" * 68)
+    for engine, by_size in report["latency"].items():
+        for size in sizes:
+            s = by_size[size]
+            print(
+                f"  {engine:<9} | {size:>6} | {s['p50_ms']:>9.3f} | {s['p95_ms']:>9.3f} | {s['p99_ms']:>9.3f} | "
+                f"{size / (s['p50_ms'] / 1000.0):>13.0f}"
+            )
+
+    match = report.get("agreement")
+    if match is not None:
+        print(
+            f"\nCoincidencia con el desplegado: clase {match['class']:.2%}, nivel de confianza "
+            f"{match['confidence_level']:.2%}, |Δ prob. sobrevivir| media {match['probability_mean_abs_diff'] * 100:.2f} pp, "
+            f"máx. {match['probability_max_abs_diff'] * 100:.2f} pp"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("candidates", nargs="*", type=Path, help="artefactos .pkl a comparar")
+    parser.add_argument("--baseline", type=Path, default=config.MODEL_PATH, help="artefacto desplegado")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--samples", type=int, default=10000, help="pasajeros sintéticos para la coincidencia")
+    parser.add_argument("--repeat", type=int, default=5, help="mínimo de mediciones por tamaño de lote")
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="tiempo mínimo de medición por tamaño de lote")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=Path, help="guarda el informe en JSON")
+    args = parser.parse_args()
+
+    from app.synthetic import synthetic_frame
+
+    samples = max(args.samples, max(args.sizes))
+    frame = synthetic_frame(samples, seed=args.seed)
+
+    paths = [args.baseline] + [p for p in args.candidates if p.resolve() != args.baseline.resolve()]
+    missing = [str(p) for p in paths if not p.exists()]
+    if missing:
+        raise SystemExit(f"No existen: {', '.join(missing)}")
+
+    reports = []
+    context = multiprocessing.get_context("spawn")
+    for path in paths:
+        print(f"Midiendo {path} ...", file=sys.stderr)
+        with context.Pool(1) as pool:
+            reports.append(
+                pool.apply(profile_artifact, (str(path), frame, args.sizes, args.repeat, args.min_seconds))
+            )
+
+    baseline = reports[0]
+    for report in reports:
+        report["agreement"] = agreement(report, baseline)
+        print_report(report, args.sizes)
+
+    if args.output:
+        result = {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "pandas": pd.__version__,
+                "sklearn": sklearn.__version__,
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+            },
+            "baseline": str(args.baseline),
+            "samples": samples,
+            "artifacts": [{k: v for k, v in r.items() if k not in ("probabilities", "classes")} for r in reports],
+        }
+        args.output.write_text(json.dumps(result, indent=2, ensure_ascii=False))
+        print(f"\nInforme guardado en {args.output}")
+
 
 if __name__ == "__main__":
-    analizar_modelo_titanic()
\ No newline at end of file
+    main()
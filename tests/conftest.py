@@ -0,0 +1,32 @@
+# tests/conftest.py
+"""
+Fixtures compartidas: el modelo del repositorio se carga una sola vez por sesión.
+"""
+import warnings
+
+import pytest
+
+from app import config
+from app.model import manager
+
+# El artefacto se entrenó con otra versión de sklearn
+warnings.filterwarnings("ignore", category=UserWarning)
+
+
+@pytest.fixture(scope="session")
+def loaded():
+    """Modelo vigente (`LoadedModel`) con el codificador compilado y el bosque plano."""
+    if not config.MODEL_PATH.exists():
+        pytest.skip(f"No está el artefacto del modelo en {config.MODEL_PATH}")
+    return manager.load()
+
+
+@pytest.fixture(scope="module")
+def client(loaded):
+    """Cliente de la API con el ciclo de vida completo (backend de inferencia, caché, admisión)."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
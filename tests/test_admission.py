@@ -0,0 +1,216 @@
+# tests/test_admission.py
+"""
+Control de admisión (app/admission.py y la dependencia `admit`): cola llena y
+plazo vencido responden 503 con `Retry-After`, y una solicitud en cola cuyo
+cliente se va no llega al modelo.
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.admission import AdmissionController, Overloaded
+from app.main import app
+from app.synthetic import synthetic_passengers
+
+
+class BlockingExecutor:
+    """Backend de inferencia que retiene cada llamada hasta que se abre `gate`."""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.calls = 0
+
+    async def run(self, fn, *args):
+        self.calls += 1
+        await self.gate.wait()
+        return fn(*args)
+
+
+@pytest.fixture
+def passenger(loaded):
+    return synthetic_passengers(1, seed=0)[0]
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    """Instala en la app un control de admisión y un backend bloqueante; corre `scenario` en un event loop."""
+
+    def run(scenario, **limits):
+        async def main():
+            executor = BlockingExecutor()
+            admission = AdmissionController(**limits)
+            monkeypatch.setattr(app.state, "executor", executor)
+            monkeypatch.setattr(app.state, "admission", admission)
+            monkeypatch.setattr(app.state, "cache", None)
+            monkeypatch.setattr(app.state, "batcher", None)
+            monkeypatch.setattr(app.state, "prediction_log", None)
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await scenario(client, admission, executor)
+
+        return asyncio.run(main())
+
+    return run
+
+
+async def wait_until(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("la condición no se cumplió a tiempo")
+        await asyncio.sleep(0.001)
+
+
+def test_queue_full_is_503_with_retry_after(serve, passenger):
+    async def scenario(client, admission, executor):
+        running = asyncio.create_task(client.post("/predict", json=passenger))
+        await wait_until(lambda: admission.in_flight == 1 and executor.calls == 1)
+        queued = asyncio.create_task(client.post("/predict", json=passenger))
+        await wait_until(lambda: admission.queue_depth == 1)
+
+        rejected = await client.post("/predict", json=passenger)
+        assert rejected.status_code == 503
+        assert int(rejected.headers["Retry-After"]) >= 1
+        assert admission.shed["queue_full"] == 1
+
+        executor.gate.set()
+        assert [r.status_code for r in await asyncio.gather(running, queued)] == [200, 200]
+        assert executor.calls == 2
+        assert (admission.in_flight, admission.queue_depth) == (0, 0)
+
+    serve(scenario, max_in_flight=1, max_queue=1, queue_timeout=5.0)
+
+
+def test_deadline_is_503_with_retry_after(serve, passenger):
+    async def scenario(client, admission, executor):
+        running = asyncio.create_task(client.post("/predict", json=passenger))
+        await wait_until(lambda: executor.calls == 1)
+
+        expired = await client.post("/predict", json=passenger, headers={"X-Request-Timeout-Ms": "20"})
+        assert expired.status_code == 503
+        assert int(expired.headers["Retry-After"]) >= 1
+        assert admission.shed["deadline"] == 1
+        assert admission.queue_depth == 0
+
+        executor.gate.set()
+        assert (await running).status_code == 200
+        assert executor.calls == 1
+
+    serve(scenario, max_in_flight=1, max_queue=4, queue_timeout=5.0)
+
+
+def test_invalid_timeout_header_is_422(serve, passenger):
+    async def scenario(client, admission, executor):
+        response = await client.post("/predict", json=passenger, headers={"X-Request-Timeout-Ms": "pronto"})
+        assert response.status_code == 422
+
+    serve(scenario, max_in_flight=1, max_queue=4)
+
+
+def test_disconnected_client_leaves_the_queue(serve, passenger):
+    async def scenario(client, admission, executor):
+        running = asyncio.create_task(client.post("/predict", json=passenger))
+        await wait_until(lambda: executor.calls == 1)
+
+        # Solicitud ASGI directa: después del cuerpo, el cliente se desconecta cuando se abre `gone`
+        gone = asyncio.Event()
+        body = json.dumps(passenger).encode()
+        messages = [{"type": "http.request", "body": body, "more_body": False}]
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await gone.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/predict",
+            "raw_path": b"/predict",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+            "client": ("127.0.0.1", 1234),
+            "server": ("test", 80),
+        }
+        queued = asyncio.create_task(app(scope, receive, send))
+        await wait_until(lambda: admission.queue_depth == 1)
+        gone.set()
+        await queued
+
+        assert sent[0]["status"] == 499
+        assert admission.shed["disconnected"] == 1
+        assert admission.queue_depth == 0
+
+        executor.gate.set()
+        assert (await running).status_code == 200
+        # La solicitud que se fue nunca llegó al backend de inferencia
+        assert executor.calls == 1
+        assert admission.in_flight == 0
+
+    serve(scenario, max_in_flight=1, max_queue=4, queue_timeout=5.0)
+
+
+def test_release_hands_the_slot_over_in_order():
+    async def main():
+        admission = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=5.0)
+        assert await admission.acquire() == 0.0
+        order = []
+
+        async def waiter(name):
+            await admission.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(waiter(name)) for name in ("a", "b")]
+        await wait_until(lambda: admission.queue_depth == 2)
+        # Una llegada nueva no se adelanta a las que esperan
+        late = asyncio.create_task(waiter("late"))
+        await wait_until(lambda: admission.queue_depth == 3)
+
+        for _ in range(3):
+            admission.release(0.01)
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks, late)
+        assert order == ["a", "b", "late"]
+        assert admission.in_flight == 1
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_is_removed():
+    async def main():
+        admission = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=5.0)
+        await admission.acquire()
+        task = asyncio.create_task(admission.acquire())
+        await wait_until(lambda: admission.queue_depth == 1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert admission.queue_depth == 0
+        admission.release()
+        assert admission.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_zero_queue_rejects_immediately():
+    async def main():
+        admission = AdmissionController(max_in_flight=1, max_queue=0)
+        await admission.acquire()
+        with pytest.raises(Overloaded) as error:
+            await admission.acquire()
+        assert error.value.reason == "queue_full"
+        assert error.value.retry_after >= 1
+
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+# tests/test_batch.py
+"""
+`/predict/batch`: una fila inválida se informa en su posición sin afectar la
+predicción del resto del lote.
+"""
+import pytest
+
+from app.synthetic import synthetic_passengers
+
+
+@pytest.fixture(scope="module")
+def passengers(loaded):
+    return synthetic_passengers(5, seed=11)
+
+
+def test_valid_batch_matches_single_predictions(client, passengers):
+    response = client.post("/predict/batch", json={"passengers": passengers})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total"], body["succeeded"], body["failed"]) == (5, 5, 0)
+    for i, (item, passenger) in enumerate(zip(body["results"], passengers)):
+        assert item["index"] == i
+        assert item["error"] is None
+        single = client.post("/predict", json=passenger).json()
+        assert item["prediction"] == single
+
+
+def test_invalid_rows_are_reported_in_place(client, passengers):
+    missing = {k: v for k, v in passengers[1].items() if k != "Pclass"}
+    out_of_range = {**passengers[2], "Age": 34.5}
+    unknown = {**passengers[3], "Sex": "robot", "Embarked": "X"}
+    batch = [passengers[0], missing, out_of_range, unknown, passengers[4]]
+
+    response = client.post("/predict/batch", json={"passengers": batch})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["total"], body["succeeded"], body["failed"]) == (5, 2, 3)
+
+    results = body["results"]
+    assert [item["index"] for item in results] == [0, 1, 2, 3, 4]
+    assert [item["prediction"] is None for item in results] == [False, True, True, True, False]
+    assert results[1]["error"].startswith("Pclass:")
+    assert results[2]["error"].startswith("Age:")
+    assert "Sex" in results[3]["error"] and "Embarked" in results[3]["error"]
+
+    # Las filas válidas dan lo mismo que en un lote sin errores
+    clean = client.post("/predict/batch", json={"passengers": [passengers[0], passengers[4]]}).json()["results"]
+    assert results[0]["prediction"] == clean[0]["prediction"]
+    assert results[4]["prediction"] == clean[1]["prediction"]
+
+
+def test_all_rows_invalid(client, passengers):
+    response = client.post("/predict/batch", json={"passengers": [{"Sex": "male"}, {**passengers[0], "Pclass": 7}]})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (0, 2)
+    assert all(item["error"] for item in body["results"])
+
+
+@pytest.mark.parametrize("payload", [{"passengers": []}, {}, {"passengers": "no"}])
+def test_malformed_batch_is_422(client, payload):
+    assert client.post("/predict/batch", json=payload).status_code == 422
@@ -0,0 +1,112 @@
+# tests/test_batching.py
+"""
+Micro-batching (app/batching.py): cada llamador concurrente recibe la
+predicción de su propia fila, aunque se resuelvan en el mismo lote.
+"""
+import asyncio
+import random
+
+import pytest
+
+from app.batching import PredictionBatcher
+from app.executor import InferenceExecutor
+from app.model import predict_survival_records
+from app.synthetic import synthetic_passengers
+
+
+class RecordingExecutor(InferenceExecutor):
+    """Backend inline que guarda el tamaño de cada lote y cede el event loop antes de ejecutarlo."""
+
+    def __init__(self):
+        super().__init__("inline")
+        self.batches = []
+
+    async def run(self, fn, *args):
+        self.batches.append(len(args[0]))
+        await asyncio.sleep(random.random() / 1000)
+        return fn(*args)
+
+
+def run_batcher(scenario, **options):
+    async def main():
+        executor = RecordingExecutor()
+        batcher = PredictionBatcher(executor, **options)
+        await batcher.start()
+        try:
+            return await scenario(batcher, executor)
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture(scope="module")
+def passengers(loaded):
+    return synthetic_passengers(40, seed=21)
+
+
+def test_each_caller_gets_its_own_row(passengers):
+    expected, errores = predict_survival_records(passengers)
+    assert not errores
+
+    async def scenario(batcher, executor):
+        async def call(i):
+            # Llegadas desordenadas para que los lotes mezclen filas
+            await asyncio.sleep(random.random() / 500)
+            return i, await batcher.predict(passengers[i])
+
+        results = await asyncio.gather(*[call(i) for i in range(len(passengers))])
+        return dict(results), executor.batches
+
+    random.seed(0)
+    results, batches = run_batcher(scenario, max_batch_size=8, max_wait_ms=5.0)
+    assert [results[i] for i in range(len(passengers))] == expected
+    assert sum(batches) == len(passengers)
+    assert max(batches) <= 8
+    assert len(batches) < len(passengers), "las llamadas no se agruparon"
+
+
+def test_invalid_row_fails_only_its_caller(passengers):
+    invalid = {**passengers[1], "Sex": "robot"}
+
+    async def scenario(batcher, executor):
+        rows = [passengers[0], invalid, passengers[2]]
+        return await asyncio.gather(*[batcher.predict(row) for row in rows], return_exceptions=True)
+
+    first, error, third = run_batcher(scenario, max_batch_size=8, max_wait_ms=20.0)
+    assert isinstance(error, ValueError) and "Sex" in str(error)
+    assert first == predict_survival_records([passengers[0]])[0][0]
+    assert third == predict_survival_records([passengers[2]])[0][0]
+
+
+def test_cancelled_caller_does_not_affect_the_batch(passengers):
+    async def scenario(batcher, executor):
+        tasks = [asyncio.create_task(batcher.predict(p)) for p in passengers[:4]]
+        await asyncio.sleep(0)
+        tasks[1].cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return results, executor.batches
+
+    results, batches = run_batcher(scenario, max_batch_size=8, max_wait_ms=20.0)
+    assert isinstance(results[1], asyncio.CancelledError)
+    expected = predict_survival_records([passengers[i] for i in (0, 2, 3)])[0]
+    assert [results[i] for i in (0, 2, 3)] == expected
+    # La fila cancelada no llega al modelo
+    assert batches == [3]
+
+
+def test_full_batch_is_sent_without_waiting(passengers):
+    async def scenario(batcher, executor):
+        results = await asyncio.gather(*[batcher.predict(p) for p in passengers[:4]])
+        return results, batcher.stats()
+
+    # Con max_wait de 10 s, solo el tamaño máximo puede disparar el envío
+    results, stats = run_batcher(scenario, max_batch_size=4, max_wait_ms=10_000.0)
+    assert len(results) == 4
+    assert stats["flushes_by_size"] == 1
+
+
+def test_predict_before_start_fails():
+    batcher = PredictionBatcher(InferenceExecutor("inline"))
+    with pytest.raises(RuntimeError):
+        asyncio.run(batcher.predict({}))
@@ -0,0 +1,91 @@
+# tests/test_cache.py
+"""
+Caché de predicciones (app/cache.py): LRU acotada con TTL, y nunca devuelve
+una predicción de otra versión del modelo.
+"""
+import pytest
+
+from app import main
+from app.cache import PredictionCache
+from app.schemas import PassengerInput
+from app.synthetic import synthetic_passengers
+
+
+def test_version_change_invalidates_everything():
+    cache = PredictionCache(fields=["a"], max_size=10)
+    cache.put(("x",), "vieja", "v1")
+    cache.put(("y",), "vieja", "v1")
+    assert cache.get(("x",), "v1") == "vieja"
+
+    assert cache.get(("x",), "v2") is None
+    assert cache.get(("y",), "v2") is None
+    stats = cache.stats()
+    assert (stats["size"], stats["invalidations"], stats["model_version"]) == (0, 1, "v2")
+
+    # Volver a la versión anterior no recupera las entradas descartadas
+    assert cache.get(("x",), "v1") is None
+
+
+def test_lru_eviction():
+    cache = PredictionCache(fields=["a"], max_size=2)
+    cache.put(1, "uno", "v")
+    cache.put(2, "dos", "v")
+    assert cache.get(1, "v") == "uno"  # 2 pasa a ser la menos usada
+    cache.put(3, "tres", "v")
+    assert cache.get(2, "v") is None
+    assert (cache.get(1, "v"), cache.get(3, "v")) == ("uno", "tres")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(fields=["a"], max_size=10, ttl_seconds=5.0)
+    cache.put(1, "uno", "v")
+    now[0] += 4.9
+    assert cache.get(1, "v") == "uno"
+    now[0] += 0.2
+    assert cache.get(1, "v") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_key_ignores_name_and_rounds_floats():
+    cache = PredictionCache(fields=["Age", "Sex"], float_decimals=1)
+    assert cache.key({"name": "A", "Age": 3.04, "Sex": "male"}) == cache.key({"name": "B", "Age": 3.0, "Sex": "male"})
+    assert cache.key({"Age": 3.04, "Sex": "male"}) != cache.key({"Age": 3.1, "Sex": "male"})
+
+
+@pytest.fixture
+def cache(client, monkeypatch):
+    cache = PredictionCache(fields=[field for field in PassengerInput.model_fields if field != "name"], max_size=100)
+    monkeypatch.setattr(main.app.state, "cache", cache)
+    monkeypatch.setattr(main.app.state, "batcher", None)
+    return cache
+
+
+@pytest.mark.parametrize("path", ["/predict", "/predict/batch"])
+def test_model_version_change_skips_stale_predictions(client, loaded, cache, monkeypatch, path):
+    passenger = synthetic_passengers(1, seed=31)[0]
+    body = passenger if path == "/predict" else {"passengers": [passenger]}
+
+    def survive():
+        response = client.post(path, json=body)
+        assert response.status_code == 200
+        data = response.json()
+        return (data if path == "/predict" else data["results"][0]["prediction"])["probability_survive"]
+
+    real = survive()
+    assert survive() == real
+    assert cache.stats()["hits"] == 1
+
+    # Un valor envenenado bajo la versión vigente se sirve desde la caché...
+    key = cache.key(PassengerInput.model_validate(passenger))
+    cache.put(key, (1, 0.0, 1.0, "Muy Alta", True), loaded.version)
+    assert survive() == 100.0
+
+    # ...pero con otra versión del modelo la caché se vacía y vuelve a predecir
+    monkeypatch.setattr(loaded, "version", "otra-version")
+    assert survive() == real
+    stats = cache.stats()
+    assert stats["model_version"] == "otra-version"
+    assert stats["invalidations"] == 1
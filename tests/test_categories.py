@@ -0,0 +1,79 @@
+# tests/test_categories.py
+"""
+Validación de categorías en `PassengerInput` (app/schemas.py) contra la tabla
+del modelo vigente, y `/categories` con `ETag`.
+"""
+import pytest
+from pydantic import ValidationError
+
+from app import schemas
+from app.categories import LEGACY_CODES
+import app.main  # noqa: F401  (registra las categorías del modelo en PassengerInput)
+from app.schemas import PassengerInput
+from app.synthetic import synthetic_passengers
+
+
+@pytest.fixture
+def passenger(loaded):
+    return synthetic_passengers(1, seed=0)[0]
+
+
+def test_app_registers_model_categories(loaded):
+    # Sin fuente registrada el validador no rechaza nada: la API tiene que registrar la del modelo
+    assert schemas._category_source() is loaded.categories
+
+
+def test_unknown_category_is_rejected_at_parse_time(passenger):
+    with pytest.raises(ValidationError) as error:
+        PassengerInput.model_validate({**passenger, "Sex": "robot"})
+    [detail] = error.value.errors()
+    assert detail["loc"] == ("Sex",)
+    assert detail["type"] == "category"
+    assert detail["input"] == "robot"
+
+
+def test_one_error_per_invalid_field(passenger):
+    with pytest.raises(ValidationError) as error:
+        PassengerInput.model_validate({**passenger, "Sex": "robot", "Embarked": "X", "Title": "Rey"})
+    assert sorted(detail["loc"] for detail in error.value.errors()) == [("Embarked",), ("Sex",), ("Title",)]
+
+
+@pytest.mark.parametrize("field", sorted(LEGACY_CODES))
+def test_legacy_codes_are_accepted(passenger, field):
+    for code in LEGACY_CODES[field]:
+        assert getattr(PassengerInput.model_validate({**passenger, field: code}), field) == code
+
+
+def test_every_model_category_is_accepted(loaded, passenger):
+    for field, values in loaded.categories.categories.items():
+        for value in values:
+            PassengerInput.model_validate({**passenger, field: value})
+
+
+def test_predict_422_lists_each_invalid_field(client, passenger):
+    response = client.post("/predict", json={**passenger, "Sex": "robot", "Embarked": "X"})
+    assert response.status_code == 422
+    errors = {tuple(detail["loc"]): detail for detail in response.json()["detail"]}
+    assert set(errors) == {("body", "Sex"), ("body", "Embarked")}
+    assert errors[("body", "Sex")]["input"] == "robot"
+    assert "GET /categories" in errors[("body", "Sex")]["msg"]
+
+
+def test_categories_etag(client, loaded):
+    response = client.get("/categories")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    body = response.json()
+    assert body["model_categories"] == loaded.categories.categories
+    assert body["legacy_codes"] == LEGACY_CODES
+    assert set(LEGACY_CODES["Age_Cut"]) <= set(body["Age_Cut"])
+
+    for tag in (etag, f"W/{etag}", f'"otra", {etag}', "*"):
+        not_modified = client.get("/categories", headers={"If-None-Match": tag})
+        assert not_modified.status_code == 304, tag
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == etag
+
+    changed = client.get("/categories", headers={"If-None-Match": '"otra"'})
+    assert changed.status_code == 200
+    assert changed.json() == body
@@ -0,0 +1,71 @@
+# tests/test_encoder.py
+"""
+El codificador compilado (`FeatureEncoder`) debe reproducir bit a bit el
+`ColumnTransformer` del pipeline en todos sus caminos: por lista de
+registros, por fila y por DataFrame.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.encoder import FeatureEncoder
+from app.synthetic import synthetic_passengers
+
+UNKNOWN = "__categoria_desconocida__"
+
+
+@pytest.fixture(scope="module")
+def encoder(loaded) -> FeatureEncoder:
+    # Se compila de nuevo: el del modelo pudo haberse deshabilitado al no verificar
+    return FeatureEncoder(loaded.pipeline)
+
+
+def expected(encoder: FeatureEncoder, records) -> np.ndarray:
+    frame = pd.DataFrame([dict(r) for r in records])
+    return encoder.transformer.transform(frame[encoder.feature_names_in])
+
+
+def assert_all_paths_equal(encoder: FeatureEncoder, records):
+    reference = expected(encoder, records)
+    batch = encoder.transform(records)
+    single = np.vstack([encoder.transform([r]) for r in records])
+    frame = encoder.transform_frame(pd.DataFrame([dict(r) for r in records]))
+
+    assert batch.dtype == reference.dtype == np.float64
+    assert np.array_equal(batch, reference)
+    assert np.array_equal(single, reference)
+    assert np.array_equal(frame, reference)
+
+
+def categorical_fields(encoder: FeatureEncoder):
+    return [field for kind, field, *_ in encoder._specs if kind != "numeric"]
+
+
+def test_synthetic_rows(encoder):
+    assert_all_paths_equal(encoder, synthetic_passengers(500, seed=0))
+
+
+def test_probe_rows(encoder):
+    # Todas las categorías conocidas más una desconocida por columna
+    assert_all_paths_equal(encoder, encoder.probe_records())
+
+
+def test_unknown_category_rows(encoder):
+    records = synthetic_passengers(len(categorical_fields(encoder)) + 1, seed=1)
+    # Una columna desconocida por fila y una fila con todas desconocidas
+    for record, field in zip(records, categorical_fields(encoder)):
+        record[field] = UNKNOWN
+    for field in categorical_fields(encoder):
+        records[-1][field] = UNKNOWN
+    assert_all_paths_equal(encoder, records)
+
+
+def test_preallocated_output_is_reset(encoder):
+    records = synthetic_passengers(32, seed=2)
+    out = np.full((64, encoder.n_features_out), 7.0)
+    result = encoder.transform(records, out=out)
+    assert np.array_equal(result[:32], expected(encoder, records))
+
+
+def test_verify_accepts_pipeline(encoder):
+    assert encoder.verify(encoder.probe_records())
@@ -0,0 +1,44 @@
+# tests/test_explain.py
+"""
+`?explain=true` con un modelo que no puede explicarse responde 501 con el
+motivo, en lugar de un 500.
+"""
+import pytest
+
+from app import config
+from app.synthetic import synthetic_passengers, synthetic_raw_passengers
+
+ENDPOINTS = ["/predict", "/predict/batch", "/predict/raw", "/predict/raw/batch"]
+
+
+def payload(path: str):
+    if path.startswith("/predict/raw"):
+        passengers = synthetic_raw_passengers(3, seed=0)
+    else:
+        passengers = synthetic_passengers(3, seed=0)
+    return {"passengers": passengers} if path.endswith("/batch") else passengers[0]
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_explain_works_with_flat_engine(client, path):
+    response = client.post(path, params={"explain": "true"}, json=payload(path))
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_explain_with_sklearn_engine_is_501(client, monkeypatch, path):
+    monkeypatch.setattr(config, "INFERENCE_ENGINE", "sklearn")
+    response = client.post(path, params={"explain": "true"}, json=payload(path))
+    assert response.status_code == 501
+    assert "INFERENCE_ENGINE=flat" in response.json()["detail"]
+
+    # Sin explain el motor sklearn sigue prediciendo
+    assert client.post(path, json=payload(path)).status_code == 200
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_explain_without_verified_forest_is_501(client, loaded, monkeypatch, path):
+    monkeypatch.setattr(loaded, "forest", None)
+    response = client.post(path, params={"explain": "true"}, json=payload(path))
+    assert response.status_code == 501
+    assert "no reproducen" in response.json()["detail"]
@@ -0,0 +1,166 @@
+# tests/test_features.py
+"""
+Derivación de características de `/predict/raw` (app/features.py): debe
+producir los mismos valores que recibe `/predict`, con los que se entrenó el
+modelo.
+"""
+import pytest
+
+from app.schemas import PassengerInput, RawPassengerInput
+from app.synthetic import synthetic_raw_passengers
+
+
+def test_raw_example_derives_predict_example(loaded):
+    raw = RawPassengerInput.model_config["json_schema_extra"]["example"]
+    expected = PassengerInput.model_config["json_schema_extra"]["example"]
+    assert loaded.features.derive([raw]) == [expected]
+
+
+def test_raw_and_predict_examples_score_the_same(client):
+    raw = client.post("/predict/raw", json=RawPassengerInput.model_config["json_schema_extra"]["example"])
+    derived = client.post("/predict", json=PassengerInput.model_config["json_schema_extra"]["example"])
+    assert raw.status_code == derived.status_code == 200
+    assert raw.json()["probability_survive"] == derived.json()["probability_survive"]
+
+
+def test_predict_rejects_years_and_pounds(client):
+    passenger = dict(PassengerInput.model_config["json_schema_extra"]["example"], Age=34.5, Fare=7.8292)
+    response = client.post("/predict", json=passenger)
+    assert response.status_code == 422
+    assert {tuple(error["loc"][-1:]) for error in response.json()["detail"]} == {("Age",), ("Fare",)}
+
+
+def derive_one(loaded, **fields):
+    passenger = {"Name": "Kelly, Mr. James", "Pclass": 3, "Sex": "male", "Age": 30.0, "Fare": 10.0, **fields}
+    return loaded.features.derive([passenger])[0]
+
+
+@pytest.mark.parametrize(
+    "age, code, interval",
+    [
+        (0.2, 0.0, "(0.419, 17.0]"),
+        (16.0, 0.0, "(0.419, 17.0]"),
+        (16.5, 1.0, "(0.419, 17.0]"),
+        (20.125, 1.0, "(17.0, 22.0]"),
+        (34.5, 5.0, "(29.0, 35.0]"),
+        (80.0, 7.0, "(45.0, 80.0]"),
+        (85.0, 8.0, "(45.0, 80.0]"),
+    ],
+)
+def test_age_binning(loaded, age, code, interval):
+    record = derive_one(loaded, Age=age)
+    assert (record["Age"], record["Age_Cut"]) == (code, interval)
+
+
+@pytest.mark.parametrize(
+    "fare, code, interval",
+    [
+        (0.0, 0.0, "(-0.001, 7.775]"),
+        (7.775, 0.0, "(-0.001, 7.775]"),
+        (7.8292, 1.0, "(7.775, 8.662]"),
+        (26.0, 3.0, "(14.454, 26.0]"),
+        (512.329, 5.0, "(52.369, 512.329]"),
+        (600.0, 6.0, "(52.369, 512.329]"),
+    ],
+)
+def test_fare_binning(loaded, fare, code, interval):
+    record = derive_one(loaded, Fare=fare)
+    assert (record["Fare"], record["Fare_cut"]) == (code, interval)
+
+
+@pytest.mark.parametrize("length, size", [(12, 0), (18, 0), (19, 1), (23, 2), (24, 3), (30, 5), (38, 6), (39, 7), (90, 7)])
+def test_name_size_is_interval_position(loaded, length, size):
+    name = "Kelly, Mr. " + "J" * (length - len("Kelly, Mr. "))
+    record = derive_one(loaded, Name=name)
+    assert record["Name_Size"] == size
+    assert loaded.features.bins["Name_LengthGB"].labels[size] == record["Name_LengthGB"]
+
+
+@pytest.mark.parametrize(
+    "name, sex, age, title",
+    [
+        ("Kelly, Mr. James", "male", 30.0, "Mr"),
+        ("Palsson, Master. Gosta Leonard", "male", 2.0, "Master"),
+        ("Hewlett, Mrs. (Mary D Kingcome)", "female", 55.0, "married_women"),
+        ("Sandstrom, Mlle. Marguerite", "female", 4.0, "unmarried_women"),
+        ("Rothes, the Countess. of (Lucy Noel Martha Dyer-Edwards)", "female", 33.0, "nobility"),
+        ("Uruchurtu, Don. Manuel E", "male", 40.0, "nobility"),
+        ("Crosby, Capt. Edward Gifford", "male", 70.0, "military"),
+        ("Byles, Rev. Thomas Roussel Davids", "male", 42.0, "religious"),
+        # Sin coma: se busca el título entre las palabras
+        ("Mrs. Jane Smith", "female", 40.0, "married_women"),
+        # Sin título reconocible: por sexo y edad, nunca 'Mr' para una mujer
+        ("Jane Smith", "female", 40.0, "unmarried_women"),
+        ("Smith, Prof. Jane", "female", 40.0, "unmarried_women"),
+        ("John Smith", "male", 40.0, "Mr"),
+        ("Tommy Smith", "male", 6.0, "Master"),
+        ("Tommy Smith", "male", None, "Mr"),
+    ],
+)
+def test_title_extraction(loaded, name, sex, age, title):
+    assert derive_one(loaded, Name=name, Sex=sex, Age=age)["Title"] == title
+
+
+@pytest.mark.parametrize(
+    "ticket, location",
+    [
+        ("330911", "Blank"),
+        (None, "Blank"),
+        ("A/5 21171", "A/5"),
+        ("A./5. 3235", "A/5"),
+        ("PC 17599", "PC"),
+        ("SOTON/O.Q. 3101305", "SOTON/OQ"),
+        ("STON/O 2. 3101282", "STON/O2."),
+        ("C.A. 24579", "CA"),
+        ("S.C./PARIS 2079", "SC/Paris"),
+        ("W./C. 6608", "W/C"),
+    ],
+)
+def test_ticket_prefix(loaded, ticket, location):
+    assert derive_one(loaded, Ticket=ticket)["TicketLocation"] == location
+
+
+def test_unknown_ticket_prefix_takes_fill(loaded):
+    assert derive_one(loaded, Ticket="ZZZ 123")["TicketLocation"] == loaded.features.fills["TicketLocation"]
+
+
+def test_ticket_counts_within_batch(loaded):
+    passengers = [
+        {"Name": "Sage, Mr. John", "Pclass": 3, "Sex": "male", "Ticket": "CA. 2343"},
+        {"Name": "Sage, Miss. Ada", "Pclass": 3, "Sex": "female", "Ticket": "C.A. 2343"},
+        {"Name": "Sage, Master. Tom", "Pclass": 3, "Sex": "male", "Ticket": "2343"},
+        {"Name": "Kelly, Mr. James", "Pclass": 3, "Sex": "male", "Ticket": "330911"},
+        {"Name": "Smith, Mr. John", "Pclass": 3, "Sex": "male", "Ticket": None},
+        {"Name": "Brown, Mr. Tim", "Pclass": 3, "Sex": "male", "Ticket": "2343", "TicketNumberCounts": 2},
+    ]
+    counts = [record["TicketNumberCounts"] for record in loaded.features.derive(passengers)]
+    assert counts == [4, 4, 4, 1, 1, 2]
+
+
+def test_ticket_counts_are_capped(loaded):
+    passengers = [{"Name": "Sage, Mr. John", "Pclass": 3, "Sex": "male", "Ticket": "CA. 2343"}] * 15
+    records = loaded.features.derive(passengers)
+    assert {record["TicketNumberCounts"] for record in records} == {11}
+    PassengerInput.model_validate(records[0])
+
+
+def test_missing_values_take_pipeline_fills(loaded):
+    fills = loaded.features.fills
+    record = derive_one(loaded, Age=None, Fare=None, Embarked=None, Cabin=None, Ticket=None)
+    assert record["Age"] == fills["Age"]
+    assert record["Age_Cut"] == fills["Age_Cut"]
+    assert record["Fare"] == fills["Fare"]
+    assert record["Fare_cut"] == fills["Fare_cut"]
+    assert record["Embarked"] == fills["Embarked"]
+    assert record["Cabin_Assigned"] == 0
+    assert derive_one(loaded, Cabin="C85")["Cabin_Assigned"] == 1
+
+
+@pytest.mark.parametrize("sibsp, parch, group", [(0, 0, "Alone"), (1, 2, "Small"), (2, 2, "Medium"), (3, 3, "Large")])
+def test_family_groups(loaded, sibsp, parch, group):
+    assert derive_one(loaded, SibSp=sibsp, Parch=parch)["Family_Size_Grouped"] == group
+
+
+def test_derived_records_are_valid_passengers(loaded):
+    for record in loaded.features.derive(synthetic_raw_passengers(500, seed=0)):
+        PassengerInput.model_validate(record)
@@ -0,0 +1,107 @@
+# tests/test_forest.py
+"""
+El bosque plano (`FlatForest`) debe dar exactamente las probabilidades de
+sklearn, también al abrirse por mmap, y la salida temprana debe respetar la
+clase y el nivel de confianza del voto completo.
+"""
+import numpy as np
+import pytest
+
+from app import forest as forest_module
+from app.encoder import FeatureEncoder
+from app.forest import FlatForest, unwrap_forest
+from app.model import CONFIDENCE_CUTS, EARLY_EXIT_CUTS, model_path, save_forest
+from app.synthetic import synthetic_passengers
+
+
+@pytest.fixture(scope="module")
+def encoder(loaded) -> FeatureEncoder:
+    return FeatureEncoder(loaded.pipeline)
+
+
+@pytest.fixture(scope="module")
+def sklearn_forest(encoder):
+    return unwrap_forest(encoder.estimator)
+
+
+@pytest.fixture(scope="module")
+def flat(sklearn_forest) -> FlatForest:
+    return FlatForest(sklearn_forest)
+
+
+@pytest.fixture(scope="module")
+def X(encoder) -> np.ndarray:
+    """Pasajeros sintéticos codificados más filas con ruido sobre cada feature."""
+    encoded = encoder.transform(synthetic_passengers(400, seed=0))
+    rng = np.random.default_rng(0)
+    noisy = encoded + rng.normal(scale=encoded.std(axis=0) + 1e-3, size=encoded.shape)
+    return np.vstack([encoded, noisy])
+
+
+def edge_rows(sklearn_forest, X: np.ndarray, n_rows: int = 300) -> np.ndarray:
+    """
+    Filas con una feature exactamente en un umbral de algún árbol (redondeado
+    a float32) o en el float32 inmediatamente anterior o siguiente.
+    """
+    rng = np.random.default_rng(1)
+    splits = [
+        (feature, threshold)
+        for estimator in sklearn_forest.estimators_
+        for feature, threshold in zip(estimator.tree_.feature, estimator.tree_.threshold)
+        if feature >= 0
+    ]
+    rows = []
+    for i in rng.choice(len(splits), size=n_rows, replace=False):
+        feature, threshold = splits[i]
+        edge = np.float32(threshold)
+        for value in (edge, np.nextafter(edge, np.float32(-np.inf)), np.nextafter(edge, np.float32(np.inf))):
+            row = X[rng.integers(len(X))].copy()
+            row[feature] = value
+            rows.append(row)
+    return np.array(rows)
+
+
+def test_predict_proba_matches_sklearn(flat, sklearn_forest, X):
+    assert np.array_equal(flat.predict_proba(X), sklearn_forest.predict_proba(X))
+
+
+def test_predict_proba_matches_sklearn_on_thresholds(flat, sklearn_forest, X):
+    edges = edge_rows(sklearn_forest, X)
+    assert np.array_equal(flat.predict_proba(edges), sklearn_forest.predict_proba(edges))
+
+
+def test_single_rows_match_sklearn(flat, sklearn_forest, X):
+    for row in X[:20]:
+        assert np.array_equal(flat.predict_proba(row[None]), sklearn_forest.predict_proba(row[None]))
+
+
+def test_mmap_round_trip(flat, sklearn_forest, X, tmp_path):
+    path = tmp_path / f"{model_path.stem}-test.flat"
+    save_forest(flat, path)
+    loaded = FlatForest.load(path, mmap_mode="r")
+
+    assert isinstance(loaded.threshold, np.memmap)
+    assert isinstance(loaded.value, np.memmap)
+    assert loaded.n_trees == flat.n_trees
+    assert np.array_equal(loaded.classes_, flat.classes_)
+    assert np.array_equal(loaded.predict_proba(X), sklearn_forest.predict_proba(X))
+
+
+def _levels(proba: np.ndarray) -> np.ndarray:
+    return np.searchsorted(np.asarray(CONFIDENCE_CUTS), proba.max(axis=1), side="right")
+
+
+@pytest.mark.parametrize("margin", [0.0, forest_module._EXIT_MARGIN])
+@pytest.mark.parametrize("mode", sorted(EARLY_EXIT_CUTS))
+def test_early_exit_keeps_full_vote(flat, sklearn_forest, X, monkeypatch, mode, margin):
+    monkeypatch.setattr(forest_module, "_EXIT_MARGIN", margin)
+    X_all = np.vstack([X, edge_rows(sklearn_forest, X)])
+    full = flat.predict_proba(X_all)
+    proba, trees = flat.predict_proba_early_exit(X_all, EARLY_EXIT_CUTS[mode], chunk_trees=5)
+
+    assert (trees < flat.n_trees).any(), "ninguna fila salió antes"
+    assert np.array_equal(proba.argmax(axis=1), full.argmax(axis=1))
+    complete = trees == flat.n_trees
+    assert np.array_equal(proba[complete], full[complete])
+    if mode == "confidence":
+        assert np.array_equal(_levels(proba), _levels(full))
@@ -0,0 +1,31 @@
+# tests/test_model.py
+"""
+Funciones de app/model.py que no dependen del artefacto.
+"""
+import pytest
+
+from app.model import CONFIDENCE_CUTS, CONFIDENCE_LEVELS, confidence_level
+
+
+@pytest.mark.parametrize(
+    "max_prob, level",
+    [
+        (0.50, "Muy Baja"),
+        (0.5499, "Muy Baja"),
+        (0.55, "Baja"),
+        (0.5999, "Baja"),
+        (0.60, "Media"),
+        (0.6999, "Media"),
+        (0.70, "Alta"),
+        (0.8499, "Alta"),
+        (0.85, "Muy Alta"),
+        (1.0, "Muy Alta"),
+    ],
+)
+def test_confidence_level(max_prob, level):
+    assert confidence_level(max_prob) == level
+
+
+def test_every_confidence_level_is_reachable():
+    cuts = (0.5,) + CONFIDENCE_CUTS
+    assert [confidence_level(cut) for cut in cuts] == list(CONFIDENCE_LEVELS)
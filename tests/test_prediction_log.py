@@ -0,0 +1,136 @@
+# tests/test_prediction_log.py
+"""
+Registro de predicciones: las filas encoladas llegan a la base al vaciarse el
+buffer (por tamaño, por tiempo o al detenerse) y un buffer lleno descarta en
+lugar de frenar la predicción.
+"""
+import asyncio
+import json
+
+import pytest
+
+from app.prediction_log import PredictionLog
+from app.synthetic import synthetic_passengers
+
+sqlalchemy = pytest.importorskip("sqlalchemy")
+
+
+@pytest.fixture
+def url(tmp_path):
+    return f"sqlite:///{tmp_path / 'predicciones.db'}"
+
+
+def _record(log: PredictionLog, i: int, prob_survive: float = 0.8):
+    return log.record(
+        "/predict", {"Pclass": 1, "Age": float(i)}, prob_survive, 1.0 - prob_survive, "Alta", "v1", 2.5
+    )
+
+
+def _rows(url: str, table: str = "predictions"):
+    engine = sqlalchemy.create_engine(url)
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(sqlalchemy.text(f"SELECT * FROM {table} ORDER BY id"))
+            return [dict(row._mapping) for row in result]
+    finally:
+        engine.dispose()
+
+
+def test_stop_writes_every_buffered_row(url):
+    async def run():
+        log = PredictionLog(url, flush_rows=3, flush_seconds=60.0)
+        await log.start()
+        for i in range(7):
+            assert _record(log, i, prob_survive=0.3 if i == 0 else 0.8)
+        await log.stop()
+        return log
+
+    log = asyncio.run(run())
+    stats = log.stats()
+    assert (stats["buffered"], stats["written"], stats["dropped"], stats["failed"]) == (0, 7, 0, 0)
+
+    rows = _rows(url)
+    assert [json.loads(row["features"]) for row in rows] == [{"Pclass": 1, "Age": float(i)} for i in range(7)]
+    first = rows[0]
+    assert first["endpoint"] == "/predict"
+    assert first["model_version"] == "v1"
+    assert first["confidence_level"] == "Alta"
+    assert first["probability_survive"] == pytest.approx(0.3)
+    assert first["probability_die"] == pytest.approx(0.7)
+    assert not first["survived"]
+    assert all(row["survived"] for row in rows[1:])
+    assert first["created_at"] is not None
+
+
+def test_background_task_flushes_on_size_and_on_time(url):
+    async def run():
+        log = PredictionLog(url, flush_rows=4, flush_seconds=60.0)
+        await log.start()
+        for i in range(4):
+            _record(log, i)
+        # Al juntar flush_rows filas la tarea de fondo escribe sin esperar el plazo
+        for _ in range(200):
+            if log.written == 4:
+                break
+            await asyncio.sleep(0.01)
+        by_size = log.written
+
+        # Con un plazo corto, una fila suelta se escribe sin llegar a flush_rows
+        log.flush_seconds = 0.05
+        log._wakeup.set()
+        await asyncio.sleep(0)
+        _record(log, 4)
+        for _ in range(200):
+            if log.written == 5:
+                break
+            await asyncio.sleep(0.01)
+        by_time = log.written
+        await log.stop()
+        return by_size, by_time
+
+    by_size, by_time = asyncio.run(run())
+    assert (by_size, by_time) == (4, 5)
+    assert len(_rows(url)) == 5
+
+
+def test_full_buffer_drops_rows_without_blocking(url):
+    log = PredictionLog(url, max_buffer=3)
+    assert [_record(log, i) for i in range(5)] == [True, True, True, False, False]
+    stats = log.stats()
+    assert (stats["buffered"], stats["dropped"]) == (3, 2)
+
+
+def test_failed_write_is_counted_and_discarded(url):
+    async def run():
+        log = PredictionLog(url, flush_seconds=60.0)
+        await log.start()
+        # La tabla desaparece con la aplicación corriendo: el INSERT falla
+        with log._engine.begin() as conn:
+            conn.execute(sqlalchemy.text("DROP TABLE predictions"))
+        for i in range(3):
+            _record(log, i)
+        await log.stop()
+        return log
+
+    stats = asyncio.run(run()).stats()
+    assert (stats["buffered"], stats["written"], stats["failed"]) == (0, 0, 3)
+    assert stats["last_error"].startswith("OperationalError")
+
+
+def test_predict_endpoints_enqueue_their_rows(client, monkeypatch):
+    from app.main import app
+
+    log = PredictionLog("sqlite://")
+    monkeypatch.setattr(app.state, "prediction_log", log)
+    passenger = synthetic_passengers(1, seed=31)[0]
+
+    single = client.post("/predict", json=passenger).json()
+    batch = client.post("/predict/batch", json={"passengers": [passenger, {**passenger, "Sex": "robot"}]}).json()
+
+    assert [row["endpoint"] for row in log.buffer] == ["/predict", "/predict/batch"]
+    for row, body in zip(log.buffer, (single, batch["results"][0]["prediction"])):
+        assert "name" not in row["features"]
+        assert row["features"]["Pclass"] == passenger["Pclass"]
+        assert row["probability_survive"] * 100 == pytest.approx(body["probability_survive"], abs=0.01)
+        assert row["confidence_level"] == body["confidence_level"]
+    assert client.get("/prediction-log/stats").json()["buffered"] == 2
@@ -0,0 +1,127 @@
+# tests/test_streaming.py
+"""
+`/predict/stream`: el cuerpo se parte en líneas y bloques sin importar cómo
+llegan los bytes, y cada fila produce exactamente una línea de salida en el
+orden de entrada.
+"""
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+
+from app import config
+from app.streaming import MAX_LINE_BYTES, iter_chunks, iter_csv_records, iter_lines, iter_ndjson_records
+from app.synthetic import synthetic_passengers
+
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+
+async def _collect(iterator):
+    return [item async for item in iterator]
+
+
+def _lines(chunks):
+    return asyncio.run(_collect(iter_lines(_aiter(chunks))))
+
+
+def _ndjson(lines):
+    return asyncio.run(_collect(iter_ndjson_records(_aiter(lines))))
+
+
+def _csv(lines):
+    return asyncio.run(_collect(iter_csv_records(_aiter(lines))))
+
+
+def test_lines_are_joined_across_chunk_boundaries():
+    assert _lines([b'{"a"', b': 1}\n{"b": 2}\n', b'{"c"', b": 3}"]) == ['{"a": 1}', '{"b": 2}', '{"c": 3}']
+
+
+def test_crlf_is_stripped_even_when_split_between_chunks():
+    assert _lines([b"uno\r", b"\ndos\r\n"]) == ["uno", "dos"]
+
+
+def test_multibyte_characters_survive_a_split():
+    data = "Peñalosa\n".encode("utf-8")
+    cut = data.index(b"\xc3") + 1
+    assert _lines([data[:cut], data[cut:]]) == ["Peñalosa"]
+
+
+def test_overlong_line_is_reported_once_and_skipped():
+    chunks = [b"ok\n", b"x" * (MAX_LINE_BYTES // 2)] + [b"x" * (MAX_LINE_BYTES // 2)] * 3 + [b"\nsigue\n"]
+    assert _lines(chunks) == ["ok", None, "sigue"]
+
+
+def test_ndjson_reports_bad_lines_in_place_and_skips_blank_ones():
+    records = _ndjson(['{"a": 1}', "", "   ", "{roto", "[1, 2]", None, '{"b": 2}'])
+    assert [index for index, _ in records] == [0, 1, 2, 3, 4]
+    assert records[0] == (0, {"a": 1})
+    assert records[1][1].startswith("JSON inválido")
+    assert records[2] == (2, "Se esperaba un objeto JSON")
+    assert records[3][1].startswith("Línea demasiado larga")
+    assert records[4] == (4, {"b": 2})
+
+
+def test_csv_uses_header_and_handles_quoted_newlines():
+    records = _csv(["Name,Sex,Age", '"Smith,', ' Mr. John",male,3', "", "solo,dos", "Ana,female,"])
+    assert records == [
+        (0, {"Name": "Smith,\n Mr. John", "Sex": "male", "Age": "3"}),
+        (1, "Se esperaban 3 columnas, se recibieron 2"),
+        (2, {"Name": "Ana", "Sex": "female"}),
+    ]
+
+
+def test_csv_reports_unclosed_quotes_at_end():
+    assert _csv(["Name", '"abierto']) == [(0, "Comillas sin cerrar al final de la entrada")]
+
+
+@pytest.mark.parametrize("total, size, sizes", [(0, 3, []), (3, 3, [3]), (7, 3, [3, 3, 1]), (2, 5, [2])])
+def test_chunks_have_at_most_size_records(total, size, sizes):
+    records = [(i, {}) for i in range(total)]
+    chunks = asyncio.run(_collect(iter_chunks(_aiter(records), size)))
+    assert [len(chunk) for chunk in chunks] == sizes
+    assert [record for chunk in chunks for record in chunk] == records
+
+
+@pytest.fixture(scope="module")
+def passengers(loaded):
+    return synthetic_passengers(7, seed=23)
+
+
+def _stream(client, body: bytes, content_type: str):
+    response = client.post("/predict/stream", content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_ndjson_stream_matches_single_predictions_across_chunks(client, passengers, monkeypatch):
+    monkeypatch.setattr(config, "STREAM_CHUNK_ROWS", 3)
+    lines = [json.dumps(p) for p in passengers]
+    lines[2] = "{roto"
+    lines[4] = json.dumps({**passengers[4], "Sex": "robot"})
+    body = ("\n".join(lines[:4]) + "\n\n" + "\r\n".join(lines[4:])).encode("utf-8")
+
+    results = _stream(client, body, "application/x-ndjson")
+    assert [item["index"] for item in results] == list(range(7))
+    assert results[2]["error"].startswith("JSON inválido")
+    assert "Sex" in results[4]["error"]
+    for i in (0, 1, 3, 5, 6):
+        assert "error" not in results[i]
+        assert results[i]["prediction"] == client.post("/predict", json=passengers[i]).json()
+
+
+def test_csv_stream_matches_ndjson_stream(client, passengers, monkeypatch):
+    monkeypatch.setattr(config, "STREAM_CHUNK_ROWS", 2)
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=list(passengers[0]))
+    writer.writeheader()
+    writer.writerows(passengers)
+
+    from_csv = _stream(client, out.getvalue().encode("utf-8"), "text/csv")
+    from_ndjson = _stream(client, "\n".join(json.dumps(p) for p in passengers).encode("utf-8"), "application/x-ndjson")
+    assert from_csv == from_ndjson
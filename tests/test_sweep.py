@@ -0,0 +1,52 @@
+# tests/test_sweep.py
+"""
+La barrida arma la grilla sin un registro por punto y la evalúa con el mismo
+motor que un lote del mismo tamaño; debe dar lo mismo que puntuar cada punto.
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from app import config
+from app.model import predict_proba_records, sweep_survival
+from app.synthetic import synthetic_passengers
+
+AXES = {
+    "one": (["Pclass"], [[1, 2, 3]]),
+    "two": (["Age", "Sex"], [[0.0, 2.0, 5.0, 8.0], ["male", "female"]]),
+}
+
+
+@pytest.fixture(scope="module")
+def base(loaded):
+    return synthetic_passengers(1, seed=4)[0]
+
+
+def expected(loaded, base, fields, values):
+    records = [{**base, **dict(zip(fields, combo))} for combo in itertools.product(*values)]
+    survived = int(np.flatnonzero(loaded.pipeline.classes_ == 1)[0])
+    return predict_proba_records(records, loaded)[:, survived].reshape([len(v) for v in values])
+
+
+@pytest.mark.parametrize("axes", sorted(AXES))
+def test_sweep_matches_records(loaded, base, axes):
+    fields, values = AXES[axes]
+    assert np.array_equal(sweep_survival(base, fields, values), expected(loaded, base, fields, values))
+
+
+def test_small_grid_uses_flat_forest(loaded, base, monkeypatch):
+    def fail(X):
+        raise AssertionError("la grilla chica no debería llegar a sklearn")
+
+    monkeypatch.setattr(loaded.encoder.estimator, "predict_proba", fail)
+    values = [list(np.linspace(0.0, 8.0, config.FLAT_ENGINE_MAX_ROWS))]
+    assert sweep_survival(base, ["Age"], values).shape == (config.FLAT_ENGINE_MAX_ROWS,)
+
+
+def test_sweep_without_compiled_encoder(loaded, base, monkeypatch):
+    fields, values = AXES["two"]
+    fast = sweep_survival(base, fields, values)
+    monkeypatch.setattr(loaded, "encoder", None)
+    monkeypatch.setattr(loaded, "forest", None)
+    assert np.array_equal(sweep_survival(base, fields, values), fast)